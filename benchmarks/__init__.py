@@ -0,0 +1,9 @@
+"""
+Package:    benchmarks
+Purpose:
+    Performance benchmarks for the zipcli.main archiving pipeline.
+
+Usage:
+    python -m benchmarks.run --output bench_results.json
+    python -m benchmarks.run --compare bench_results.json    # flag regressions against a saved run
+"""
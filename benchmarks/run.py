@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Script:     run.py
+Purpose:
+    Time the phases of the zipcli archiving pipeline on synthetic trees and save
+    the results as JSON, so hot-path regressions can be compared between versions.
+
+    Phases: walk (scan_files), filter (FileFilter), compress (compress_member),
+    inventory (InventoryWriter), retention (enforce_zip_retention over an index of
+    RETENTION_ARCHIVES archives) and end_to_end (create_zip_archive).
+
+Usage:
+    python -m benchmarks.run [--shapes many_tiny,few_huge] [--scale 0.5] [--repeat 3]
+                             [--workers 4] [--output bench_results.json]
+                             [--compare baseline.json] [--threshold 0.15]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.trees import SHAPES, tree_size
+from zipcli import main as zipcli_main
+from zipcli.main import (DEFAULT_POLICY, FileFilter, InventoryWriter, compress_member, create_zip_archive,
+                         enforce_zip_retention, ordered_map, save_archive_index, scan_files)
+
+INCLUDES = ["*.txt", "*.log", "*.bin", "*.dat", "*.csv", "*.json"]
+EXCLUDES = ["*.tmp", "cache*", "**/level29/*.log"]
+RETENTION_ARCHIVES = 2000
+
+
+def timed(func, repeat: int):
+    """Run func [repeat] times and return (best seconds, last result)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def phase_walk(root: Path):
+    return list(scan_files(root, [], []))
+
+
+def phase_filter(entries):
+    file_filter = FileFilter(INCLUDES, EXCLUDES)
+    return sum(1 for e in entries if file_filter.included(os.path.basename(e.path), e.relpath))
+
+
+def phase_compress(entries, workers: int):
+    def compress(entry):
+        member = compress_member(entry.path, policy=DEFAULT_POLICY)
+        member.data.close()
+        return member.compress_size
+    return sum(ordered_map(compress, entries, workers))
+
+
+def phase_inventory(entries, out_dir: Path):
+    with InventoryWriter(out_dir / "bench_inventory.jsonl", "jsonl") as inventory:
+        for e in entries:
+            inventory.add(e.relpath, e.stat.st_size, e.stat.st_size // 2, 0, e.stat.st_mtime, "deflate", 0.0)
+
+
+def phase_retention(backup_dir: Path):
+    """Prune an index of RETENTION_ARCHIVES empty archives down to 10 daily generations."""
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    backup_dir.mkdir(parents=True)
+    source = Path("bench")
+    start = datetime(2020, 1, 1)
+    entries = []
+    for i in range(RETENTION_ARCHIVES):
+        name = f"bench_{i:05d}.zip"
+        (backup_dir / name).touch()
+        entries.insert(0, {"name": name, "created": (start + timedelta(hours=i)).isoformat(),
+                           "sidecars": [], "references": []})
+    save_archive_index(source, backup_dir, entries)
+
+    started = time.perf_counter()
+    enforce_zip_retention(source, backup_dir, "%Y%m%d", keep=5, daily=10)
+    return time.perf_counter() - started
+
+
+def phase_end_to_end(root: Path, backup_dir: Path, workers: int):
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    backup_dir.mkdir(parents=True)
+    return create_zip_archive(source_dir=root, includes=[], excludes=[], date_format="%Y%m%d%H%M%S%f",
+                              inventory=True, backup_location=backup_dir, workers=workers,
+                              inventory_format="jsonl")
+
+
+def bench_shape(shape: str, workdir: Path, scale: float, repeat: int, workers: int) -> dict:
+    root = workdir / shape
+    if not root.exists():
+        SHAPES[shape](root, scale)
+    files, total_bytes = tree_size(root)
+    scratch = workdir / f"{shape}_scratch"
+    scratch.mkdir(exist_ok=True)
+
+    phases = {}
+    phases["walk"], entries = timed(lambda: phase_walk(root), repeat)
+    phases["filter"], _ = timed(lambda: phase_filter(entries), repeat)
+    phases["compress"], compressed = timed(lambda: phase_compress(entries, workers), repeat)
+    phases["inventory"], _ = timed(lambda: phase_inventory(entries, scratch), repeat)
+    phases["retention"] = min(phase_retention(scratch / "retention") for _ in range(repeat))
+    phases["end_to_end"], _ = timed(lambda: phase_end_to_end(root, scratch / "backup", workers), repeat)
+
+    return {
+        "files": files,
+        "bytes": total_bytes,
+        "compressed_bytes": compressed,
+        "phases": {
+            name: {
+                "seconds": round(seconds, 6),
+                "us_per_file": round(seconds * 1e6 / max(files, 1), 3) if name != "retention" else None,
+                "mb_per_s": round(total_bytes / 1e6 / seconds, 2) if seconds and name != "retention" else None,
+            }
+            for name, seconds in phases.items()
+        },
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return human-readable regressions where a phase got slower than baseline * (1 + threshold)."""
+    regressions = []
+    for shape, data in results["shapes"].items():
+        base_shape = baseline.get("shapes", {}).get(shape)
+        if not base_shape:
+            continue
+        for phase, timing in data["phases"].items():
+            base = base_shape["phases"].get(phase, {}).get("seconds")
+            if base and timing["seconds"] > base * (1 + threshold):
+                regressions.append(f"{shape}/{phase}: {base:.4f}s -> {timing['seconds']:.4f}s "
+                                   f"(+{(timing['seconds'] / base - 1) * 100:.0f}%)")
+    return regressions
+
+
+def run_benchmarks(shapes, scale: float = 1.0, repeat: int = 3, workers: int = 1, workdir: Path = None) -> dict:
+    own_workdir = workdir is None
+    workdir = Path(tempfile.mkdtemp(prefix="zipcli_bench_")) if own_workdir else workdir
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            shape_results = {shape: bench_shape(shape, workdir, scale, repeat, workers) for shape in shapes}
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "zipcli_version": zipcli_main.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "scale": scale,
+        "repeat": repeat,
+        "workers": workers,
+        "shapes": shape_results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="zipcli pipeline benchmarks")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"Comma-separated shapes (default: {','.join(SHAPES)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply tree sizes by this factor (default: 1.0)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per phase; the fastest is reported (default: 3)")
+    parser.add_argument("--workers", type=int, default=1, help="Compression workers (default: 1)")
+    parser.add_argument("--workdir", type=Path, help="Keep generated trees here and reuse them between runs")
+    parser.add_argument("--output", type=Path, help="Save results as JSON")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown before flagging (default: 0.15)")
+    args = parser.parse_args()
+
+    shapes = [s for s in args.shapes.split(",") if s]
+    unknown = [s for s in shapes if s not in SHAPES]
+    if unknown:
+        print(f"[FAIL] Unknown shapes: {unknown}")
+        sys.exit(2)
+    if args.workdir:
+        args.workdir.mkdir(parents=True, exist_ok=True)
+
+    results = run_benchmarks(shapes, args.scale, args.repeat, args.workers, args.workdir)
+
+    for shape, data in results["shapes"].items():
+        print(f"{shape}: {data['files']} files, {data['bytes'] / 1e6:.1f} MB")
+        for phase, timing in data["phases"].items():
+            rate = f"{timing['mb_per_s']:>9.1f} MB/s" if timing["mb_per_s"] else ""
+            per_file = f"{timing['us_per_file']:>10.1f} us/file" if timing["us_per_file"] is not None else ""
+            print(f"  {phase:<11} {timing['seconds']:>9.4f} s  {per_file} {rate}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"[✓] Results saved to: {args.output}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+        for line in regressions:
+            print(f"[WARN] Regression {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"[✓] No phase slower than baseline by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Script:     startup.py
+Purpose:
+    Measure how long zipcli takes to start and fail when it is over budget.
+
+    - import: cumulative `python -X importtime` time of zipcli.main, with bytecode
+      cached as it is in a frozen build (best of --repeat runs)
+    - lazy modules: none of LAZY_MODULES may be imported by `import zipcli.main`
+    - command (optional): wall-clock time of `<exe> --help` for a built executable,
+      e.g. the --onefile or --onedir output of scripts/build_exe.py
+
+Usage:
+    python -m benchmarks.startup [--budget-ms 60] [--repeat 5]
+                                 [--exe dist/zip-cli-v1.1.0/zip-cli-v1.1.0.exe] [--exe-budget-ms 500]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULE = "zipcli.main"
+
+# Only needed on some code paths; importing zipcli.main must not load them
+LAZY_MODULES = ("argparse", "csv", "hashlib", "configparser", "shlex",
+                "concurrent.futures", "dataclasses", "inspect", "logging", "sqlite3")
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Map module name -> (self us, cumulative us) from `python -X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import(module: str = MODULE, repeat: int = 5) -> tuple:
+    """
+    Import [module] in a fresh interpreter [repeat] times (plus one warm-up run that
+    writes the bytecode cache) and return (best cumulative ms, importtime table of that run).
+    """
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    best = None
+    with tempfile.TemporaryDirectory(prefix="zipcli_pyc_") as pyc:
+        cmd = [sys.executable, "-X", f"pycache_prefix={pyc}", "-X", "importtime", "-c", f"import {module}"]
+        for run in range(repeat + 1):
+            result = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+            table = parse_importtime(result.stderr)
+            if run and (best is None or table[module][1] < best[1][module][1]):
+                best = (table[module][1] / 1000, table)
+    return best
+
+
+def imported_lazy_modules(module: str = MODULE) -> list:
+    """Return the LAZY_MODULES that `import [module]` loads."""
+    code = f"import sys, {module}; print('\\n'.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], env=dict(os.environ, PYTHONPATH=str(ROOT)),
+                            capture_output=True, text=True, check=True)
+    loaded = set(result.stdout.split())
+    return [name for name in LAZY_MODULES if name in loaded]
+
+
+def measure_command(cmd: list, repeat: int = 5) -> float:
+    """Best wall-clock ms of running [cmd] (after one warm-up run)."""
+    best = None
+    for run in range(repeat + 1):
+        start = time.perf_counter()
+        subprocess.run(cmd, capture_output=True, check=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        if run:
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="zipcli startup benchmark")
+    parser.add_argument("--budget-ms", type=float, default=60.0,
+                        help="Cumulative import time allowed for zipcli.main (default: 60)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the fastest counts (default: 5)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list (default: 10)")
+    parser.add_argument("--exe", type=Path, help="Built executable to time with --help")
+    parser.add_argument("--exe-budget-ms", type=float, default=500.0,
+                        help="Wall-clock time allowed for '<exe> --help' (default: 500)")
+    args = parser.parse_args()
+
+    failures = []
+
+    import_ms, table = measure_import(MODULE, args.repeat)
+    print(f"import {MODULE}: {import_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, (self_us, cumulative_us) in sorted(table.items(), key=lambda t: -t[1][0])[:args.top]:
+        print(f"  {self_us / 1000:>7.2f} ms self  {cumulative_us / 1000:>7.2f} ms cumulative  {name}")
+    if import_ms > args.budget_ms:
+        failures.append(f"import {MODULE} took {import_ms:.1f} ms")
+
+    eager = imported_lazy_modules(MODULE)
+    if eager:
+        failures.append(f"import {MODULE} loads modules that should be lazy: {', '.join(eager)}")
+
+    if args.exe:
+        exe_ms = measure_command([str(args.exe), "--help"], args.repeat)
+        print(f"{args.exe.name} --help: {exe_ms:.1f} ms (budget {args.exe_budget_ms:.0f} ms)")
+        if exe_ms > args.exe_budget_ms:
+            failures.append(f"{args.exe.name} --help took {exe_ms:.1f} ms")
+
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    if failures:
+        sys.exit(1)
+    print("[✓] Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
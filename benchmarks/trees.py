@@ -0,0 +1,94 @@
+"""
+Script:     trees.py
+Purpose:
+    Generate synthetic source trees of fixed shapes for the benchmarks. Every
+    tree is built from a seeded RNG, so two runs (or two versions) archive the
+    same bytes.
+"""
+
+import os
+import random
+from pathlib import Path
+
+BLOCK = 64 * 1024
+
+
+def _compressible(rng: random.Random, size: int) -> bytes:
+    words = [b"alpha", b"beta", b"gamma", b"delta", b"backup", b"archive", b"zip", b"\n"]
+    out = bytearray()
+    while len(out) < size:
+        out += rng.choice(words) + b" "
+    return bytes(out[:size])
+
+
+def _incompressible(rng: random.Random, size: int) -> bytes:
+    return rng.randbytes(size)
+
+
+def _write(path: Path, rng: random.Random, size: int, compressible: bool):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    make = _compressible if compressible else _incompressible
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            n = min(BLOCK, remaining)
+            f.write(make(rng, n))
+            remaining -= n
+
+
+def many_tiny(root: Path, scale: float = 1.0):
+    """Lots of small text files spread over a few folders."""
+    rng = random.Random(1)
+    for i in range(int(5000 * scale)):
+        _write(root / f"d{i % 20:02d}" / f"f{i:06d}.txt", rng, rng.randint(10, 2000), True)
+
+
+def few_huge(root: Path, scale: float = 1.0):
+    """A handful of large files, half compressible and half not."""
+    rng = random.Random(2)
+    for i in range(4):
+        _write(root / f"huge{i}.bin", rng, int(32 * 1024 * 1024 * scale), i % 2 == 0)
+
+
+def deep_nesting(root: Path, scale: float = 1.0):
+    """Narrow, deep folder chains with a few files at every level."""
+    rng = random.Random(3)
+    for chain in range(int(20 * scale) or 1):
+        folder = root / f"chain{chain:03d}"
+        for depth in range(30):
+            folder = folder / f"level{depth:02d}"
+            for i in range(3):
+                _write(folder / f"f{i}.log", rng, rng.randint(100, 4000), True)
+
+
+def compressible(root: Path, scale: float = 1.0):
+    """Medium-sized text files that deflate well."""
+    rng = random.Random(4)
+    for i in range(int(200 * scale)):
+        _write(root / f"text{i:04d}.txt", rng, 256 * 1024, True)
+
+
+def incompressible(root: Path, scale: float = 1.0):
+    """Medium-sized random files, as with photos or media."""
+    rng = random.Random(5)
+    for i in range(int(200 * scale)):
+        _write(root / f"media{i:04d}.dat", rng, 256 * 1024, False)
+
+
+SHAPES = {
+    "many_tiny": many_tiny,
+    "few_huge": few_huge,
+    "deep_nesting": deep_nesting,
+    "compressible": compressible,
+    "incompressible": incompressible,
+}
+
+
+def tree_size(root: Path):
+    """Return (file count, total bytes) of a generated tree."""
+    count = total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            count += 1
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return count, total
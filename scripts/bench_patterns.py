@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Script:     bench_patterns.py
+Purpose:    Micro-benchmark of include/exclude matching cost per file. Compares the
+            original per-pattern fnmatch loop with zipcli.main.PatternMatcher.
+
+Usage:
+    python scripts/bench_patterns.py [--files 200000] [--patterns 40]
+"""
+
+import argparse
+import fnmatch
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from zipcli.main import PatternMatcher  # noqa: E402
+
+EXTENSIONS = ["txt", "csv", "log", "json", "py", "jpg", "png", "mp4", "zip", "md", "xml", "tmp"]
+
+
+def make_patterns(count: int):
+    patterns = [f"*.{ext}" for ext in EXTENSIONS]
+    while len(patterns) < count:
+        patterns.append(random.choice(["secret*", "draft_??.*", "[abc]*.bak", "*~", "cache*", "*.tar.gz"]) + str(len(patterns)))
+    return patterns[:count]
+
+
+def make_names(count: int):
+    return [f"file_{i}.{random.choice(EXTENSIONS + ['dat', 'bin'])}" for i in range(count)]
+
+
+def fnmatch_loop(names, patterns):
+    return sum(1 for n in names if any(fnmatch.fnmatch(n, p) for p in patterns))
+
+
+def compiled(names, patterns):
+    matcher = PatternMatcher(patterns)
+    return sum(1 for n in names if matcher.match(n))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pattern matching micro-benchmark")
+    parser.add_argument("--files", type=int, default=200_000)
+    parser.add_argument("--patterns", type=int, default=40)
+    args = parser.parse_args()
+
+    random.seed(0)
+    names = make_names(args.files)
+    patterns = make_patterns(args.patterns)
+
+    results = {}
+    for label, func in (("fnmatch loop", fnmatch_loop), ("PatternMatcher", compiled)):
+        start = time.perf_counter()
+        matched = func(names, patterns)
+        elapsed = time.perf_counter() - start
+        results[label] = matched
+        print(f"{label:<16} {elapsed * 1e9 / len(names):10.0f} ns/file  ({matched} matched)")
+
+    if len(set(results.values())) != 1:
+        print("[FAIL] Matchers disagree")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
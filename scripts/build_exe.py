@@ -4,8 +4,16 @@ Script:     build_exe.py
 Purpose:    Builds versioned .exe from zipcli/main.py, updates README.txt with usage section,
             and organizes everything into versioned folders. Also creates a .zip and copies
             it to /mnt/zipcli (Samba share) for network distribution.
+
+Usage:      python scripts/build_exe.py [--onedir]
+
+            --onefile (default) builds a single .exe that unpacks itself to a temp
+            folder on every run. --onedir builds a folder with the .exe next to its
+            libraries, which starts much faster; use it for scheduled jobs that run
+            the tool many times (see benchmarks/startup.py --exe).
 """
 
+import argparse
 import re
 import shutil
 import platform
@@ -17,6 +25,10 @@ README = Path("README.txt")
 USAGE = Path("USAGE.txt")
 SHARE_MOUNT_PATH = Path("/mnt/zipcli")  # Mounted Samba share (Linux)
 
+parser = argparse.ArgumentParser(description="Build the zipcli executable with PyInstaller")
+parser.add_argument("--onedir", action="store_true", help="Build a folder instead of a single self-extracting .exe")
+args = parser.parse_args()
+
 # Extract version from zipcli/main.py
 MATCH = re.search(r'__version__\s*=\s*"(.+?)"', SOURCE.read_text(encoding="utf-8"))
 version = MATCH.group(1) if MATCH else "0.0.0"
@@ -57,18 +69,20 @@ def update_readme_usage(readme_path: Path, usage_text: str):
 # Step 1: Build the .exe with PyInstaller
 subprocess.run([
     "pyinstaller",
-    "--onefile",
+    "--onedir" if args.onedir else "--onefile",
     "--name", base_name,
     "zipcli/main.py"
 ], check=True)
 
 # Step 2: Move .exe to versioned subfolder under dist/
+# (--onedir already builds dist/<base_name>/ with the .exe and its libraries)
 dist_dir = Path("dist")
 target_folder = dist_dir / base_name
 target_folder.mkdir(exist_ok=True)
 
-shutil.move(str(dist_dir / exe_name), str(target_folder / exe_name))
-print(f"📦 Moved {exe_name} to {target_folder}")
+if not args.onedir:
+    shutil.move(str(dist_dir / exe_name), str(target_folder / exe_name))
+    print(f"📦 Moved {exe_name} to {target_folder}")
 
 # Step 3: Inject usage section and copy README and USAGE
 if README.exists():
@@ -0,0 +1,27 @@
+# tests/conftest.py
+
+from pathlib import Path
+from typing import Callable, Dict, Union
+
+import pytest
+
+
+@pytest.fixture
+def make_source(tmp_path: Path) -> Callable[[Dict[str, Union[str, bytes]]], Path]:
+    """Build a source tree under tmp_path/"src" from a {relative path: contents} mapping.
+
+    Text contents are written with write_text and bytes with write_bytes; parent
+    folders are created as needed. Calling it again adds to the same tree.
+    """
+    def make(tree: Dict[str, Union[str, bytes]]) -> Path:
+        source_dir = tmp_path / "src"
+        source_dir.mkdir(exist_ok=True)
+        for relpath, contents in tree.items():
+            path = source_dir / relpath
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(contents, bytes):
+                path.write_bytes(contents)
+            else:
+                path.write_text(contents)
+        return source_dir
+    return make
@@ -0,0 +1,105 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+
+import zipcli.main as zipcli_main
+from zipcli.main import catalog_path, main, read_batch_config, run_batch
+
+
+def write_config(tmp_path: Path, body: str) -> Path:
+    config_path = tmp_path / "batch.config"
+    config_path.write_text(body)
+    return config_path
+
+
+def test_batch_archives_each_source_with_its_own_settings(tmp_path: Path):
+    for name in ("alpha", "beta"):
+        (tmp_path / name / "sub").mkdir(parents=True)
+        (tmp_path / name / "a.txt").write_text(name * 1000)
+        (tmp_path / name / "sub" / "b.log").write_text("log")
+        (tmp_path / name / "c.tmp").write_text("tmp")
+    config_path = write_config(tmp_path, """
+[DEFAULT]
+backup_location = backups
+date_format = %Y%m%d
+[alpha]
+folder = alpha
+exclude = *.tmp
+[beta]
+folder = beta
+filter = *.log
+backup_location = other
+""")
+
+    jobs = read_batch_config(config_path)
+    assert [name for name, _ in jobs] == ["alpha", "beta"]
+    assert run_batch(jobs, workers=3, io_limit=1, parallel=2) == 0
+
+    alpha_zips = list((tmp_path / "backups").glob("alpha_*.zip"))
+    beta_zips = list((tmp_path / "other").glob("beta_*.zip"))
+    assert len(alpha_zips) == len(beta_zips) == 1
+    with zipfile.ZipFile(alpha_zips[0]) as zf:
+        assert sorted(zf.namelist()) == ["a.txt", "sub/b.log"]
+    with zipfile.ZipFile(beta_zips[0]) as zf:
+        assert zf.namelist() == ["sub/b.log"]
+
+
+def test_batch_config_rejects_unknown_keys_and_clashes(tmp_path: Path):
+    with pytest.raises(ValueError, match="unknown keys"):
+        read_batch_config(write_config(tmp_path, "[a]\nfolder = x\nkeeep = 3\n"))
+    with pytest.raises(ValueError, match="both write"):
+        read_batch_config(write_config(tmp_path, "[a]\nfolder = x\n[b]\nfolder = ./x\n"))
+    with pytest.raises(ValueError, match=r"\[a\] level must be between 1 and 9 for bzip2 \(got 0\)"):
+        read_batch_config(write_config(tmp_path, "[a]\nfolder = x\ncompression = bzip2\nlevel = 0\n"))
+    with pytest.raises(ValueError, match="between 0 and 9"):
+        read_batch_config(write_config(tmp_path, "[a]\nfolder = x\nlevel = 12\n"))
+
+
+def test_batch_failure_does_not_stop_other_sources(tmp_path: Path, capsys):
+    (tmp_path / "ok").mkdir()
+    (tmp_path / "ok" / "a.txt").write_text("a")
+    config_path = write_config(tmp_path, "[missing]\nfolder = missing\n[ok]\nfolder = ok\nbackup_location = out\n")
+
+    main(["batch", str(config_path), "--workers", "2"])
+
+    assert "[FAIL] 1 of 2 sources failed" in capsys.readouterr().out
+    assert len(list((tmp_path / "out").glob("ok_*.zip"))) == 1
+
+
+def test_batch_unexpected_error_fails_only_its_source(tmp_path: Path, monkeypatch, capsys):
+    for name in ("bad", "ok"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "a.txt").write_text(name)
+    real_create = zipcli_main.create_zip_archive
+
+    def create(source_dir, *args, **kwargs):
+        if source_dir.name == "bad":
+            raise KeyError("boom")
+        return real_create(source_dir, *args, **kwargs)
+    monkeypatch.setattr(zipcli_main, "create_zip_archive", create)
+    config_path = write_config(tmp_path, "[DEFAULT]\nbackup_location = out\n[bad]\nfolder = bad\n[ok]\nfolder = ok\n")
+
+    assert run_batch(read_batch_config(config_path), workers=2) == 1
+
+    assert "[FAIL] bad: KeyError: 'boom'" in capsys.readouterr().out
+    assert len(list((tmp_path / "out").glob("ok_*.zip"))) == 1
+
+
+def test_batch_unchanged_cache_dir_and_catalog_keys(tmp_path: Path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.txt").write_text("a")
+    config_path = write_config(tmp_path, "[src]\nfolder = src\nbackup_location = out\nunchanged = skip\n"
+                                         "date_format = %Y%m%d%H%M%S%f\nkeep = 5\ncache_dir = cache\n"
+                                         "catalog = yes\n")
+
+    jobs = read_batch_config(config_path)
+    assert jobs[0][1]["unchanged"] == "skip"
+    assert jobs[0][1]["cache_dir"] == (tmp_path / "cache").resolve()
+    assert run_batch(jobs) == 0
+    assert run_batch(read_batch_config(config_path)) == 0
+    assert len(list((tmp_path / "out").glob("src_*.zip"))) == 1
+    assert catalog_path(tmp_path / "out", tmp_path / "cache").exists()
+
+    with pytest.raises(ValueError, match="unknown unchanged action"):
+        read_batch_config(write_config(tmp_path, "[a]\nfolder = x\nunchanged = maybe\n"))
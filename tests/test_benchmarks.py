@@ -0,0 +1,24 @@
+from benchmarks.run import compare, run_benchmarks
+from benchmarks.startup import imported_lazy_modules, parse_importtime
+
+
+def test_benchmark_suite_smoke():
+    results = run_benchmarks(["many_tiny", "deep_nesting"], scale=0.01, repeat=1)
+
+    for shape in ("many_tiny", "deep_nesting"):
+        phases = results["shapes"][shape]["phases"]
+        assert set(phases) == {"walk", "filter", "compress", "inventory", "retention", "end_to_end"}
+        assert all(p["seconds"] >= 0 for p in phases.values())
+
+    slower = {"shapes": {"many_tiny": {"phases": {"walk": {"seconds": 2.0}}}}}
+    baseline = {"shapes": {"many_tiny": {"phases": {"walk": {"seconds": 1.0}}}}}
+    assert compare(slower, baseline, 0.15) == ["many_tiny/walk: 1.0000s -> 2.0000s (+100%)"]
+    assert compare(baseline, slower, 0.15) == []
+
+
+def test_startup_imports_stay_lazy():
+    assert imported_lazy_modules() == []
+
+    table = parse_importtime("import time: self [us] | cumulative | imported package\n"
+                             "import time:       120 |        450 | zipcli.main\n")
+    assert table == {"zipcli.main": (120, 450)}
@@ -0,0 +1,55 @@
+import os
+import zipfile
+from pathlib import Path
+
+from zipcli.main import CompressionPolicy, create_zip_archive, sidecar_path, INVENTORY_SUFFIX
+
+
+def _archive(source_dir: Path, backup_dir: Path, policy=None):
+    backup_dir.mkdir()
+    return create_zip_archive(
+        source_dir=source_dir,
+        includes=[],
+        excludes=[],
+        date_format="%Y%m%d",
+        inventory=True,
+        backup_location=backup_dir,
+        policy=policy
+    )
+
+
+def _make_tree(source_dir: Path):
+    source_dir.mkdir()
+    (source_dir / "notes.txt").write_text("compress me " * 1000)
+    (source_dir / "photo.jpg").write_bytes(b"not really a jpeg " * 100)
+    (source_dir / "noise.dat").write_bytes(os.urandom(100_000))
+
+
+def test_default_policy_stores_incompressible_files(tmp_path: Path):
+    source_dir = tmp_path / "src"
+    _make_tree(source_dir)
+    zip_path = _archive(source_dir, tmp_path / "out")
+
+    with zipfile.ZipFile(zip_path) as zf:
+        methods = {i.filename: i.compress_type for i in zf.infolist()}
+        assert zf.testzip() is None
+    assert methods == {
+        "notes.txt": zipfile.ZIP_DEFLATED,
+        "photo.jpg": zipfile.ZIP_STORED,   # known extension
+        "noise.dat": zipfile.ZIP_STORED,   # failed the trial compression
+    }
+
+    inventory = sidecar_path(zip_path, INVENTORY_SUFFIX).read_text(encoding="utf-8").splitlines()
+    assert "notes.txt\tdeflate" in inventory
+    assert "photo.jpg\tstore" in inventory
+
+
+def test_explicit_method_without_auto_store(tmp_path: Path):
+    source_dir = tmp_path / "src"
+    _make_tree(source_dir)
+    policy = CompressionPolicy("lzma", auto_store=False)
+    zip_path = _archive(source_dir, tmp_path / "out", policy)
+
+    with zipfile.ZipFile(zip_path) as zf:
+        assert {i.compress_type for i in zf.infolist()} == {zipfile.ZIP_LZMA}
+        assert zf.read("notes.txt") == (source_dir / "notes.txt").read_bytes()
@@ -0,0 +1,87 @@
+import os
+import random
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from zipcli.main import (chunk_store, create_snapshot, enforce_zip_retention, export_snapshot, main,
+                         iter_chunks, CDC_MAX_SIZE, CDC_MIN_SIZE)
+
+
+def _snapshot(source_dir: Path, backup_dir: Path, stamp: str, keep: int = 10):
+    return create_snapshot(
+        source_dir=source_dir,
+        includes=[],
+        excludes=[],
+        date_format=stamp,
+        inventory=True,
+        backup_location=backup_dir,
+        keep=keep,
+        workers=2
+    )
+
+
+def _stored_chunks(backup_dir: Path):
+    return {p.name for p in chunk_store(backup_dir).rglob("*") if p.is_file()}
+
+
+def test_chunks_are_content_defined(tmp_path: Path):
+    rng = random.Random(1)
+    data = bytes(rng.getrandbits(8) for _ in range(600_000))
+    (tmp_path / "a.bin").write_bytes(data)
+    (tmp_path / "b.bin").write_bytes(b"inserted prefix" + data)
+
+    a = list(iter_chunks(tmp_path / "a.bin"))
+    b = list(iter_chunks(tmp_path / "b.bin"))
+
+    assert b"".join(a) == data
+    assert all(CDC_MIN_SIZE <= len(c) <= CDC_MAX_SIZE for c in a[:-1])
+    # An insertion only changes the first chunk; the boundaries resynchronise after it
+    assert a[1:] == b[1:]
+
+
+def test_snapshot_dedup_export_and_gc(tmp_path: Path):
+    source_dir = tmp_path / "src"
+    backup_dir = tmp_path / "backup"
+    source_dir.mkdir()
+    backup_dir.mkdir()
+    payload = os.urandom(300_000)
+    (source_dir / "one.bin").write_bytes(payload)
+    (source_dir / "copy.bin").write_bytes(payload)
+    (source_dir / "notes.txt").write_text("hello " * 100)
+
+    first = _snapshot(source_dir, backup_dir, "first")
+    chunks_after_first = _stored_chunks(backup_dir)
+    # The duplicate file adds no new chunks
+    assert len(chunks_after_first) == len(list(iter_chunks(source_dir / "one.bin"))) + 1
+
+    (source_dir / "notes.txt").write_text("changed")
+    second = _snapshot(source_dir, backup_dir, "second")
+    assert len(_stored_chunks(backup_dir)) == len(chunks_after_first) + 1
+
+    exported = export_snapshot(second, tmp_path / "export.zip")
+    with zipfile.ZipFile(exported) as zf:
+        assert zf.testzip() is None
+        assert zf.read("one.bin") == payload
+        assert zf.read("notes.txt") == b"changed"
+
+    # Pruning the first snapshot garbage-collects the chunk only it referenced
+    old_time = 1_000_000_000
+    for p in chunk_store(backup_dir).rglob("*"):
+        os.utime(p, (old_time, old_time))
+    enforce_zip_retention(source_dir, backup_dir, "%Y", keep=1)
+    assert not first.exists() and second.exists()
+    assert len(_stored_chunks(backup_dir)) == len(chunks_after_first)
+
+
+@pytest.mark.parametrize("option", [["--hash-cache"], ["--compression", "lzma"], ["--level", "9"], ["--no-auto-store"]])
+def test_dedup_rejects_zip_only_options(tmp_path: Path, capsys, option):
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    (source_dir / "a.txt").write_text("a")
+
+    main([str(source_dir), "--dedup", "--backup-location", str(tmp_path / "backup"), *option])
+
+    assert "[FAIL] --dedup cannot be combined with" in capsys.readouterr().out
+    assert not list((tmp_path / "backup").glob("*.zsnap"))
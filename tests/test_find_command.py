@@ -0,0 +1,102 @@
+import zipfile
+from pathlib import Path
+
+from zipcli.main import (Catalog, CompressionPolicy, catalog_path, create_zip_archive, iter_central_directory,
+                         main)
+
+
+SOURCE_TREE = {"a.csv": "a,b\n" * 100, "notes.txt": "notes", "docs/2025/report.csv": "x,y\n" * 50}
+
+
+def archive(source_dir: Path, backup_dir: Path, stamp: str, keep: int = 5, **kwargs) -> Path:
+    kwargs.setdefault("catalog", True)
+    return create_zip_archive(source_dir, [], [], stamp, False, backup_dir, keep=keep,
+                              cache_dir=backup_dir.parent / "cache", **kwargs)
+
+
+def test_catalog_follows_new_and_pruned_archives(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    day1 = archive(source_dir, backup_dir, "day1", keep=2)
+    (source_dir / "b.csv").write_text("new")
+    archive(source_dir, backup_dir, "day2", keep=2)
+
+    with Catalog(backup_dir, tmp_path / "cache") as catalog:
+        hits = catalog.find("*.csv")
+    assert sorted((h["path"], h["archive"]) for h in hits) == [
+        ("a.csv", "src_day1.zip"), ("a.csv", "src_day2.zip"), ("b.csv", "src_day2.zip"),
+        ("docs/2025/report.csv", "src_day1.zip"), ("docs/2025/report.csv", "src_day2.zip")]
+    with zipfile.ZipFile(day1) as zf:
+        info = zf.getinfo("a.csv")
+    hit = next(h for h in hits if h["path"] == "a.csv" and h["archive"] == day1.name)
+    assert (hit["size"], hit["crc32"], hit["header_offset"]) == (info.file_size, info.CRC, info.header_offset)
+
+    archive(source_dir, backup_dir, "day3", keep=2)
+
+    with Catalog(backup_dir, tmp_path / "cache") as catalog:
+        assert {h["archive"] for h in catalog.find("a.csv")} == {"src_day2.zip", "src_day3.zip"}
+        assert [h["path"] for h in catalog.find("docs/**/*.csv", limit=1)] == ["docs/2025/report.csv"]
+        assert catalog.find("*.csv", source="other") == []
+
+
+def test_catalog_lists_volume_of_each_member(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    (source_dir / "big.bin").write_bytes(bytes(range(256)) * 400)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    archive(source_dir, backup_dir, "day1", policy=CompressionPolicy("store"), max_volume_size=50_000)
+
+    with Catalog(backup_dir, tmp_path / "cache") as catalog:
+        volumes = {h["path"]: h["volume"] for h in catalog.find("*")}
+
+    assert len(set(volumes.values())) > 1
+    for path, volume in volumes.items():
+        assert path in {info.filename for info in iter_central_directory(backup_dir / volume)}
+
+
+def test_find_command_catches_up_without_catalog_runs(tmp_path: Path, capsys, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    archive(source_dir, backup_dir, "day1", catalog=False)
+    assert not catalog_path(backup_dir, tmp_path / "cache").exists()
+    assert sorted(p.name for p in (backup_dir / ".zipcli").iterdir()) == ["src_index.json"]  # no SQLite on the share
+    capsys.readouterr()
+
+    main(["find", "report.csv", "--backup-location", str(backup_dir), "--cache-dir", str(tmp_path / "cache")])
+
+    out = capsys.readouterr().out
+    assert "src_day1.zip  docs/2025/report.csv  200 bytes" in out
+    assert "[INFO] 1 matches" in out
+
+
+def test_catalog_reindexes_archive_overwritten_under_same_name(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    archive(source_dir, backup_dir, "day1")
+    (source_dir / "notes.txt").unlink()
+    (source_dir / "b.csv").write_text("new")
+
+    archive(source_dir, backup_dir, "day1")  # same stamp: src_day1.zip is written again
+
+    with Catalog(backup_dir, tmp_path / "cache") as catalog:
+        assert catalog.find("notes.txt") == []
+        hits = catalog.find("b.csv")
+    with zipfile.ZipFile(backup_dir / "src_day1.zip") as zf:
+        info = zf.getinfo("b.csv")
+    assert [(h["archive"], h["header_offset"]) for h in hits] == [("src_day1.zip", info.header_offset)]
+
+
+def test_catalog_find_lists_newest_archive_first(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    for stamp in ("day1", "day2", "day3"):
+        archive(source_dir, backup_dir, stamp)
+
+    with Catalog(backup_dir, tmp_path / "cache") as catalog:
+        archives = [h["archive"] for h in catalog.find("*.csv")]
+        assert archives == ["src_day3.zip"] * 2 + ["src_day2.zip"] * 2 + ["src_day1.zip"] * 2
+        assert [(h["archive"], h["path"]) for h in catalog.find("*.csv", limit=1)] == [("src_day3.zip", "a.csv")]
@@ -0,0 +1,81 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import zipcli.main as zipcli_main
+from zipcli.main import HashCache, create_zip_archive, hash_cache_path
+
+
+SOURCE_TREE = {f"f{i}.txt": f"file {i}\n" * 1000 for i in range(5)}
+
+
+def test_hash_cache_round_trip_and_eviction(tmp_path: Path):
+    files = []
+    for i in range(5):
+        path = tmp_path / f"f{i}"
+        path.write_text(str(i))
+        files.append(path.stat())
+    db = tmp_path / "state" / "hashes.sqlite"
+
+    with HashCache(db, max_entries=3) as cache:
+        for i, st in enumerate(files):
+            cache.put(st, crc32=i, sha256=f"{i:064x}" if i == 4 else None)
+        assert cache.crc32(files[1]) == 1
+
+    with HashCache(db) as cache:
+        assert cache.crc32(files[1]) == 1          # used last, so kept
+        assert cache.crc32(files[3]) == 3
+        assert cache.sha256(files[4]) == f"{4:064x}"
+        assert cache.crc32(files[0]) is None       # least recently used, evicted
+        assert cache.sha256(files[1]) is None
+        os.utime(tmp_path / "f3", ns=(0, files[3].st_mtime_ns + 1))
+        assert cache.crc32((tmp_path / "f3").stat()) is None
+        assert (cache.hits, cache.misses) == (3, 3)
+
+
+def test_update_from_uses_cached_crc_without_reading(tmp_path: Path, monkeypatch, make_source):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    source_dir = make_source(SOURCE_TREE)
+    first = create_zip_archive(source_dir, [], [], "day1", False, tmp_path, keep=5, hash_cache=100)
+    assert hash_cache_path() == tmp_path / "cache" / "zipcli" / "hashes.sqlite"
+    assert hash_cache_path().exists()  # in the local cache, not the backup location
+    assert not (tmp_path / ".zipcli" / "hashes.sqlite").exists()
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("file read despite a cached CRC")
+
+    monkeypatch.setattr(zipcli_main, "iter_blocks", no_reads)
+    monkeypatch.setattr(zipcli_main, "compress_member", no_reads)
+    second = create_zip_archive(source_dir, [], [], "day2", False, tmp_path, keep=5,
+                                update_from=first, hash_cache=100)
+
+    assert second.read_bytes() == first.read_bytes()
+
+
+def test_incremental_hash_reads_renamed_file_from_cache(tmp_path: Path, monkeypatch, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    create_zip_archive(source_dir, [], [], "day1", False, tmp_path, keep=5,
+                       incremental=True, content_hash=True, hash_cache=100, cache_dir=tmp_path / "cache")
+    (source_dir / "f0.txt").rename(source_dir / "moved.txt")
+    digests = []
+    real = zipcli_main.file_digest
+    monkeypatch.setattr(zipcli_main, "file_digest", lambda path: digests.append(path) or real(path))
+
+    create_zip_archive(source_dir, [], [], "day2", False, tmp_path, keep=5,
+                       incremental=True, content_hash=True, hash_cache=100, cache_dir=tmp_path / "cache")
+
+    assert digests == []
+
+
+def test_incremental_fills_cache_with_digests_from_manifest(tmp_path: Path, monkeypatch, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    for stamp, hash_cache in (("day1", 0), ("day2", 100)):  # the cache is first used on day2
+        create_zip_archive(source_dir, [], [], stamp, False, tmp_path, keep=5, incremental=True,
+                           content_hash=True, hash_cache=hash_cache, cache_dir=tmp_path / "cache")
+    (source_dir / "f0.txt").rename(source_dir / "moved.txt")
+    monkeypatch.setattr(zipcli_main, "file_digest", lambda path: pytest.fail(f"{path} hashed again"))
+
+    create_zip_archive(source_dir, [], [], "day3", False, tmp_path, keep=5, incremental=True,
+                       content_hash=True, hash_cache=100, cache_dir=tmp_path / "cache")
@@ -0,0 +1,104 @@
+import os
+import zipfile
+from pathlib import Path
+
+from zipcli.main import (create_zip_archive, enforce_zip_retention, main, restore_archive, read_manifest, sidecar_path,
+                         MANIFEST_SUFFIX)
+
+
+def _run(source_dir: Path, backup_dir: Path, stamp: str, keep: int = 10):
+    return create_zip_archive(
+        source_dir=source_dir,
+        includes=[],
+        excludes=[],
+        date_format=stamp,
+        inventory=False,
+        backup_location=backup_dir,
+        keep=keep,
+        incremental=True,
+        content_hash=True
+    )
+
+
+def test_incremental_chain_and_restore(tmp_path: Path):
+    source_dir = tmp_path / "src"
+    backup_dir = tmp_path / "backup"
+    source_dir.mkdir()
+    backup_dir.mkdir()
+    (source_dir / "keep.txt").write_text("unchanged")
+    (source_dir / "edit.txt").write_text("version 1")
+    (source_dir / "gone.txt").write_text("to be deleted")
+
+    # Literal date formats give predictable, correctly ordered names
+    full = _run(source_dir, backup_dir, "2024-01-01")
+    with zipfile.ZipFile(full) as zf:
+        assert sorted(zf.namelist()) == ["edit.txt", "gone.txt", "keep.txt"]
+
+    (source_dir / "edit.txt").write_text("version 2!")
+    (source_dir / "gone.txt").unlink()
+    (source_dir / "new.txt").write_text("brand new")
+    # Touched but identical content is not archived again when hashing
+    os.utime(source_dir / "keep.txt", ns=(1, 1))
+
+    delta = _run(source_dir, backup_dir, "2024-01-02")
+    with zipfile.ZipFile(delta) as zf:
+        assert sorted(zf.namelist()) == ["edit.txt", "new.txt"]
+
+    header, entries = read_manifest(sidecar_path(delta, MANIFEST_SUFFIX))
+    assert header["base"] == full.name
+    assert header["deleted"] == ["gone.txt"]
+    assert entries["keep.txt"]["archive"] == full.name
+
+    # keep=1 must not remove the full archive the delta depends on
+    enforce_zip_retention(source_dir, backup_dir, "%Y-%m-%d", keep=1)
+    assert full.exists() and delta.exists()
+
+    restore_dir = tmp_path / "restore"
+    assert restore_archive(delta, restore_dir) == 3
+    assert (restore_dir / "edit.txt").read_text() == "version 2!"
+    assert (restore_dir / "keep.txt").read_text() == "unchanged"
+    assert (restore_dir / "new.txt").read_text() == "brand new"
+    assert not (restore_dir / "gone.txt").exists()
+
+
+def test_restore_reports_missing_base_archive(tmp_path: Path, capsys):
+    source_dir = tmp_path / "src"
+    backup_dir = tmp_path / "backup"
+    source_dir.mkdir()
+    backup_dir.mkdir()
+    (source_dir / "a.txt").write_text("a")
+    full = _run(source_dir, backup_dir, "2024-01-01")
+    (source_dir / "b.txt").write_text("b")
+    delta = _run(source_dir, backup_dir, "2024-01-02")
+    full.unlink()
+    capsys.readouterr()
+
+    main(["restore", str(delta), "--target", str(tmp_path / "restore")])
+
+    out = capsys.readouterr().out
+    assert f"[FAIL] Missing base archive: {full.name}" in out
+    assert "Restored" not in out
+    assert not list((tmp_path / "restore").iterdir())
+
+
+def test_restore_skips_member_missing_from_its_archive(tmp_path: Path, capsys):
+    source_dir = tmp_path / "src"
+    backup_dir = tmp_path / "backup"
+    source_dir.mkdir()
+    backup_dir.mkdir()
+    (source_dir / "a.txt").write_text("a")
+    (source_dir / "b.txt").write_text("b")
+    full = _run(source_dir, backup_dir, "2024-01-01")
+    with zipfile.ZipFile(full) as zf, zipfile.ZipFile(tmp_path / "rewritten.zip", "w") as out:
+        out.writestr(zf.getinfo("a.txt"), zf.read("a.txt"))
+    os.replace(tmp_path / "rewritten.zip", full)
+
+    assert restore_archive(full, tmp_path / "restore") == 1
+    assert "[FAIL] Could not restore b.txt: not in" in capsys.readouterr().out
+
+
+def test_hash_needs_incremental(tmp_path: Path, capsys):
+    (tmp_path / "src").mkdir()
+    main([str(tmp_path / "src"), "--hash", "--backup-location", str(tmp_path)])
+    assert "[FAIL] --hash needs --incremental" in capsys.readouterr().out
+    assert not list(tmp_path.glob("*.zip"))
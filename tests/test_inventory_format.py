@@ -0,0 +1,42 @@
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from zipcli.main import create_zip_archive, read_inventory, sidecar_path, inventory_suffix
+
+
+@pytest.mark.parametrize("inventory_format", ["csv", "jsonl"])
+def test_rich_inventory_matches_zip(tmp_path: Path, inventory_format):
+    source_dir = tmp_path / "src"
+    backup_dir = tmp_path / "backup"
+    (source_dir / "sub").mkdir(parents=True)
+    backup_dir.mkdir()
+    (source_dir / "a.txt").write_text("aaaa" * 1000)
+    (source_dir / "sub" / "b.jpg").write_bytes(b"jpeg-ish" * 10)
+
+    zip_path = create_zip_archive(
+        source_dir=source_dir,
+        includes=[],
+        excludes=[],
+        date_format="%Y%m%d",
+        inventory=True,
+        backup_location=backup_dir,
+        inventory_format=inventory_format
+    )
+
+    inventory_path = sidecar_path(zip_path, inventory_suffix(inventory_format))
+    records = {r["path"]: r for r in read_inventory(inventory_path)}
+
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            record = records[info.filename]
+            assert record["size"] == info.file_size
+            assert record["compressed_size"] == info.compress_size
+            assert int(record["crc32"], 16) == info.CRC
+            assert float(record["compress_seconds"]) >= 0
+    assert records["a.txt"]["method"] == "deflate"
+    assert records["sub/b.jpg"]["method"] == "store"
+    expected_mtime = datetime.fromtimestamp((source_dir / "a.txt").stat().st_mtime).replace(microsecond=0)
+    assert datetime.fromisoformat(records["a.txt"]["mtime"]) == expected_mtime
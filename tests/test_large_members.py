@@ -0,0 +1,101 @@
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+import zipcli.main as zipcli_main
+from zipcli.main import (DEFAULT_POLICY, SPOOL_MAX_SIZE, ZipWriter, build_zipinfo, compress_member,
+                         copy_file_data, create_zip_archive, iter_blocks)
+
+
+def make_large_tree(tmp_path: Path) -> Path:
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    (source_dir / "dump.sql").write_bytes(b"INSERT INTO t VALUES (1, 'abc');\n" * (SPOOL_MAX_SIZE // 20))
+    (source_dir / "random.bin").write_bytes(os.urandom(SPOOL_MAX_SIZE + 12345))
+    (source_dir / "small.txt").write_text("small")
+    return source_dir
+
+
+def test_large_members_identical_for_any_worker_count(tmp_path: Path):
+    source_dir = make_large_tree(tmp_path)
+    archives = []
+    for workers in (1, 3):
+        out = tmp_path / f"w{workers}.zip"
+        create_zip_archive(source_dir, [], [], "%Y%m%d", False, tmp_path, workers=workers, output=str(out))
+        archives.append(out.read_bytes())
+    assert archives[0] == archives[1]
+
+    with zipfile.ZipFile(tmp_path / "w3.zip") as zf:
+        assert zf.testzip() is None
+        assert zf.getinfo("random.bin").compress_type == zipfile.ZIP_STORED
+        assert zf.read("random.bin") == (source_dir / "random.bin").read_bytes()
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_large_stored_member_is_copied_from_source(tmp_path: Path, monkeypatch, workers):
+    source_dir = make_large_tree(tmp_path)
+    copied = []
+    real_copy = zipcli_main.copy_file_data
+
+    def copy(src, dst, count):
+        copied.append(getattr(src, "name", None))
+        return real_copy(src, dst, count)
+    monkeypatch.setattr(zipcli_main, "copy_file_data", copy)
+
+    zip_path = create_zip_archive(source_dir, [], [], "%Y%m%d", False, tmp_path, workers=workers)
+
+    assert str(source_dir / "random.bin") in copied
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        assert zf.getinfo("random.bin").compress_type == zipfile.ZIP_STORED
+
+def test_copy_file_data_between_files_and_spools(tmp_path: Path):
+    data = os.urandom(3 * 1024 * 1024 + 7)
+    (tmp_path / "in.bin").write_bytes(data)
+    with open(tmp_path / "in.bin", "rb") as src, open(tmp_path / "out.bin", "wb") as dst:
+        dst.write(b"head")
+        src.seek(10)
+        assert copy_file_data(src, dst, len(data)) == len(data) - 10  # src ends first
+        dst.write(b"tail")
+    assert (tmp_path / "out.bin").read_bytes() == b"head" + data[10:] + b"tail"
+
+    with tempfile.SpooledTemporaryFile(max_size=1 << 20) as spool, open(tmp_path / "out2.bin", "wb") as dst:
+        spool.write(b"spooled")
+        spool.seek(0)
+        assert copy_file_data(spool, dst, 7) == 7
+        assert not spool._rolled
+    assert (tmp_path / "out2.bin").read_bytes() == b"spooled"
+
+
+def test_stored_source_changed_after_crc_is_rewritten(tmp_path: Path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(os.urandom(SPOOL_MAX_SIZE + 1))
+    member = compress_member(path, policy=DEFAULT_POLICY, copy_stored=True)
+    assert member.data is None and member.source
+
+    changed = os.urandom(SPOOL_MAX_SIZE + 99)
+    path.write_bytes(changed)
+    with ZipWriter(tmp_path / "out.zip") as writer:
+        writer.add_compressed(build_zipinfo("video.mp4", path.stat(), zipfile.ZIP_STORED), member)
+
+    with zipfile.ZipFile(tmp_path / "out.zip") as zf:
+        assert zf.testzip() is None
+        assert zf.read("video.mp4") == changed
+
+
+def test_iter_blocks_reuses_thread_buffer_but_not_while_in_use(tmp_path: Path):
+    (tmp_path / "a").write_bytes(b"a" * 10)
+    (tmp_path / "b").write_bytes(b"b" * 10)
+    with open(tmp_path / "a", "rb") as a, open(tmp_path / "b", "rb") as b:
+        outer = iter_blocks(a)
+        first = next(outer)
+        assert bytes(next(iter_blocks(b))) == b"b" * 10  # nested: its own buffer
+        assert bytes(first) == b"a" * 10
+        assert list(outer) == []
+    with open(tmp_path / "a", "rb") as a, open(tmp_path / "b", "rb") as b:
+        first = next(iter_blocks(a))
+        second = next(iter_blocks(b))
+        assert first.obj is second.obj  # finished calls hand the buffer on
@@ -1,3 +1,5 @@
+import fnmatch
+import os
 import zipfile
 from pathlib import Path
 import tempfile
@@ -5,7 +7,7 @@ import shutil
 
 import pytest
 
-from zipcli.main import should_include, collect_files, create_zip_archive
+from zipcli.main import should_include, collect_files, scan_files, create_zip_archive, ArchiveOptions, PatternMatcher
 
 
 def test_should_include_logic():
@@ -16,6 +18,27 @@ def test_should_include_logic():
     assert should_include(Path("data.csv"), [], []) is True
 
 
+def test_pattern_matcher_agrees_with_fnmatch():
+    patterns = ["*.txt", "*.tar.gz", "secret*", "data_??.csv", "[ab]*.log", "[!x]y.md"]
+    names = ["a.txt", ".txt", "a.txt.bak", "x.tar.gz", "secret", "secrets.doc", "data_01.csv",
+             "data_1.csv", "a1.log", "c1.log", "zy.md", "xy.md", "README"]
+    matcher = PatternMatcher(patterns)
+    for name in names:
+        assert matcher.match(name) == any(fnmatch.fnmatch(name, p) for p in patterns), name
+
+
+def test_pattern_matcher_relative_path_globs():
+    matcher = PatternMatcher(["build/**", "**/cache/*.tmp", "docs/*.md"])
+    assert matcher.match("out.o", "build/obj/out.o")
+    assert matcher.match("x.tmp", "cache/x.tmp")
+    assert matcher.match("x.tmp", "a/b/cache/x.tmp")
+    assert not matcher.match("x.tmp", "a/cache/sub/x.tmp")
+    assert matcher.match("index.md", "docs/index.md")
+    assert not matcher.match("index.md", "docs/api/index.md")
+    assert should_include(Path("src/cache/x.tmp"), [], ["**/cache/*.tmp"]) is False
+    assert should_include(Path("src/x.tmp"), [], ["**/cache/*.tmp"]) is True
+
+
 def test_collect_files_with_filters(tmp_path: Path):
     # Setup test files
     (tmp_path / "a.txt").write_text("text file")
@@ -33,6 +56,26 @@ def test_collect_files_with_filters(tmp_path: Path):
     assert "b.log" not in relative_paths
 
 
+def test_scan_files_prunes_excluded_directories(tmp_path: Path, monkeypatch):
+    (tmp_path / "keep").mkdir()
+    (tmp_path / "keep" / "a.txt").write_text("kept")
+    (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+    (tmp_path / "node_modules" / "pkg" / "index.js").write_text("pruned")
+    (tmp_path / "z.txt").write_text("top level")
+    (tmp_path / "build" / "obj").mkdir(parents=True)
+    (tmp_path / "build" / "obj" / "out.o").write_text("pruned by path glob")
+
+    walked = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda p: walked.append(Path(p).name) or real_scandir(p))
+
+    entries = list(scan_files(tmp_path, [], ["node_modules", "build/**"]))
+
+    assert [e.relpath for e in entries] == ["z.txt", "keep/a.txt"]
+    assert entries[0].stat.st_size == len("top level")
+    assert "node_modules" not in walked and "pkg" not in walked and "build" not in walked
+
+
 def test_create_zip_archive_creates_correct_zip(tmp_path: Path):
     # Create dummy files
     (tmp_path / "test.txt").write_text("Hello ZIP")
@@ -59,6 +102,22 @@ def test_create_zip_archive_creates_correct_zip(tmp_path: Path):
         assert "skip.log" not in names
 
 
+
+def test_create_zip_archive_options_and_overrides(tmp_path: Path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.txt").write_text("a")
+    options = ArchiveOptions(keep=1, inventory_format="csv")
+
+    for stamp in ("day1", "day2"):
+        create_zip_archive(tmp_path / "src", [], [], stamp, True, tmp_path, options, keep=2)
+
+    assert sorted(p.name for p in tmp_path.glob("*.zip")) == ["src_day1.zip", "src_day2.zip"]
+    assert (tmp_path / "src_day2_inventory.csv").exists()
+    with pytest.raises(ValueError, match="--resume"):
+        create_zip_archive(tmp_path / "src", [], [], "day3", False, tmp_path, options, resume=True, output="-")
+    with pytest.raises(TypeError, match="kep"):
+        create_zip_archive(tmp_path / "src", [], [], "day3", False, tmp_path, kep=2)
+
 # Optional: Run this test directly if needed
 if __name__ == "__main__":
     pytest.main(["-v", __file__])
@@ -0,0 +1,45 @@
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+from zipcli.main import create_zip_archive
+
+
+def _make_tree(root: Path, count: int):
+    # 50 files per folder: scan_files holds one folder listing at a time
+    for i in range(count):
+        folder = root / f"dir{i // 50:04d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"file{i:06d}.txt").write_text(f"content {i}")
+
+
+def _peak_memory(tmp_path: Path, count: int) -> int:
+    source_dir = tmp_path / f"src{count}"
+    backup_dir = tmp_path / f"backup{count}"
+    _make_tree(source_dir, count)
+    backup_dir.mkdir()
+
+    tracemalloc.start()
+    zip_path = create_zip_archive(
+        source_dir=source_dir,
+        includes=[],
+        excludes=[],
+        date_format="%Y%m%d",
+        inventory=True,
+        backup_location=backup_dir,
+        incremental=True
+    )
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with zipfile.ZipFile(zip_path) as zf:
+        assert len(zf.infolist()) == count
+    return peak
+
+
+def test_peak_memory_does_not_grow_with_file_count(tmp_path: Path):
+    small = _peak_memory(tmp_path, 400)
+    large = _peak_memory(tmp_path, 4000)
+    # 10x the files must not mean noticeably more memory (a list of 4000
+    # ZipInfo objects and inventory strings alone would be well over 1 MB)
+    assert large - small < 256 * 1024, (small, large)
@@ -0,0 +1,84 @@
+import io
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+import zipcli.main as zipcli_main
+from zipcli.main import create_zip_archive
+
+
+class PipeWriter(io.RawIOBase):
+    """Write-only, unseekable sink that behaves like a pipe."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def tell(self):
+        raise OSError("illegal seek")
+
+
+def test_stream_to_unseekable_output(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(zipcli_main, "SPOOL_MAX_SIZE", 1024)
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    (source_dir / "small.txt").write_text("tiny")
+    (source_dir / "large.bin").write_bytes(os.urandom(50_000))
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+
+    sink = PipeWriter()
+    result = create_zip_archive(
+        source_dir=source_dir,
+        includes=[],
+        excludes=[],
+        date_format="%Y%m%d",
+        inventory=True,
+        backup_location=backup_dir,
+        workers=2,
+        output=sink
+    )
+
+    assert result is None
+    assert list(backup_dir.glob("*.zip")) == []
+    assert len(list(backup_dir.glob("*_inventory.txt"))) == 1
+
+    with zipfile.ZipFile(io.BytesIO(bytes(sink.buffer))) as zf:
+        assert zf.testzip() is None
+        infos = {i.filename: i for i in zf.infolist()}
+        assert infos["large.bin"].flag_bits & 0x08  # data descriptor, no seek back
+        assert zf.read("large.bin") == (source_dir / "large.bin").read_bytes()
+        assert zf.read("small.txt") == b"tiny"
+
+
+def test_invalid_options_leave_output_untouched(tmp_path: Path):
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    (source_dir / "a.txt").write_text("a")
+    output = tmp_path / "existing.zip"
+    output.write_bytes(b"keep me")
+
+    with pytest.raises(ValueError, match="--incremental"):
+        create_zip_archive(source_dir, [], [], "%Y%m%d", False, tmp_path, output=output, incremental=True)
+
+    assert output.read_bytes() == b"keep me"
+
+
+def test_bad_update_from_leaves_output_untouched(tmp_path: Path, make_source):
+    source_dir = make_source({"a.txt": "a" * 100})
+    output = tmp_path / "existing.zip"
+    output.write_bytes(b"keep me")
+
+    with pytest.raises(OSError):
+        create_zip_archive(source_dir, [], [], "%Y%m%d", False, tmp_path, output=output,
+                           update_from=tmp_path / "missing.zip")
+
+    assert output.read_bytes() == b"keep me"
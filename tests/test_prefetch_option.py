@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import pytest
+
+from zipcli.main import CHUNK_SIZE, create_zip_archive
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_prefetch_produces_identical_archive(tmp_path: Path, workers):
+    source_dir = tmp_path / "src"
+    (source_dir / "sub").mkdir(parents=True)
+    (source_dir / "empty.txt").write_bytes(b"")
+    (source_dir / "exact.bin").write_bytes(b"x" * CHUNK_SIZE)
+    (source_dir / "big.bin").write_bytes(bytes(range(256)) * (CHUNK_SIZE // 100))
+    for i in range(20):
+        (source_dir / "sub" / f"f{i}.txt").write_text(f"file {i} " * 100)
+
+    archives = []
+    for prefetch in (0, 4):
+        out = tmp_path / f"prefetch{prefetch}.zip"
+        create_zip_archive(source_dir, [], [], "%Y%m%d", False, tmp_path,
+                           workers=workers, output=str(out), prefetch=prefetch)
+        archives.append(out.read_bytes())
+
+    assert archives[0] == archives[1]
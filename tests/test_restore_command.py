@@ -0,0 +1,85 @@
+import os
+import zipfile
+from pathlib import Path
+
+import zipcli.main as zipcli_main
+from zipcli.main import collect_files, create_zip_archive, main, restore_archive
+
+
+SOURCE_TREE = {
+    "a.txt": "a" * 5000,
+    "b.csv": "b,c\n" * 100,
+    "logs/app.log": "log\n" * 100,
+    "logs/secret.txt": "hidden",
+    "node_modules/pkg/index.txt": "dep",
+}
+
+
+def restored_files(root: Path) -> list:
+    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*") if p.is_file())
+
+
+def test_restore_everything_in_parallel(tmp_path: Path, monkeypatch, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    os.utime(source_dir / "a.txt", (1_600_000_000, 1_600_000_000))
+    zip_path = create_zip_archive(source_dir, [], [], "day1", False, tmp_path)
+
+    parsed = []
+    real_init = zipfile.ZipFile.__init__
+    monkeypatch.setattr(zipfile.ZipFile, "__init__", lambda self, *a, **kw: parsed.append(a) or real_init(self, *a, **kw))
+
+    count = restore_archive(zip_path, tmp_path / "out", workers=4)
+
+    assert count == 5
+    assert len(parsed) == 1  # one central directory read, shared by the workers
+    assert restored_files(tmp_path / "out") == restored_files(source_dir)
+    assert (tmp_path / "out" / "a.txt").read_text() == "a" * 5000
+    assert abs((tmp_path / "out" / "a.txt").stat().st_mtime - 1_600_000_000) <= 2
+
+
+def test_restore_filters_like_archiving(tmp_path: Path, monkeypatch, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    zip_path = create_zip_archive(source_dir, [], [], "day1", False, tmp_path)
+    opened = []
+    real_open = zipcli_main.open_member
+    monkeypatch.setattr(zipcli_main, "open_member", lambda fp, info: opened.append(info.filename) or real_open(fp, info))
+
+    count = restore_archive(zip_path, tmp_path / "out", ["*.txt", "*.log"], ["secret*", "node_modules"])
+
+    assert count == 2
+    assert restored_files(tmp_path / "out") == ["a.txt", "logs/app.log"]
+    assert sorted(opened) == ["a.txt", "logs/app.log"]
+    archived = collect_files(source_dir, ["*.txt", "*.log"], ["secret*", "node_modules"])
+    assert sorted(p.relative_to(source_dir).as_posix() for p in archived) == ["a.txt", "logs/app.log"]
+
+
+def test_restore_volume_set_from_any_volume(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    first = create_zip_archive(source_dir, [], [], "day1", False, tmp_path, max_volume_size=300)
+    assert first.name == "src_day1_001.zip"
+
+    main(["restore", str(first.with_name("src_day1_002.zip")), "--target", str(tmp_path / "out"), "--workers", "2"])
+
+    assert restored_files(tmp_path / "out") == restored_files(source_dir)
+
+
+def test_restore_skips_unsafe_and_corrupt_members(tmp_path: Path, capsys):
+    zip_path = tmp_path / "bad.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("../evil.txt", "x")
+        zf.writestr("good.txt", "good" * 100)
+        zf.writestr("broken.txt", "broken" * 100)
+    data = bytearray(zip_path.read_bytes())
+    with zipfile.ZipFile(zip_path) as zf:
+        info = zf.getinfo("broken.txt")
+    data[info.header_offset + 30 + len("broken.txt") + 3] ^= 0xFF
+    zip_path.write_bytes(data)
+
+    count = restore_archive(zip_path, tmp_path / "out", workers=2)
+
+    out = capsys.readouterr().out
+    assert count == 1
+    assert "Skipping unsafe member path: ../evil.txt" in out
+    assert "[FAIL] Could not restore broken.txt" in out
+    assert not (tmp_path / "evil.txt").exists()
+    assert restored_files(tmp_path / "out") == ["good.txt"]
@@ -0,0 +1,66 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from zipcli import main as zipcli_main
+from zipcli.main import JOURNAL_SUFFIX, create_zip_archive, read_inventory, sidecar_path
+
+
+def source_tree(count: int = 10) -> dict:
+    return {f"{'sub/' if i % 2 else ''}file{i:02}.txt": f"contents {i} " * 500 for i in range(count)}
+
+
+def interrupt_after(monkeypatch, count: int):
+    """Make compress_member raise KeyboardInterrupt after [count] calls, like a Ctrl-C."""
+    real = zipcli_main.compress_member
+    calls = []
+
+    def compress_member(*args, **kwargs):
+        if len(calls) >= count:
+            raise KeyboardInterrupt
+        calls.append(args[0])
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(zipcli_main, "compress_member", compress_member)
+    return calls
+
+
+def test_resume_finishes_interrupted_archive(tmp_path: Path, monkeypatch, make_source):
+    source_dir = make_source(source_tree())
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+
+    interrupt_after(monkeypatch, 4)
+    with pytest.raises(KeyboardInterrupt):
+        create_zip_archive(source_dir, [], [], "%Y%m%dT%H%M%S", True, backup_dir, keep=5)
+    journal_path, = backup_dir.glob(f"*{JOURNAL_SUFFIX}")
+    zip_path = journal_path.with_name(journal_path.name[:-len(JOURNAL_SUFFIX)] + ".zip")
+    with open(zip_path, "ab") as f:
+        f.write(b"PK\x03\x04 torn member")  # half-written member after the last checkpoint
+
+    monkeypatch.undo()
+    calls = interrupt_after(monkeypatch, 100)
+    resumed = create_zip_archive(source_dir, [], [], "%Y%m%dT%H%M%S", True, backup_dir, keep=5, resume=True)
+
+    assert resumed == zip_path
+    assert len(calls) == 6  # only the files not yet archived were compressed
+    assert not journal_path.exists()
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        names = zf.namelist()
+    assert sorted(names) == sorted(p.relative_to(source_dir).as_posix()
+                                   for p in source_dir.rglob("*.txt"))
+    inventory = [r["path"] for r in read_inventory(sidecar_path(zip_path, "_inventory.txt"))]
+    assert inventory == names
+
+
+def test_resume_without_journal_starts_new_archive(tmp_path: Path, capsys, make_source):
+    source_dir = make_source(source_tree(count=2))
+
+    zip_path = create_zip_archive(source_dir, [], [], "%Y%m%d", False, tmp_path, resume=True)
+
+    assert "No interrupted archive" in capsys.readouterr().out
+    with zipfile.ZipFile(zip_path) as zf:
+        assert len(zf.namelist()) == 2
+    assert not list(tmp_path.glob(f"*{JOURNAL_SUFFIX}"))
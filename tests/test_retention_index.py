@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from zipcli.main import create_zip_archive, index_path, load_archive_index, select_retained
+
+
+def _entries(days_back):
+    now = datetime(2025, 6, 30, 12, 0)
+    return [{"name": f"src_{d}.zip", "created": (now - timedelta(days=d)).isoformat()} for d in days_back]
+
+
+def test_select_retained_gfs():
+    entries = _entries(range(0, 90))  # one archive per day for 90 days, newest first
+    retained = select_retained(entries, keep=1, daily=3, weekly=2, monthly=3)
+
+    # daily: 30, 29, 28 June; weekly: Mon 30 June and Sun 29 June (previous ISO week);
+    # monthly: 30 June, 31 May, 30 April
+    assert retained == {"src_0.zip", "src_1.zip", "src_2.zip", "src_30.zip", "src_61.zip"}
+
+
+def test_retention_uses_index_without_listing(tmp_path: Path, monkeypatch):
+    source_dir = tmp_path / "src"
+    backup_dir = tmp_path / "backup"
+    source_dir.mkdir()
+    backup_dir.mkdir()
+    (source_dir / "a.txt").write_text("a")
+
+    def run(stamp):
+        return create_zip_archive(
+            source_dir=source_dir,
+            includes=[],
+            excludes=[],
+            date_format=stamp,
+            inventory=True,
+            backup_location=backup_dir,
+            keep=2
+        )
+
+    first = run("first")
+    assert index_path(backup_dir, "src").exists()
+
+    # Once the index exists, the backup location must never be listed again
+    def no_glob(self, pattern):
+        raise AssertionError(f"unexpected directory listing: {pattern}")
+    monkeypatch.setattr(Path, "glob", no_glob)
+
+    run("second")
+    run("third")
+
+    assert not first.exists()
+    assert not (backup_dir / "src_first_inventory.txt").exists()
+    assert [e["name"] for e in load_archive_index(source_dir, backup_dir, "%Y")] == ["src_third.zip", "src_second.zip"]
+
+
+def test_vanished_archives_do_not_take_keep_slots(tmp_path: Path, capsys, make_source):
+    source_dir = make_source({"a.txt": "a"})
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    for stamp in ("d1", "d2", "d3"):
+        create_zip_archive(source_dir, [], [], stamp, False, backup_dir, keep=3)
+    (backup_dir / "src_d2.zip").unlink()
+    (backup_dir / "src_d3.zip").unlink()
+
+    create_zip_archive(source_dir, [], [], "d4", False, backup_dir, keep=3)
+
+    assert "src_d3.zip is missing" in capsys.readouterr().out
+    assert sorted(p.name for p in backup_dir.glob("*.zip")) == ["src_d1.zip", "src_d4.zip"]
+    assert [e["name"] for e in load_archive_index(source_dir, backup_dir, "%Y")] == ["src_d4.zip", "src_d1.zip"]
@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+from zipcli.main import RunStats, create_zip_archive, sidecar_path
+
+
+SOURCE_TREE = {"a.txt": "aaaa" * 5000, "sub/b.txt": "b" * 100, "skip.tmp": "tmp"}
+
+
+def test_stats_hook_collects_counters(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    stats = RunStats(slowest=1)
+
+    zip_path = create_zip_archive(
+        source_dir=source_dir,
+        includes=[],
+        excludes=["*.tmp"],
+        date_format="%Y%m%d",
+        inventory=False,
+        backup_location=tmp_path,
+        workers=2,
+        stats=stats
+    )
+
+    assert stats.files_scanned == 3
+    assert stats.files_matched == 2
+    assert stats.bytes_read == 20100
+    assert stats.bytes_written == zip_path.stat().st_size
+    assert 0 < stats.ratio < 1
+    assert len(stats.slowest) == 1
+    assert set(stats.phases) == {"walk", "filter", "read", "compress", "write", "retention"}
+    assert all(seconds >= 0 for seconds in stats.phases.values())
+
+
+def test_stats_files_written_next_to_zip(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+
+    zip_path = create_zip_archive(source_dir, [], [], "%Y%m%d", False, backup_dir, stats_format="json")
+    data = json.loads(sidecar_path(zip_path, "_stats.json").read_text())
+    assert data["files_matched"] == 3
+    assert data["bytes_written"] == zip_path.stat().st_size
+    assert [entry["path"] for entry in data["slowest"]]
+
+    create_zip_archive(source_dir, [], [], "%Y%m%d", False, backup_dir, stats_format="prom")
+    prom = (backup_dir / "src_stats.prom").read_text()
+    assert 'zipcli_files_matched{source="src"} 3' in prom
+    assert 'zipcli_phase_seconds{source="src",phase="compress"}' in prom
+    assert not list(backup_dir.glob("*.tmp"))
+
+
+def test_prom_stats_written_when_unchanged_run_is_skipped(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    create_zip_archive(source_dir, [], [], "day1", False, backup_dir, stats_format="prom")
+    assert 'zipcli_skipped{source="src"} 0' in (backup_dir / "src_stats.prom").read_text()
+
+    zip_path = create_zip_archive(source_dir, [], [], "day2", False, backup_dir, stats_format="prom",
+                                  unchanged="skip")
+
+    assert zip_path.name == "src_day1.zip"
+    prom = (backup_dir / "src_stats.prom").read_text()
+    assert 'zipcli_skipped{source="src"} 1' in prom
+    assert 'zipcli_files_matched{source="src"} 3' in prom
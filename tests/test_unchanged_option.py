@@ -0,0 +1,83 @@
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+import zipcli.main as zipcli_main
+from zipcli.main import create_zip_archive, load_archive_index, sidecar_path
+
+
+SOURCE_TREE = {"a.txt": "a" * 1000, "sub/b.txt": "b" * 1000}
+
+
+def archive(source_dir: Path, backup_dir: Path, stamp: str, unchanged: str):
+    return create_zip_archive(source_dir, [], [], stamp, True, backup_dir, keep=5, unchanged=unchanged)
+
+
+@pytest.mark.parametrize("action", ["skip", "touch"])
+def test_unchanged_source_reuses_newest_archive(tmp_path: Path, action, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    first = archive(source_dir, backup_dir, "day1", action)
+    os.utime(first, (1_000_000, 1_000_000))
+
+    second = archive(source_dir, backup_dir, "day2", action)
+
+    assert second == first
+    assert sorted(p.name for p in backup_dir.glob("*.zip")) == ["src_day1.zip"]
+    assert (first.stat().st_mtime > 1_000_000) == (action == "touch")
+
+    (source_dir / "a.txt").write_text("changed")
+    third = archive(source_dir, backup_dir, "day3", action)
+    assert third.name == "src_day3.zip"
+    with zipfile.ZipFile(third) as zf:
+        assert zf.read("a.txt") == b"changed"
+
+
+def test_unchanged_link_records_new_dated_archive(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    first = archive(source_dir, backup_dir, "day1", "link")
+
+    second = archive(source_dir, backup_dir, "day2", "link")
+
+    assert second.name == "src_day2.zip"
+    assert second.read_bytes() == first.read_bytes()
+    assert sidecar_path(second, "_inventory.txt").exists()
+    entries = load_archive_index(source_dir, backup_dir, "%Y%m%d")
+    assert [e["name"] for e in entries] == ["src_day2.zip", "src_day1.zip"]
+    assert entries[0]["fingerprint"] == entries[1]["fingerprint"]
+    assert entries[0]["sidecars"] == ["src_day2_inventory.txt"]
+
+
+def test_default_still_archives_unchanged_source(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    archive(source_dir, tmp_path, "day1", "archive")
+    archive(source_dir, tmp_path, "day2", "archive")
+    assert sorted(p.name for p in tmp_path.glob("*.zip")) == ["src_day1.zip", "src_day2.zip"]
+
+
+@pytest.mark.parametrize("buffer", [100, 0])
+def test_changed_source_is_walked_once(tmp_path: Path, monkeypatch, buffer, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    (source_dir / "z.txt").write_text("z")
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    archive(source_dir, backup_dir, "day1", "skip")
+    (source_dir / "z.txt").write_text("zz")  # the last file walked
+
+    walks = []
+    real = zipcli_main.scan_files
+    monkeypatch.setattr(zipcli_main, "scan_files", lambda *a, **kw: walks.append(a) or real(*a, **kw))
+    monkeypatch.setattr(zipcli_main, "UNCHANGED_BUFFER", buffer)
+    second = archive(source_dir, backup_dir, "day2", "skip")
+
+    assert len(walks) == (1 if buffer else 2)  # walked again only when the matching prefix was not kept
+    with zipfile.ZipFile(second) as zf:
+        assert sorted(zf.namelist()) == ["a.txt", "sub/b.txt", "z.txt"]
+        assert zf.read("z.txt") == b"zz"
+    entries = load_archive_index(source_dir, backup_dir, "%Y%m%d")
+    assert entries[0]["fingerprint"] != entries[1]["fingerprint"]
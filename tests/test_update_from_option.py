@@ -0,0 +1,69 @@
+import os
+import zipfile
+from pathlib import Path
+
+from zipcli.main import CompressionPolicy, PreviousArchive, create_zip_archive, scan_files
+
+
+def source_tree() -> dict:
+    tree = {f"f{i}.txt": f"file {i}\n" * 2000 for i in range(5)}
+    tree["sub/photo.jpg"] = os.urandom(50_000)
+    return tree
+
+
+def test_update_from_copies_unchanged_members(tmp_path: Path, monkeypatch, capsys, make_source):
+    source_dir = make_source(source_tree())
+    first = create_zip_archive(source_dir, [], [], "day1", False, tmp_path, keep=5)
+    (source_dir / "f2.txt").write_text("changed\n" * 2000)
+    (source_dir / "new.txt").write_text("new")
+
+    compressed = []
+    import zipcli.main as zipcli_main
+    real = zipcli_main.compress_member
+    monkeypatch.setattr(zipcli_main, "compress_member", lambda path, **kw: compressed.append(os.path.basename(path)) or real(path, **kw))
+    second = create_zip_archive(source_dir, [], [], "day2", False, tmp_path, keep=5, update_from=first, workers=2)
+
+    assert sorted(compressed) == ["f2.txt", "new.txt"]
+    assert "[INFO] Copied 5 of 7 members from src_day1.zip" in capsys.readouterr().out
+    with zipfile.ZipFile(second) as zf:
+        assert zf.testzip() is None
+        assert zf.read("f2.txt") == b"changed\n" * 2000
+        assert zf.read("sub/photo.jpg") == (source_dir / "sub" / "photo.jpg").read_bytes()
+    monkeypatch.undo()
+    full = create_zip_archive(source_dir, [], [], "day3", False, tmp_path, keep=5)
+    assert second.read_bytes() == full.read_bytes()
+
+
+def test_update_from_rejects_member_with_same_stat_but_new_content(tmp_path: Path, make_source):
+    source_dir = make_source(source_tree())
+    first = create_zip_archive(source_dir, [], [], "day1", False, tmp_path)
+    target = source_dir / "f1.txt"
+    st = target.stat()
+    target.write_text("FILE 1\n" * 2000)  # same size
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    previous = PreviousArchive(first, CompressionPolicy())
+    entries = {e.relpath: e for e in scan_files(source_dir, [], [])}
+
+    assert previous.reuse(entries["f1.txt"]) is None
+    assert previous.reuse(entries["f0.txt"]).reuse == (first, previous.members["f0.txt"].header_offset)
+
+
+def test_update_from_skips_other_compression_methods(tmp_path: Path, make_source):
+    source_dir = make_source(source_tree())
+    first = create_zip_archive(source_dir, [], [], "day1", False, tmp_path, policy=CompressionPolicy("bzip2"))
+
+    previous = PreviousArchive(first, CompressionPolicy())
+
+    assert sorted(previous.members) == ["sub/photo.jpg"]  # stored, so still usable
+
+
+def test_update_from_matches_odd_second_mtimes(tmp_path: Path, make_source):
+    source_dir = make_source(source_tree())
+    for i, path in enumerate(sorted(source_dir.glob("*.txt"))):
+        os.utime(path, (1_700_000_000 + i, 1_700_000_000 + i))  # ZIP keeps even seconds only
+    first = create_zip_archive(source_dir, [], [], "day1", False, tmp_path)
+
+    previous = PreviousArchive(first, CompressionPolicy())
+
+    assert all(previous.reuse(e) for e in scan_files(source_dir, [], []))
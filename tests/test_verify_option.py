@@ -0,0 +1,94 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from zipcli.main import create_zip_archive, load_archive_index, main, sidecar_path, verify_archive
+
+
+SOURCE_TREE = {f"f{i}.txt": f"file {i}\n" * 500 for i in range(20)}
+SOURCE_TREE["sub/b.txt"] = "b" * 1000
+
+
+@pytest.mark.parametrize("inventory_format", ["txt", "csv", "jsonl"])
+def test_verify_passes_for_new_archive(tmp_path: Path, monkeypatch, inventory_format, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    zip_path = create_zip_archive(source_dir, [], [], "day1", True, tmp_path, inventory_format=inventory_format)
+
+    parsed = []
+    real_init = zipfile.ZipFile.__init__
+    monkeypatch.setattr(zipfile.ZipFile, "__init__", lambda self, *a, **kw: parsed.append(a) or real_init(self, *a, **kw))
+
+    result = verify_archive(zip_path, workers=4)
+
+    assert result.errors == []
+    assert result.members == 21
+    assert len(parsed) == 1  # one central directory read, shared by the workers
+    assert result.bytes_checked == sum(p.stat().st_size for p in source_dir.rglob("*") if p.is_file())
+
+
+def test_verify_reports_corrupt_member(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    zip_path = create_zip_archive(source_dir, [], [], "day1", False, tmp_path)
+    with zipfile.ZipFile(zip_path) as zf:
+        info = zf.getinfo("f3.txt")
+    data = bytearray(zip_path.read_bytes())
+    data[info.header_offset + 30 + len(info.filename) + 5] ^= 0xFF
+    zip_path.write_bytes(data)
+
+    result = verify_archive(zip_path, workers=2)
+
+    assert len(result.errors) == 1 and result.errors[0].startswith("f3.txt:")
+
+
+def test_verify_compares_against_inventory(tmp_path: Path, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    zip_path = create_zip_archive(source_dir, [], [], "day1", True, tmp_path, inventory_format="csv")
+    inventory = sidecar_path(zip_path, "_inventory.csv")
+    lines = inventory.read_text().splitlines()
+    inventory.write_text("\n".join(lines[:-1] + ["missing.txt,1,1,00000000,,deflate,0"]) + "\n")
+
+    errors = verify_archive(zip_path).errors
+
+    assert any(e.startswith("missing.txt:") for e in errors)
+    assert any(e.startswith("sub/b.txt:") for e in errors)
+
+
+def test_create_with_verify_checks_each_volume(tmp_path: Path, capsys, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+
+    create_zip_archive(source_dir, [], [], "day1", True, backup_dir, workers=2, max_volume_size=1_000, verify=True)
+
+    out = capsys.readouterr().out
+    volumes = sorted(backup_dir.glob("src_day1_*.zip"))
+    assert len(volumes) > 1
+    assert all(f"[✓] Verified {v.name}" in out for v in volumes)
+
+
+def test_failed_verify_skips_retention(tmp_path: Path, monkeypatch, capsys, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    create_zip_archive(source_dir, [], [], "day1", False, tmp_path, verify=True)
+    monkeypatch.setattr("zipcli.main.expected_members", lambda zip_path: {"gone.txt": {"path": "gone.txt"}})
+
+    create_zip_archive(source_dir, [], [], "day2", False, tmp_path, verify=True)
+
+    assert "[FAIL] Verification failed" in capsys.readouterr().out
+    assert [e["name"] for e in load_archive_index(source_dir, tmp_path, "day1")] == ["src_day2.zip", "src_day1.zip"]
+    assert (tmp_path / "src_day1.zip").exists()
+
+
+def test_verify_command_checks_kept_archives(tmp_path: Path, capsys, make_source):
+    source_dir = make_source(SOURCE_TREE)
+    create_zip_archive(source_dir, [], [], "day1", True, tmp_path, keep=2)
+    create_zip_archive(source_dir, [], [], "day2", True, tmp_path, keep=2)
+
+    main(["verify", "--source", str(source_dir), "--backup-location", str(tmp_path), "--workers", "2"])
+
+    assert "[✓] All 2 archives verified" in capsys.readouterr().out
+
+    (tmp_path / "src_day1.zip").write_bytes(b"not a zip")
+    with pytest.raises(SystemExit):
+        main(["verify", str(tmp_path / "src_day1.zip")])
+    assert "cannot read the archive" in capsys.readouterr().out
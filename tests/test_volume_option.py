@@ -0,0 +1,93 @@
+import json
+import os
+import zipfile
+from pathlib import Path
+
+from zipcli.main import (CompressionPolicy, create_zip_archive, index_path, load_archive_index,
+                         parse_size, read_inventory, sidecar_path)
+
+
+def source_tree() -> dict:
+    tree = {f"f{i}.bin": os.urandom(40_000) for i in range(6)}
+    tree["big.bin"] = os.urandom(150_000)
+    return tree
+
+
+def archive(source_dir: Path, backup_dir: Path, stamp: str, keep: int = 1, **kwargs):
+    return create_zip_archive(source_dir, [], [], stamp, True, backup_dir, keep=keep,
+                              policy=CompressionPolicy("store"), max_volume_size=100_000, **kwargs)
+
+
+def test_volumes_are_self_contained_and_listed_in_inventory(tmp_path: Path, make_source):
+    source_dir = make_source(source_tree())
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    finished = []
+
+    first = archive(source_dir, backup_dir, "day1", inventory_format="csv", on_volume=finished.append)
+
+    volumes = sorted(backup_dir.glob("src_day1_*.zip"))
+    assert first == volumes[0] and first.name == "src_day1_001.zip"
+    assert finished == volumes and len(volumes) >= 4
+    members = {}
+    for volume in volumes:
+        with zipfile.ZipFile(volume) as zf:
+            assert zf.testzip() is None
+            members.update((name, volume.name) for name in zf.namelist())
+        assert volume.stat().st_size <= 100_000 or members.get("big.bin") == volume.name
+    assert sorted(members) == sorted(p.name for p in source_dir.iterdir())
+
+    inventory = list(read_inventory(sidecar_path(backup_dir / "src_day1.zip", "_inventory.csv")))
+    assert {r["path"]: r["volume"] for r in inventory} == members
+
+
+def test_retention_treats_volume_set_as_one_archive(tmp_path: Path, make_source):
+    source_dir = make_source(source_tree())
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    archive(source_dir, backup_dir, "day1")
+    day1 = sorted(p.name for p in backup_dir.glob("src_day1_*.zip"))
+
+    archive(source_dir, backup_dir, "day2")
+
+    assert not list(backup_dir.glob("src_day1*"))
+    entries = load_archive_index(source_dir, backup_dir, "day2")
+    assert [e["name"] for e in entries] == ["src_day2.zip"]
+    assert entries[0]["volumes"] == [name.replace("day1", "day2") for name in day1]
+
+
+def test_volume_sets_are_grouped_when_index_is_rebuilt(tmp_path: Path, make_source):
+    source_dir = make_source(source_tree())
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    archive(source_dir, backup_dir, "20240101", keep=5)
+    archive(source_dir, backup_dir, "20240102", keep=5)
+    index_path(backup_dir, "src").unlink()
+
+    entries = load_archive_index(source_dir, backup_dir, "%Y%m%d")
+
+    assert [e["name"] for e in entries] == ["src_20240102.zip", "src_20240101.zip"]
+    assert entries[0]["volumes"] == sorted(p.name for p in backup_dir.glob("src_20240102_*.zip"))
+    assert entries[0]["sidecars"] == ["src_20240102_inventory.txt"]
+
+
+def test_unchanged_link_links_every_volume(tmp_path: Path, make_source):
+    source_dir = make_source(source_tree())
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    first = archive(source_dir, backup_dir, "day1", keep=5, unchanged="link")
+
+    second = archive(source_dir, backup_dir, "day2", keep=5, unchanged="link")
+
+    assert second.name == "src_day2_001.zip"
+    assert second.read_bytes() == first.read_bytes()
+    index = json.loads(index_path(backup_dir, "src").read_text())["archives"]
+    assert len(index[0]["volumes"]) == len(index[1]["volumes"])
+    assert all((backup_dir / name).exists() for name in index[0]["volumes"])
+
+
+def test_parse_size():
+    assert parse_size("650M") == 650 << 20
+    assert parse_size("4g") == 4 << 30
+    assert parse_size("1.5KB") == 1536
+    assert parse_size("1000") == 1000
@@ -0,0 +1,49 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from zipcli.main import RunStats, create_zip_archive, scan_files
+
+
+def make_tree(root: Path, seed: int = 7) -> Path:
+    rng = random.Random(seed)
+    dirs = [root]
+    for i in range(60):
+        parent = rng.choice(dirs)
+        child = parent / rng.choice(["a", "b", "node_modules", "src", "x"]) / f"d{i}"
+        child.mkdir(parents=True, exist_ok=True)
+        dirs.append(child)
+    for i in range(300):
+        (rng.choice(dirs) / f"f{i}.{rng.choice(['txt', 'log', 'py'])}").write_text(str(i))
+    return root
+
+
+@pytest.mark.parametrize("walkers", [2, 8])
+def test_parallel_walk_matches_serial_walk(tmp_path: Path, walkers):
+    root = make_tree(tmp_path / "tree")
+    patterns = (["*.txt", "*.py"], ["node_modules", "**/b/*.py"])
+
+    serial_stats, parallel_stats = RunStats(), RunStats()
+    serial = [(e.relpath, e.stat.st_size) for e in scan_files(root, *patterns, serial_stats)]
+    parallel = [(e.relpath, e.stat.st_size) for e in scan_files(root, *patterns, parallel_stats, walkers)]
+
+    assert parallel == serial
+    assert len(serial) > 50
+    assert (parallel_stats.files_scanned, parallel_stats.files_matched) == \
+        (serial_stats.files_scanned, serial_stats.files_matched)
+
+
+def test_parallel_walk_can_stop_early(tmp_path: Path):
+    root = make_tree(tmp_path / "tree")
+    walk = scan_files(root, [], [], walkers=4)
+    first = [next(walk) for _ in range(3)]
+    walk.close()
+    assert [e.relpath for e in first] == [e.relpath for e in scan_files(root, [], [])][:3]
+
+
+def test_archive_is_identical_with_walkers(tmp_path: Path):
+    root = make_tree(tmp_path / "tree")
+    serial = create_zip_archive(root, [], [], "one", False, tmp_path, keep=5)
+    parallel = create_zip_archive(root, [], [], "many", False, tmp_path, keep=5, walkers=4)
+    assert parallel.read_bytes() == serial.read_bytes()
@@ -0,0 +1,44 @@
+import os
+import zipfile
+from pathlib import Path
+
+from zipcli.main import create_zip_archive, ordered_map
+
+
+def _make_tree(root: Path):
+    root.mkdir()
+    (root / "sub").mkdir()
+    for i in range(12):
+        (root / f"file{i}.txt").write_text(f"line {i}\n" * (i * 500))
+    (root / "sub" / "random.bin").write_bytes(os.urandom(200_000))
+    (root / "empty.txt").write_text("")
+
+
+def test_ordered_map_preserves_input_order():
+    assert list(ordered_map(lambda x: x * x, range(50), workers=4)) == [x * x for x in range(50)]
+
+
+def test_workers_output_is_byte_identical(tmp_path: Path):
+    source_dir = tmp_path / "src"
+    _make_tree(source_dir)
+
+    outputs = []
+    for workers in (1, 4):
+        backup_dir = tmp_path / f"out{workers}"
+        backup_dir.mkdir()
+        outputs.append(create_zip_archive(
+            source_dir=source_dir,
+            includes=[],
+            excludes=[],
+            date_format="%Y%m%d",
+            inventory=False,
+            backup_location=backup_dir,
+            workers=workers
+        ))
+
+    assert outputs[0].read_bytes() == outputs[1].read_bytes()
+
+    with zipfile.ZipFile(outputs[1]) as zf:
+        assert zf.testzip() is None
+        assert zf.read("file3.txt") == (source_dir / "file3.txt").read_bytes()
+        assert zf.read("sub/random.bin") == (source_dir / "sub" / "random.bin").read_bytes()
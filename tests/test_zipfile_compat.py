@@ -0,0 +1,55 @@
+import io
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from zipcli.main import ArchiveHandles, iter_central_directory, member_compressor, member_data_offset, open_member
+
+# member_compressor and open_member use zipfile internals (_get_compressor,
+# ZipExtFile). They were checked on these versions; run this file on a new
+# Python before raising the upper bound.
+TESTED_PYTHON = ((3, 8), (3, 13))
+METHODS = [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA]
+DATA = b"zipcli compat " * 5000
+
+
+def test_running_python_is_covered():
+    assert TESTED_PYTHON[0] <= sys.version_info[:2] <= TESTED_PYTHON[1], (
+        f"zipfile internals not checked on Python {sys.version_info[0]}.{sys.version_info[1]}; "
+        "run tests/test_zipfile_compat.py and update TESTED_PYTHON")
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_member_compressor_matches_zipfile_write(method):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=method) as zf:
+        zf.writestr("a.txt", DATA)
+    expected = zipfile.ZipFile(buffer).getinfo("a.txt")
+
+    compressor = member_compressor(method)
+    data = compressor.compress(DATA) + compressor.flush() if compressor else DATA
+
+    assert len(data) == expected.compress_size
+    fp = io.BytesIO(buffer.getvalue())
+    fp.seek(member_data_offset(fp, expected.header_offset))
+    assert fp.read(expected.compress_size) == data
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_open_member_reads_and_checks_crc(tmp_path: Path, method):
+    zip_path = tmp_path / "a.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=method) as zf:
+        zf.writestr("a.txt", DATA)
+        zf.writestr("b.txt", b"second")
+    handles = ArchiveHandles()
+    try:
+        infos = {info.filename: info for info in iter_central_directory(zip_path)}
+        with open_member(handles.get(zip_path), infos["a.txt"]) as member:
+            assert member.read() == DATA
+        infos["b.txt"].CRC ^= 1
+        with open_member(handles.get(zip_path), infos["b.txt"]) as member, pytest.raises(zipfile.BadZipFile):
+            member.read()
+    finally:
+        handles.close()
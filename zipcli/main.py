@@ -15,124 +15,3344 @@ Features:
     - Customizable date format for filenames
     - Optional inventory report printed to console **and** saved as a text file
     - Backup location support
-    - Retains only the last [n] ZIP archives per source folder (--keep)
+    - Retains only the last [n] ZIP archives per source folder (--keep), plus optional
+      daily/weekly/monthly generations, tracked in an index instead of listing the folder
+    - Parallel compression across [n] worker threads (--workers)
+    - Read-ahead of upcoming files for high-latency network shares (--prefetch)
+    - Fast os.scandir walk that prunes excluded directories (e.g. --exclude node_modules .git),
+      optionally listing folders on several threads (--walkers)
+    - Per-file compression policy: stores already-compressed files (--compression, --level)
+    - Streaming output to stdout or a named pipe (--output -)
+    - Reuses compressed members of unchanged files from an earlier ZIP (--update-from)
+    - Persistent file-hash cache keyed by inode, size and mtime (--hash-cache)
+    - Splits large archives into self-contained volumes (--max-volume-size)
+    - Per-phase timings, throughput and slowest files (--stats), saved as JSON or a
+      Prometheus textfile (--stats-format)
+    - Deduplicating chunk store with snapshots (--dedup), exported to ZIP with `export`
+    - Batch mode: many source folders from one config file on a shared worker pool (`batch`)
+    - Skips, touches or hard-links the last ZIP when the folder is unchanged (--unchanged)
+    - Parallel CRC and inventory verification of new or kept archives (--verify, `verify`)
+    - Checkpoint journal so an interrupted archive can be finished with --resume
+    - Incremental archives driven by a file-state manifest (--incremental)
+    - Parallel, filtered restore of archives, chains and volume sets (`restore`)
+    - Catalog of every archived file for instant cross-archive search (`find`)
     - Executable build via PyInstaller
 """
 
+from __future__ import annotations
+
 __version__ = "1.1.0"
 __milestone__ = "v1.1.0"
 
-import argparse
-import fnmatch
-import re
-import shutil
-import zipfile
-from datetime import datetime
-from pathlib import Path
-from typing import List
-from typing import Optional
+# Only modules every run needs, and cheap ones like heapq and shutil, are imported
+# here. The rest (argparse, csv, hashlib, configparser, sqlite3, concurrent.futures,
+# ...) are imported where they are used, so a scheduler starting the tool many times
+# a night does not pay for code paths it never takes. benchmarks/startup.py checks the budget.
+
+import base64
+import contextlib
+import fnmatch
+import functools
+import heapq
+import io
+import itertools
+import json
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1 << 20          # read size used when feeding the compressor
+SPOOL_MAX_SIZE = 8 << 20      # compressed members larger than this spill to a temp file
+INVENTORY_SUFFIX = "_inventory.txt"
+INVENTORY_FORMATS = ("txt", "csv", "jsonl")
+INVENTORY_FIELDS = ("path", "size", "compressed_size", "crc32", "mtime", "method", "compress_seconds")
+MANIFEST_SUFFIX = "_manifest.jsonl"
+STATE_DIR = ".zipcli"         # per-backup-location state (retention index, chunk store, ...)
+SNAPSHOT_SUFFIX = ".zsnap"
+JOURNAL_SUFFIX = "_journal.jsonl"
+CHECKPOINT_INTERVAL = 5.0     # seconds between fsyncs of the ZIP and its checkpoint journal
+CHECKPOINT_PENDING = 256      # ... or this many members, whichever comes first
+STATS_FORMATS = ("json", "prom")
+UNCHANGED_ACTIONS = ("archive", "skip", "touch", "link")
+UNCHANGED_BUFFER = 100_000     # walked files --unchanged holds in memory before it walks again instead
+CATALOG_NAME = "catalog.sqlite"
+HASH_CACHE_NAME = "hashes.sqlite"
+HASH_CACHE_ENTRIES = 1_000_000  # default --hash-cache bound, roughly 150 MB on disk
+HASH_CACHE_BATCH = 10_000
+VOLUME_DIGITS = 3              # volumes are named <stem>_001.zip, <stem>_002.zip, ...
+MIN_VOLUME_SIZE = 64 << 10
+STATS_PHASES = ("walk", "filter", "read", "compress", "write", "retention")
+
+
+# fnmatch.fnmatch compares os.path.normcase()d strings: case-insensitive on Windows only
+_CASE_FLAGS = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+_SIMPLE_EXT = re.compile(r"\*\.[^*?\[\]/.]+")
+
+
+def translate_path_glob(pattern: str) -> str:
+    """
+    Translate a relative-path glob to a regex. "*" and "?" stay within one folder,
+    "**/" matches zero or more folders and a trailing "**" matches everything below.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1:i + 2] in ("!", "]") else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class PatternMatcher:
+    """
+    A list of glob patterns compiled once for fast matching.
+
+    - "*.ext" patterns become a set lookup on the file extension.
+    - Other patterns without "/" are fnmatch globs on the file name, combined into one regex.
+    - Patterns containing "/" match the path relative to the source folder and
+      support "**" (e.g. "build/**", "**/cache/*.tmp"), combined into a second regex.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = tuple(patterns)
+        self.extensions = set()
+        name_regexes = []
+        path_regexes = []
+        for pat in self.patterns:
+            if "/" in pat:
+                path_regexes.append(translate_path_glob(pat.lstrip("/")))
+            elif _SIMPLE_EXT.fullmatch(pat):
+                self.extensions.add(os.path.normcase(pat[1:]))
+            else:
+                name_regexes.append(fnmatch.translate(pat))
+        self._name_match = self._combine(name_regexes)
+        self._path_match = self._combine([f"(?s:{r})\\Z" for r in path_regexes])
+
+    @staticmethod
+    def _combine(regexes: List[str]):
+        return re.compile("|".join(regexes), _CASE_FLAGS).match if regexes else None
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def match(self, name: str, relpath: Optional[str] = None) -> bool:
+        if self.extensions:
+            dot = name.rfind(".")
+            if dot != -1 and os.path.normcase(name[dot:]) in self.extensions:
+                return True
+        if self._name_match and self._name_match(name):
+            return True
+        if self._path_match and relpath is not None and self._path_match(relpath):
+            return True
+        return False
+
+
+class FileFilter:
+    """Compiled --filter/--exclude patterns, shared by the walker, restore and the tests."""
+
+    def __init__(self, includes: Iterable[str], excludes: Iterable[str]):
+        self.includes = PatternMatcher(includes)
+        self.excludes = PatternMatcher(excludes)
+
+    def included(self, name: str, relpath: Optional[str] = None) -> bool:
+        if self.includes and not self.includes.match(name, relpath):
+            return False
+        if self.excludes and self.excludes.match(name, relpath):
+            return False
+        return True
+
+    def prune_dir(self, name: str, relpath: str) -> bool:
+        """True when an exclude pattern matches the folder itself or everything below it."""
+        return bool(self.excludes) and (
+            self.excludes.match(name, relpath) or self.excludes.match(name, relpath + "/"))
+
+
+@functools.lru_cache(maxsize=32)
+def compile_filter(includes: tuple, excludes: tuple) -> FileFilter:
+    return FileFilter(includes, excludes)
+
+
+def should_include(file_path: Path, includes: List[str], excludes: List[str]) -> bool:
+    file_filter = compile_filter(tuple(includes), tuple(excludes))
+    return file_filter.included(file_path.name, file_path.as_posix())
+
+
+class FileEntry(NamedTuple):
+    """A file found by scan_files: its path, POSIX path relative to the base dir, and stat."""
+    path: str
+    relpath: str
+    stat: os.stat_result
+
+
+def list_directory(dir_path: str, rel_prefix: str, file_filter: FileFilter) -> tuple:
+    """
+    List one folder for scan_files: returns (files, subdirs), where files are the
+    FileEntry of the files that pass the filter and subdirs the (path, relpath
+    prefix) of the subfolders to walk, each in name order.
+    """
+    try:
+        with os.scandir(dir_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError as e:
+        print(f"[WARN] Could not read folder {dir_path}: {e}")
+        return [], []
+
+    files = []
+    subdirs = []
+    for entry in entries:
+        try:
+            relpath = rel_prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if not file_filter.prune_dir(entry.name, relpath):
+                    subdirs.append((entry.path, relpath + "/"))
+                continue
+            if not entry.is_file():
+                continue
+            if not file_filter.included(entry.name, relpath):
+                continue
+            files.append(FileEntry(entry.path, relpath, entry.stat()))
+        except OSError as e:
+            print(f"[WARN] Could not read {entry.path}: {e}")
+    return files, subdirs
+
+
+def scan_files(base_dir: Path, includes: List[str], excludes: List[str],
+               stats: Optional["RunStats"] = None, walkers: int = 1) -> Iterator[FileEntry]:
+    """
+    Walk base_dir with os.scandir and lazily yield the files that pass the filters.
+
+    Each directory is listed once and its DirEntry type/stat data is reused, so no
+    extra stat or Path object is needed per file. A directory whose name matches an
+    exclude pattern (e.g. "node_modules", ".git") is pruned without being walked.
+    Entries are visited in name order (files, then subdirectories) so the result
+    does not depend on the filesystem's listing order. Symlinked directories are
+    not followed, matching Path.rglob.
+
+    With [walkers] > 1, folders are listed (and their files stat'ed) on that many
+    threads, which hides metadata latency on network mounts. The next 2 * walkers
+    folders in walk order are listed ahead of the consumer from a shared queue, and
+    listings are consumed in walk order, so the files and their order are the same
+    as with one walker and memory stays bounded.
+
+    With [stats], files scanned/matched and the time spent filtering are counted.
+    """
+    file_filter = compile_filter(tuple(includes), tuple(excludes))
+    if stats is not None:
+        file_filter = CountingFilter(file_filter, stats)
+    pool = None
+    if walkers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=walkers, thread_name_prefix="zipcli-walk")
+    with pool or contextlib.nullcontext():
+        stack = [[str(base_dir), "", None]]  # [path, relpath prefix, listing future]
+        while stack:
+            if pool:
+                for item in stack[-2 * walkers:]:
+                    if item[2] is None:
+                        item[2] = pool.submit(list_directory, item[0], item[1], file_filter)
+            dir_path, rel_prefix, listing = stack.pop()
+            files, subdirs = listing.result() if listing else list_directory(dir_path, rel_prefix, file_filter)
+            yield from files
+            # Reversed so the stack pops subdirectories in name order
+            stack.extend([path, prefix, None] for path, prefix in reversed(subdirs))
+
+
+class CountingFilter:
+    """
+    FileFilter wrapper that feeds the scanned/matched counters and filter timer of
+    a RunStats. Safe to share between the threads of a parallel walk.
+    """
+
+    def __init__(self, file_filter: FileFilter, stats: "RunStats"):
+        self.file_filter = file_filter
+        self.stats = stats
+        self._lock = threading.Lock()
+
+    def included(self, name: str, relpath: Optional[str] = None) -> bool:
+        start = time.perf_counter()
+        result = self.file_filter.included(name, relpath)
+        with self._lock:
+            self.stats.add_time("filter", time.perf_counter() - start)
+            self.stats.files_scanned += 1
+            self.stats.files_matched += result
+        return result
+
+    def prune_dir(self, name: str, relpath: str) -> bool:
+        start = time.perf_counter()
+        result = self.file_filter.prune_dir(name, relpath)
+        with self._lock:
+            self.stats.add_time("filter", time.perf_counter() - start)
+        return result
+
+
+def collect_files(base_dir: Path, includes: List[str], excludes: List[str], walkers: int = 1) -> List[Path]:
+    return [Path(entry.path) for entry in scan_files(base_dir, includes, excludes, walkers=walkers)]
+
+
+def parse_timestamp_from_name(filename: str, prefix: str, date_format: str) -> Optional[datetime]:
+    """
+    Attempt to extract a datetime object from the filename using the given prefix and format.
+    Returns None if parsing fails.
+    """
+    try:
+        stem = Path(filename).stem
+        if not stem.startswith(prefix + "_"):
+            return None
+        date_part = stem[len(prefix) + 1:]
+        return datetime.strptime(date_part, date_format)
+    except Exception:
+        return None
+
+
+def sidecar_path(zip_path: Path, suffix: str) -> Path:
+    """Return the path of a file stored next to a ZIP, e.g. <stem>_inventory.txt."""
+    return zip_path.with_name(zip_path.stem + suffix)
+
+
+def volume_path(zip_path: Path, number: int) -> Path:
+    """Return the path of volume [number] (from 1) of a volume set named like zip_path."""
+    return zip_path.with_name(f"{zip_path.stem}_{number:0{VOLUME_DIGITS}d}{zip_path.suffix}")
+
+
+def archive_files(entry: dict) -> List[str]:
+    """Return the names of the files holding an index entry's archive: its volumes, or just its name."""
+    return entry.get("volumes") or [entry["name"]]
+
+
+def parse_size(value: str) -> int:
+    """Parse a byte count with an optional K, M, G or T suffix (powers of 1024), e.g. "650M"."""
+    text = value.strip().upper()
+    if text.endswith("B"):
+        text = text[:-1]
+    scale = 1
+    if text and text[-1] in "KMGT":
+        scale = 1024 ** ("KMGT".index(text[-1]) + 1)
+        text = text[:-1]
+    return int(float(text) * scale)
+
+
+def index_path(backup_location: Path, zip_prefix: str) -> Path:
+    """Return the retention index file for one source folder in a backup location."""
+    return backup_location / STATE_DIR / f"{zip_prefix}_index.json"
+
+
+def scan_archive_index(source_dir: Path, backup_location: Path, date_format: str) -> List[dict]:
+    """
+    Build retention index entries from a directory listing. Only used once per
+    source, when a backup location has no index yet (e.g. archives made by v1.1.0).
+    Volumes (<stem>_001.zip, ...) are grouped into one entry named <stem>.zip.
+    """
+    zip_prefix = source_dir.name
+    entries = []
+    archives = list(backup_location.glob(f"{zip_prefix}_*.zip")) + list(backup_location.glob(f"{zip_prefix}_*{SNAPSHOT_SUFFIX}"))
+    volumes = {}
+    for p in sorted(archives):
+        stem, _, number = p.stem.rpartition("_")
+        logical = p.with_name(stem + p.suffix)
+        if (len(number) == VOLUME_DIGITS and number.isdigit()
+                and not parse_timestamp_from_name(p.name, zip_prefix, date_format)
+                and parse_timestamp_from_name(logical.name, zip_prefix, date_format)):
+            volumes.setdefault(logical, []).append(p.name)
+    archives = [p for p in archives if not any(p.name in names for names in volumes.values())] + list(volumes)
+    for p in archives:
+        ts = parse_timestamp_from_name(p.name, zip_prefix, date_format)
+        created = ts if ts else datetime.fromtimestamp(p.stat().st_ctime)
+        suffixes = [inventory_suffix(fmt) for fmt in INVENTORY_FORMATS] + [MANIFEST_SUFFIX]
+        sidecars = [s.name for s in (sidecar_path(p, suffix) for suffix in suffixes) if s.exists()]
+        references = []
+        if sidecar_path(p, MANIFEST_SUFFIX).exists():
+            references = read_manifest_header(sidecar_path(p, MANIFEST_SUFFIX)).get("references", [])
+        entry = {"name": p.name, "created": created.isoformat(), "sidecars": sidecars, "references": references}
+        if p in volumes:
+            entry["volumes"] = volumes[p]
+        entries.append(entry)
+    return entries
+
+
+def load_archive_index(source_dir: Path, backup_location: Path, date_format: str) -> List[dict]:
+    """
+    Return the retention index entries for source_dir, newest first.
+
+    The index (<backup>/.zipcli/<folder>_index.json) is updated on every run, so
+    retention and incremental runs never need to list or stat the backup location.
+    Delete the index file to have it rebuilt from the folder contents.
+    """
+    path = index_path(backup_location, source_dir.name)
+    if path.exists():
+        entries = json.loads(path.read_text(encoding="utf-8"))["archives"]
+    else:
+        entries = scan_archive_index(source_dir, backup_location, date_format)
+    return sorted(entries, key=lambda e: e["created"], reverse=True)
+
+
+def save_archive_index(source_dir: Path, backup_location: Path, entries: List[dict]):
+    path = index_path(backup_location, source_dir.name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"source": source_dir.name, "archives": entries}, indent=1), encoding="utf-8")
+    os.replace(tmp_path, path)  # atomic, so a crash never leaves a half-written index
+
+
+def catalog_path(backup_location: Path, cache_dir: Optional[Path] = None) -> Path:
+    """Return the catalog of a backup location: one SQLite file per location in the local cache."""
+    import hashlib
+    key = hashlib.sha1(os.fsencode(Path(backup_location).resolve())).hexdigest()[:16]
+    return (cache_dir or user_cache_dir()) / "catalogs" / f"{key}_{CATALOG_NAME}"
+
+
+_catalog_lock = threading.Lock()  # batch sources sharing a location update its catalog one at a time
+
+
+class Catalog:
+    """
+    SQLite index of every member of every archive in a backup location: path,
+    size, CRC-32, mtime, archive, volume and local header offset. `zipcli find`
+    answers from it without opening any archive.
+
+    It lives in the local cache folder (see catalog_path), not in the backup
+    location, which may be an SMB share where SQLite locking is unreliable. It
+    follows the JSON retention indexes (see sync): archives added since the last
+    sync have their central directory (or snapshot manifest) read once, and pruned
+    archives are deleted. An archive whose index entry has a new "created" time
+    (written again under the same name) is read again. Nothing else is rescanned.
+    """
+
+    def __init__(self, backup_location: Path, cache_dir: Optional[Path] = None):
+        import sqlite3
+        self.path = catalog_path(backup_location, cache_dir)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.backup_location = backup_location
+        self._db = sqlite3.connect(self.path, timeout=60)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS archives (name TEXT PRIMARY KEY, source TEXT, created TEXT);
+            CREATE TABLE IF NOT EXISTS members (archive TEXT, path TEXT, name TEXT, size INTEGER, crc32 INTEGER,
+                                                mtime_ns INTEGER, volume TEXT, header_offset INTEGER);
+            CREATE INDEX IF NOT EXISTS members_archive ON members (archive);
+            CREATE INDEX IF NOT EXISTS members_path ON members (path);
+            CREATE INDEX IF NOT EXISTS members_name ON members (name);
+        """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def _members(self, entry: dict) -> Iterator[tuple]:
+        if entry["name"].endswith(SNAPSHOT_SUFFIX):
+            for member in iter_manifest(self.backup_location / entry["name"]):
+                yield (entry["name"], member["path"], member["path"].rpartition("/")[2], member["size"], None,
+                       member["mtime_ns"], None, None)
+            return
+        volumes = entry.get("volumes")
+        for name in archive_files(entry):
+            for info in iter_central_directory(self.backup_location / name):
+                if not info.is_dir():
+                    mtime_ns = int(time.mktime(info.date_time + (0, 0, -1))) * 1_000_000_000
+                    yield (entry["name"], info.filename, info.filename.rpartition("/")[2], info.file_size,
+                           info.CRC, mtime_ns, name if volumes else None, info.header_offset)
+
+    def sync(self, source: str, entries: List[dict]):
+        """Make the catalogued archives of [source] match its retention index [entries]."""
+        wanted = {e["name"]: e for e in entries}
+        known = dict(self._db.execute("SELECT name, created FROM archives WHERE source = ?", (source,)))
+        with self._db:
+            for name in set(known) - set(wanted):
+                self._db.execute("DELETE FROM members WHERE archive = ?", (name,))
+                self._db.execute("DELETE FROM archives WHERE name = ?", (name,))
+        for name in sorted(name for name, e in wanted.items() if known.get(name) != e["created"]):
+            try:
+                with self._db:  # an overwritten archive is replaced in the same transaction
+                    self._db.execute("DELETE FROM members WHERE archive = ?", (name,))
+                    self._db.execute("DELETE FROM archives WHERE name = ?", (name,))
+                    self._db.executemany("INSERT INTO members VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                         self._members(wanted[name]))
+                    self._db.execute("INSERT INTO archives VALUES (?, ?, ?)", (name, source, wanted[name]["created"]))
+            except (OSError, zipfile.BadZipFile, ValueError, KeyError) as e:
+                print(f"[WARN] Could not add {name} to the catalog: {e}")
+
+    def sync_all(self):
+        """Sync every source with a retention index in the backup location; drop sources without one."""
+        sources = set()
+        for path in (self.backup_location / STATE_DIR).glob("*_index.json"):
+            index = json.loads(path.read_text(encoding="utf-8"))
+            sources.add(index["source"])
+            self.sync(index["source"], index["archives"])
+        for source, in self._db.execute("SELECT DISTINCT source FROM archives").fetchall():
+            if source not in sources:
+                self.sync(source, [])
+
+    def find(self, pattern: str, source: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+        """
+        Return the catalogued members matching a --filter style [pattern], newest
+        archive first and by path within an archive: a pattern without "/" matches
+        the file name, one with "/" the path (with "**" for any number of folders).
+        """
+        column = "path" if "/" in pattern else "name"
+        glob = pattern.replace("**/", "*").replace("**", "*").replace("[!", "[^")  # a superset, refined below
+        if _CASE_FLAGS:
+            where, args = f"lower(m.{column}) GLOB ?", [glob.lower()]
+        else:
+            where, args = f"m.{column} GLOB ?", [glob]
+        if source:
+            where += " AND a.source = ?"
+            args.append(source)
+        rows = self._db.execute(
+            "SELECT a.name, a.source, a.created, m.path, m.size, m.crc32, m.mtime_ns, m.volume, m.header_offset "
+            f"FROM members m JOIN archives a ON a.name = m.archive WHERE {where} ORDER BY a.created DESC, m.path", args)
+        matcher = PatternMatcher([pattern])
+        fields = ("archive", "source", "created", "path", "size", "crc32", "mtime_ns", "volume", "header_offset")
+        found = []
+        for row in rows:
+            if matcher.match(row[3].rpartition("/")[2], row[3]):
+                found.append(dict(zip(fields, row)))
+                if limit and len(found) >= limit:
+                    break
+        return found
+
+
+def update_catalog(source_dir: Path, backup_location: Path, cache_dir: Optional[Path] = None):
+    """Bring the backup location's catalog in line with the retention index of source_dir (--catalog)."""
+    import sqlite3
+    path = index_path(backup_location, source_dir.name)
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8"))["archives"] if path.exists() else []
+        with _catalog_lock, Catalog(backup_location, cache_dir) as catalog:
+            catalog.sync(source_dir.name, entries)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"[WARN] Could not update the catalog: {e}")
+
+
+def record_archive(source_dir: Path, backup_location: Path, date_format: str, zip_path: Path,
+                   sidecars: List[Path], references: Iterable[str] = (), fingerprint: Optional[str] = None,
+                   volumes: Iterable[Path] = ()):
+    """
+    Add a newly written ZIP (and the files written next to it) to the retention index.
+    For a volume set, zip_path is the name of the set and [volumes] its files.
+    """
+    entries = [e for e in load_archive_index(source_dir, backup_location, date_format) if e["name"] != zip_path.name]
+    entry = {
+        "name": zip_path.name,
+        "created": datetime.now().isoformat(),
+        "sidecars": [s.name for s in sidecars],
+        "references": sorted(references),
+    }
+    if fingerprint:
+        entry["fingerprint"] = fingerprint
+    if volumes:
+        entry["volumes"] = [v.name for v in volumes]
+    entries.insert(0, entry)
+    save_archive_index(source_dir, backup_location, entries)
+
+
+def sorted_zips(source_dir: Path, backup_location: Path, date_format: str) -> List[Path]:
+    """Return the ZIPs created for source_dir in backup_location, newest first."""
+    return [backup_location / e["name"] for e in load_archive_index(source_dir, backup_location, date_format)]
+
+
+def select_retained(entries: List[dict], keep: int, daily: int = 0, weekly: int = 0, monthly: int = 0) -> set:
+    """
+    Apply a grandfather-father-son policy to index entries (newest first).
+
+    Keeps the [keep] most recent archives, plus the newest archive of each of the
+    last [daily] days, [weekly] ISO weeks and [monthly] months that have archives.
+    Returns the set of retained archive names.
+    """
+    retained = {e["name"] for e in entries[:keep]}
+    buckets = (
+        (daily, lambda d: d.date()),
+        (weekly, lambda d: d.isocalendar()[:2]),
+        (monthly, lambda d: (d.year, d.month)),
+    )
+    for count, bucket_of in buckets:
+        seen = set()
+        for e in entries:
+            if len(seen) >= count:
+                break
+            bucket = bucket_of(datetime.fromisoformat(e["created"]))
+            if bucket not in seen:
+                seen.add(bucket)
+                retained.add(e["name"])
+    return retained
+
+
+def enforce_zip_retention(source_dir: Path, backup_location: Path, date_format: str, keep: int,
+                          daily: int = 0, weekly: int = 0, monthly: int = 0):
+    """
+    Retain only the most recent [keep] ZIP files and their inventories in backup_location,
+    plus any selected by the daily/weekly/monthly (GFS) counts. Older ZIPs that a retained
+    incremental archive still depends on are kept as well. A volume set counts as one
+    archive: all of its volumes are kept or removed together.
+
+    Archives are looked up in the retention index rather than by listing the folder.
+    Entries selected for retention whose files were deleted outside zipcli are
+    dropped from the index, so they do not take a [keep] slot; only those
+    candidates are stat'ed.
+
+    Args:
+        source_dir (Path): The folder being zipped (used to match filename prefix).
+        backup_location (Path): Where to search for old ZIPs.
+        date_format (str): Format of the timestamp in the ZIP filename.
+        keep (int): Number of ZIPs to retain.
+        daily, weekly, monthly (int): Number of days/weeks/months to keep one ZIP for.
+    """
+    entries = load_archive_index(source_dir, backup_location, date_format)
+    present = set()
+    while True:
+        retained = select_retained(entries, keep, daily, weekly, monthly)
+        vanished = set()
+        for e in entries:
+            if e["name"] in retained and e["name"] not in present:
+                if all((backup_location / name).exists() for name in archive_files(e)):
+                    present.add(e["name"])
+                else:
+                    vanished.add(e["name"])
+        if not vanished:
+            break
+        for name in sorted(vanished):
+            print(f"[WARN] {name} is missing from {backup_location}; dropping it from the index")
+        entries = [e for e in entries if e["name"] not in vanished]
+    for e in entries:
+        if e["name"] in retained:
+            retained.update(e.get("references", []))
+
+    remaining = []
+    removed_snapshot = False
+    for e in entries:
+        if e["name"] in retained:
+            remaining.append(e)
+            continue
+        removed_snapshot = removed_snapshot or e["name"].endswith(SNAPSHOT_SUFFIX)
+        zip_path = backup_location / e["name"]
+        try:
+            for name in archive_files(e):
+                (backup_location / name).unlink(missing_ok=True)
+                print(f"[INFO] Removed old archive: {name}")
+
+            # Also remove the matching inventory and manifest files
+            for sidecar in e.get("sidecars", []):
+                (backup_location / sidecar).unlink(missing_ok=True)
+                print(f"[INFO] Removed {sidecar}")
+
+        except Exception as ex:
+            print(f"[WARN] Could not delete {zip_path.name}: {ex}")
+            remaining.append(e)
+
+    save_archive_index(source_dir, backup_location, remaining)
+    if removed_snapshot:
+        gc_chunks(backup_location)
+
+
+def file_digest(file_path) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    import hashlib
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """
+    Persistent CRC-32 and SHA-256 of file contents, keyed by the file's
+    (st_dev, st_ino, st_size, st_mtime_ns), so a file whose stat is unchanged is
+    never read again just to hash it (--hash-cache).
+
+    The cache is an SQLite database, hashes.sqlite in the local per-user cache
+    folder (see user_cache_dir), shared by every source and backup location. It is
+    kept off the backup location, which may be an SMB share where SQLite locking
+    is unreliable. It holds at most [max_entries] files; the least
+    recently used ones are evicted when it is closed.
+
+    It is filled as a run goes: with the CRC-32 of every file archived, the
+    SHA-256 of every file hashed, and the digests an incremental run carries over
+    from the previous manifest. Nothing is read just to fill it, so the first
+    run with a cold cache still reads every file it needs a hash of.
+
+    Lookups may come from any thread. New hashes and use times are kept in memory
+    and written in batches of HASH_CACHE_BATCH files, one transaction each.
+    """
+
+    def __init__(self, path: Path, max_entries: int = HASH_CACHE_ENTRIES):
+        import sqlite3
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS hashes (dev INTEGER, ino INTEGER, size INTEGER, "
+                         "mtime_ns INTEGER, crc32 INTEGER, sha256 TEXT, used INTEGER, "
+                         "PRIMARY KEY (dev, ino, size, mtime_ns)) WITHOUT ROWID")
+        self._db.execute("CREATE INDEX IF NOT EXISTS hashes_used ON hashes (used)")
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> [crc32, sha256, used]
+        self.hits = self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def key(st: os.stat_result) -> tuple:
+        return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _get(self, st: os.stat_result, column: int):
+        key = self.key(st)
+        with self._lock:
+            row = self._pending.get(key)
+            if row is None:
+                found = self._db.execute("SELECT crc32, sha256 FROM hashes WHERE dev = ? AND ino = ? AND size = ? "
+                                         "AND mtime_ns = ?", key).fetchone()
+                row = [*found, 0] if found else None
+            if row is None or row[column] is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            row[2] = time.time_ns()  # mark as used
+            self._pending[key] = row
+            if len(self._pending) >= HASH_CACHE_BATCH:
+                self._flush()
+            return row[column]
+
+    def crc32(self, st: os.stat_result) -> Optional[int]:
+        """CRC-32 of the file with stat [st], if known."""
+        return self._get(st, 0)
+
+    def sha256(self, st: os.stat_result) -> Optional[str]:
+        """SHA-256 hex digest of the file with stat [st], if known."""
+        return self._get(st, 1)
+
+    def put(self, st: os.stat_result, crc32: Optional[int] = None, sha256: Optional[str] = None):
+        """Record hashes of the file with stat [st] (taken from its content as of that stat)."""
+        with self._lock:
+            row = self._pending.setdefault(self.key(st), [None, None, 0])
+            row[0] = crc32 if crc32 is not None else row[0]
+            row[1] = sha256 if sha256 is not None else row[1]
+            row[2] = time.time_ns()
+            if len(self._pending) >= HASH_CACHE_BATCH:
+                self._flush()
+
+    def _flush(self):
+        # Caller holds self._lock
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (dev, ino, size, mtime_ns) DO UPDATE SET "
+                "crc32 = coalesce(excluded.crc32, crc32), sha256 = coalesce(excluded.sha256, sha256), used = excluded.used",
+                (key + tuple(row) for key, row in self._pending.items()))
+        self._pending.clear()
+
+    def close(self):
+        """Write pending hashes and use times, evict the least recently used entries, close the database."""
+        if self._db is None:
+            return
+        with self._lock:
+            self._flush()
+            with self._db:
+                excess = self._db.execute("SELECT count(*) FROM hashes").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._db.execute("DELETE FROM hashes WHERE (dev, ino, size, mtime_ns) IN (SELECT dev, ino, size, "
+                                     "mtime_ns FROM hashes ORDER BY used LIMIT ?)", (excess,))
+            self._db.close()
+            self._db = None
+
+
+def user_cache_dir() -> Path:
+    """
+    Local per-user cache folder of zipcli: %LOCALAPPDATA%\\zipcli on Windows,
+    $XDG_CACHE_HOME/zipcli (default ~/.cache/zipcli) elsewhere.
+    """
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "zipcli"
+
+
+def hash_cache_path(cache_dir: Optional[Path] = None) -> Path:
+    return (cache_dir or user_cache_dir()) / HASH_CACHE_NAME
+
+
+class TreeFingerprint:
+    """
+    Hash of the (relpath, size, mtime) of every walked file, in walk order, plus
+    the compression settings. Two walks with the same fingerprint would produce
+    the same archive, so --unchanged can skip the second one. It is stored with
+    each archive in the retention index.
+    """
+
+    def __init__(self, policy: CompressionPolicy):
+        import hashlib
+        self._hash = hashlib.sha256(f"{policy.compress_type}:{policy.level}:{policy.auto_store}\n".encode())
+
+    def track(self, files: Iterable[FileEntry]) -> Iterator[FileEntry]:
+        """Yield files unchanged, adding each one to the fingerprint."""
+        for file_entry in files:
+            st = file_entry.stat
+            self._hash.update(f"{file_entry.relpath}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8", "surrogateescape"))
+            yield file_entry
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def match_archive_walk(files: Iterator[FileEntry], archive_paths: List[Path], max_buffered: int) -> tuple:
+    """
+    Consume walked [files] while they match the members of an earlier archive
+    (its volumes [archive_paths]) in order, by path and size, stopping at the
+    first difference. Returns (files, same): an iterator over every walked file,
+    replaying the consumed ones from memory before the rest of the walk, and
+    whether the whole walk matched. files is None when more than [max_buffered]
+    files were consumed before a difference; the caller then has to walk again.
+    """
+    members = (info for path in archive_paths for info in iter_central_directory(path) if not info.is_dir())
+    buffered = []
+    for file_entry in files:
+        if buffered is not None:
+            buffered.append(file_entry)
+            if len(buffered) > max_buffered:
+                buffered = None
+        member = next(members, None)
+        if member is None or member.filename != file_entry.relpath or member.file_size != file_entry.stat.st_size:
+            return (None if buffered is None else itertools.chain(buffered, files)), False
+    same = next(members, None) is None
+    return (None if buffered is None else iter(buffered)), same
+
+
+def reuse_unchanged_archive(source_dir: Path, backup_location: Path, date_format: str, previous: dict,
+                            zip_path: Path, action: str) -> Path:
+    """
+    Handle a run whose source tree matches the newest archive ([previous], an index entry).
+
+    "skip" leaves everything alone, "touch" updates the archive's modification time
+    (for monitoring that checks backup freshness), and "link" hard-links it and its
+    sidecars under the new dated name [zip_path] (copying where hard links are not
+    supported) and records that as a new archive, so --keep-daily and friends still
+    see one archive per run. Volume sets are handled as a whole. Returns the archive
+    (the first volume, for a volume set) that holds the current tree.
+    """
+    previous_files = [backup_location / name for name in archive_files(previous)]
+    if action == "touch":
+        for path in previous_files:
+            os.utime(path)
+    if action != "link" or previous["name"] == zip_path.name:
+        return previous_files[0]
+
+    old_stem = Path(previous["name"]).stem
+    volumes = [sidecar_path(zip_path, path.name[len(old_stem):]) for path in previous_files]
+    pairs = list(zip(previous_files, volumes)) + [
+        (backup_location / name, sidecar_path(zip_path, name[len(old_stem):]))
+        for name in previous["sidecars"] if name.startswith(old_stem)]
+    for src, dst in pairs:
+        if not src.exists():
+            continue
+        dst.unlink(missing_ok=True)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+    record_archive(source_dir, backup_location, date_format, zip_path,
+                   [dst for src, dst in pairs[len(volumes):] if dst.exists()], fingerprint=previous["fingerprint"],
+                   volumes=volumes if "volumes" in previous else ())
+    return volumes[0]
+
+
+def read_manifest_header(manifest_path: Path) -> dict:
+    """Return only the first (header) line of a manifest."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.loads(f.readline())
+
+
+def iter_manifest(manifest_path: Path) -> Iterator[dict]:
+    """Yield the file entries of a manifest one at a time, skipping the header."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        f.readline()
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_manifest(manifest_path: Path):
+    """
+    Read a file-state manifest written by --incremental (or a --dedup snapshot).
+
+    The first line is a header describing the archive (base archive, referenced
+    archives, deleted paths); every following line is one file entry with its
+    path, size, mtime_ns, the archive that holds its content and optionally sha256.
+    Entries are stored in walk order (see walk_order_key).
+
+    Returns:
+        (header, entries) where entries maps relative path -> entry dict.
+    """
+    header = read_manifest_header(manifest_path)
+    entries = {entry["path"]: entry for entry in iter_manifest(manifest_path)}
+    return header, entries
+
+
+class ManifestWriter:
+    """
+    Write a manifest one entry at a time. Entries go to a temporary file and the
+    header, which may depend on every entry (deleted paths, references), is put
+    in front of them by close(). The manifest appears atomically.
+    """
+
+    def __init__(self, manifest_path: Path, header: dict):
+        self.path = manifest_path
+        self.header = header
+        self._body = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def add(self, entry: dict):
+        self._body.write(json.dumps(entry) + "\n")
+
+    def close(self):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.header) + "\n")
+            self._body.seek(0)
+            shutil.copyfileobj(self._body, f)
+        self._body.close()
+        os.replace(tmp_path, self.path)
+
+
+def inventory_suffix(inventory_format: str = "txt") -> str:
+    return f"_inventory.{inventory_format}"
+
+
+class InventoryWriter:
+    """
+    Write the inventory of an archive one member at a time.
+
+    txt lists "path<TAB>method" per line. csv and jsonl record every field in
+    INVENTORY_FIELDS: original and compressed size, CRC32 (8 hex digits), mtime
+    (ISO 8601, local time), compression method and seconds spent compressing.
+    These come from the ZipInfo written for each member, so inventories of two
+    runs can be compared without opening either archive (see read_inventory).
+    With [volumes], every format also records the volume holding each member.
+    """
+
+    def __init__(self, path: Path, inventory_format: str = "txt", volumes: bool = False):
+        self.path = path
+        self.format = inventory_format
+        self.volumes = volumes
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._csv = None
+        if inventory_format == "csv":
+            import csv
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(INVENTORY_FIELDS + (("volume",) if volumes else ()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def flush(self):
+        """Make the members added so far visible to readers (e.g. verification of a finished volume)."""
+        self._file.flush()
+
+    def add(self, path: str, size: int, compressed_size: Optional[int], crc: Optional[int],
+            mtime: float, method: str, seconds: float, volume: Optional[str] = None):
+        if self.format == "txt":
+            self._file.write(f"{path}\t{method}\t{volume}\n" if self.volumes else f"{path}\t{method}\n")
+            return
+        record = {
+            "path": path,
+            "size": size,
+            "compressed_size": compressed_size,
+            "crc32": f"{crc:08x}" if crc is not None else None,
+            "mtime": datetime.fromtimestamp(mtime).isoformat(timespec="seconds"),
+            "method": method,
+            "compress_seconds": round(seconds, 6),
+        }
+        if self.volumes:
+            record["volume"] = volume
+        if self._csv:
+            self._csv.writerow(["" if v is None else v for v in record.values()])
+        else:
+            self._file.write(json.dumps(record) + "\n")
+
+    def add_member(self, zinfo: zipfile.ZipInfo, mtime: float, seconds: float, volume: Optional[str] = None):
+        self.add(zinfo.filename, zinfo.file_size, zinfo.compress_size, zinfo.CRC,
+                 mtime, METHOD_NAMES[zinfo.compress_type], seconds, volume)
+
+
+def read_inventory(path: Path) -> Iterator[dict]:
+    """
+    Yield one dict per member from an inventory in any format (chosen by suffix).
+    txt inventories only provide "path" and "method" (and "volume" for a volume set).
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.suffix == ".csv":
+            import csv
+            for row in csv.DictReader(f):
+                yield {k: (None if v == "" else int(v) if k in ("size", "compressed_size") else v)
+                       for k, v in row.items()}
+        elif path.suffix == ".jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for line in f:
+                if line.strip():
+                    name, _, rest = line.rstrip("\n").partition("\t")
+                    method, _, volume = rest.partition("\t")
+                    record = {"path": name, "method": method or None}
+                    if volume:
+                        record["volume"] = volume
+                    yield record
+
+
+def walk_order_key(relpath: str) -> tuple:
+    """
+    Sort key that reproduces scan_files order: within a folder, files by name
+    first, then subfolders by name, depth first.
+    """
+    parts = relpath.split("/")
+    return tuple((1, p) for p in parts[:-1]) + ((0, parts[-1]),)
+
+
+def merge_with_previous(files: Iterable[FileEntry], previous: Iterable[dict],
+                        deleted: List[str]) -> Iterator[tuple]:
+    """
+    Pair each walked file with its entry in a previous manifest, streaming both.
+
+    Both inputs are in walk order, so this is a merge join that holds only one
+    entry of each side in memory. Yields (file_entry, previous_entry_or_None);
+    paths only present in [previous] are appended to [deleted].
+    """
+    previous = iter(previous)
+    prev = next(previous, None)
+    for file_entry in files:
+        key = walk_order_key(file_entry.relpath)
+        while prev is not None and walk_order_key(prev["path"]) < key:
+            deleted.append(prev["path"])
+            prev = next(previous, None)
+        if prev is not None and prev["path"] == file_entry.relpath:
+            yield file_entry, prev
+            prev = next(previous, None)
+        else:
+            yield file_entry, None
+    while prev is not None:
+        deleted.append(prev["path"])
+        prev = next(previous, None)
+
+
+def load_previous_manifest(source_dir: Path, backup_location: Path, date_format: str):
+    """
+    Find the newest manifest for source_dir whose referenced archives all still exist.
+    Returns (zip_path, header) or None when the next run must be a full archive.
+    """
+    for zip_path in sorted_zips(source_dir, backup_location, date_format):
+        manifest_path = sidecar_path(zip_path, MANIFEST_SUFFIX)
+        if not manifest_path.exists():
+            continue
+        header = read_manifest_header(manifest_path)
+        missing = [n for n in header.get("references", []) if not (backup_location / n).exists()]
+        if missing:
+            print(f"[WARN] {manifest_path.name} references missing archives {missing}; ignoring it")
+            continue
+        return zip_path, header
+    return None
+
+
+COMPRESSION_METHODS = {
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+    "store": zipfile.ZIP_STORED,
+}
+METHOD_NAMES = {v: k for k, v in COMPRESSION_METHODS.items()}
+
+# Formats that are already compressed; deflating them costs CPU for no size gain
+COMPRESSED_EXTENSIONS = frozenset({
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".avif",
+    ".mp3", ".aac", ".ogg", ".flac", ".m4a", ".opus",
+    ".mp4", ".m4v", ".mkv", ".mov", ".avi", ".webm", ".wmv",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".zst", ".lz4",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".jar", ".apk", ".whl",
+})
+
+
+class CompressionPolicy:
+    """
+    Choose the compression method and level for each member.
+
+    With auto_store, files with a known compressed extension are stored, and so
+    are files whose first block does not shrink by at least (1 - trial_ratio)
+    under a quick level-1 deflate trial.
+    """
+
+    def __init__(self, method: str = "deflate", level: Optional[int] = None, auto_store: bool = True,
+                 trial_size: int = 64 * 1024, trial_ratio: float = 0.97):
+        self.compress_type = COMPRESSION_METHODS[method]
+        self.level = level
+        self.auto_store = auto_store and self.compress_type != zipfile.ZIP_STORED
+        self.trial_size = trial_size
+        self.trial_ratio = trial_ratio
+
+    def choose(self, name: str, first_block: bytes):
+        """Return (compress_type, compresslevel) for a file given its name and first bytes."""
+        if self.auto_store:
+            if os.path.splitext(name)[1].lower() in COMPRESSED_EXTENSIONS:
+                return zipfile.ZIP_STORED, None
+            sample = first_block[:self.trial_size]
+            if len(zlib.compress(sample, 1)) >= len(sample) * self.trial_ratio:
+                return zipfile.ZIP_STORED, None
+        return self.compress_type, self.level
+
+
+DEFAULT_POLICY = CompressionPolicy()
+
+
+class CompressedMember(NamedTuple):
+    """
+    Compressed bytes of one file plus the values needed for its local header.
+    A large stored member has no data; instead [source] is (path, size, mtime_ns)
+    of the file, which ZipWriter.add_compressed copies in the kernel. A member
+    taken over from an earlier archive (see PreviousArchive) has [reuse], that
+    archive's path and the member's local header offset, instead.
+    """
+    data: Optional[tempfile.SpooledTemporaryFile]
+    crc: int
+    file_size: int
+    compress_size: int
+    compress_type: int = zipfile.ZIP_DEFLATED
+    seconds: float = 0.0
+    read_seconds: float = 0.0
+    source: Optional[tuple] = None
+    reuse: Optional[tuple] = None
+
+
+def zip_date_time(st: os.stat_result) -> tuple:
+    """ZIP timestamp of a file; times before 1980 (not representable) are clamped to 1980-01-01."""
+    date_time = time.localtime(st.st_mtime)[0:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    return date_time
+
+
+def build_zipinfo(arcname: str, st: os.stat_result, compress_type: int) -> zipfile.ZipInfo:
+    """
+    Build a ZipInfo for a regular file from an existing stat result.
+    Timestamps before 1980 (not representable in ZIP) are clamped to 1980-01-01.
+    """
+    zinfo = zipfile.ZipInfo(arcname, zip_date_time(st))
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    zinfo.file_size = st.st_size
+    zinfo.compress_type = compress_type
+    return zinfo
+
+
+class FileHead(NamedTuple):
+    """The first block of a file (all of it, if shorter than CHUNK_SIZE), read ahead by read_head."""
+    data: bytes
+    seconds: float
+
+
+def read_head(file_path, io_slots: Optional[threading.Semaphore] = None) -> FileHead:
+    start = time.perf_counter()
+    with io_slots or contextlib.nullcontext():
+        with open(file_path, "rb") as f:
+            data = f.read(CHUNK_SIZE)
+    return FileHead(data, time.perf_counter() - start)
+
+
+def prefetch_heads(files: Iterable[FileEntry], depth: int, io_slots: Optional[threading.Semaphore] = None,
+                   skip: Optional[Callable] = None) -> Iterator[tuple]:
+    """
+    Yield (file_entry, FileHead) in order, with the files ahead of the consumer
+    opened and read on [depth] background threads.
+
+    On a high-latency mount (SMB, NFS) every open and first read is a network
+    round trip; doing them for up to 2 * depth upcoming files at once keeps the
+    link busy while earlier files are compressed. Files for which skip(entry) is
+    true get None instead of a head. Memory use is at most 2 * depth * CHUNK_SIZE.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def read(entry: FileEntry):
+        return entry, None if skip and skip(entry) else read_head(entry.path, io_slots)
+
+    with ThreadPoolExecutor(max_workers=depth, thread_name_prefix="zipcli-prefetch") as pool:
+        yield from ordered_map(read, files, depth, pool)
+
+
+_block_buffers = threading.local()  # per-thread read buffer of iter_blocks
+
+
+def iter_blocks(src, io_slots: Optional[threading.Semaphore] = None) -> Iterator[memoryview]:
+    """
+    Yield the rest of the open binary file [src] in CHUNK_SIZE blocks.
+
+    Blocks are read with readinto() into one preallocated buffer, reused by the
+    thread's next call, so no bytes object is allocated per block and large reads go straight from the kernel into
+    that buffer. Each block is a view of the buffer: use it before asking for the
+    next one. (Memory-mapping was left out on purpose: a source file truncated
+    while mapped, such as a dump being rewritten, kills the process with SIGBUS.)
+    """
+    # Take this thread's buffer (allocating and zero-filling 1 MB per file costs more
+    # than compressing a small one); a nested call on the same thread gets its own.
+    buf = getattr(_block_buffers, "buf", None) or bytearray(CHUNK_SIZE)
+    _block_buffers.buf = None
+    view = memoryview(buf)
+    io_slots = io_slots or contextlib.nullcontext()
+    try:
+        while True:
+            with io_slots:
+                n = src.readinto(buf)
+            if not n:
+                return
+            yield view[:n]
+    finally:
+        _block_buffers.buf = buf
+
+
+def compress_member(file_path, compress_type: int = zipfile.ZIP_DEFLATED,
+                    compresslevel: Optional[int] = None,
+                    policy: Optional[CompressionPolicy] = None,
+                    io_slots: Optional[threading.Semaphore] = None,
+                    head: Optional[FileHead] = None,
+                    copy_stored: bool = False) -> CompressedMember:
+    """
+    Compress a single file into a spooled buffer. Safe to run in a worker thread:
+    zlib, bz2 and lzma release the GIL while compressing. When a policy is given it
+    picks the method from the file name and first block, overriding compress_type.
+    Each read holds one of [io_slots], if given, so compression is not throttled.
+    With [head] (see prefetch_heads) the first block is not read again, and a file
+    that fits in it is not opened at all.
+
+    Files larger than SPOOL_MAX_SIZE are compressed into a real temporary file, so
+    ZipWriter can copy them into the archive in the kernel. With [copy_stored],
+    such a file that ends up stored is not buffered at all: only its CRC is taken
+    and the member refers to the source file (see CompressedMember.source).
+    """
+    start = time.perf_counter()
+    read_seconds = head.seconds if head else 0.0
+    with contextlib.ExitStack() as stack:
+        if head is not None and len(head.data) < CHUNK_SIZE:
+            src = None
+            chunk = head.data
+            blocks = iter(())
+            size = len(chunk)
+        else:
+            src = stack.enter_context(open(file_path, "rb"))
+            size = os.fstat(src.fileno()).st_size
+            if head is not None:
+                src.seek(CHUNK_SIZE)
+            blocks = iter_blocks(src, io_slots)
+            chunk = head.data if head is not None else next(blocks, b"")
+            read_seconds += 0.0 if head is not None else time.perf_counter() - start
+        if policy:
+            compress_type, compresslevel = policy.choose(os.path.basename(file_path), chunk)
+        source = None
+        spool = None
+        if copy_stored and compress_type == zipfile.ZIP_STORED and size > SPOOL_MAX_SIZE:
+            source = (os.fspath(file_path), size, os.fstat(src.fileno()).st_mtime_ns)
+        elif size > SPOOL_MAX_SIZE:
+            spool = tempfile.TemporaryFile()
+        else:
+            spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        # Same compressor objects ZipFile.write uses, so the member data is identical.
+        compressor = member_compressor(compress_type, compresslevel)
+        crc = 0
+        file_size = 0
+        while chunk:
+            file_size += len(chunk)
+            crc = zipfile.crc32(chunk, crc)
+            if spool:
+                spool.write(compressor.compress(chunk) if compressor else chunk)
+            read_start = time.perf_counter()
+            chunk = next(blocks, b"")
+            read_seconds += time.perf_counter() - read_start
+    seconds = time.perf_counter() - start + (head.seconds if head else 0.0)
+    if source:
+        source = (source[0], file_size, source[2])
+        return CompressedMember(None, crc, file_size, file_size, compress_type, seconds, read_seconds, source)
+    if compressor:
+        spool.write(compressor.flush())
+    compress_size = spool.tell()
+    spool.seek(0)
+    return CompressedMember(spool, crc, file_size, compress_size, compress_type, seconds, read_seconds)
+
+
+class PreviousMember(NamedTuple):
+    """What PreviousArchive keeps of an earlier member: with its name, about 270 bytes, half a ZipInfo."""
+    CRC: int
+    file_size: int
+    compress_size: int
+    compress_type: int
+    date_time: tuple
+    header_offset: int
+
+
+class PreviousArchive:
+    """
+    An earlier archive whose compressed members can be copied as is into a new
+    one (--update-from), so unchanged files are not compressed again.
+
+    A file is taken over when the earlier archive has a member of the same name,
+    size and timestamp, compressed with the method the policy would use (or stored,
+    with auto-store on), and the file's CRC-32 still matches the member's. The CRC
+    check reads the file but skips compression, unless [hash_cache] already knows
+    the CRC for the file's stat; the member bytes are then copied by the kernel
+    where possible. The compression level is not compared.
+
+    The usable members are looked up by name from worker threads, in no fixed
+    order, so they are all held in memory (see PreviousMember): about 270 MB for
+    an archive of a million files, read once in a stream from its central directory.
+    """
+
+    def __init__(self, zip_path: Path, policy: CompressionPolicy, hash_cache: Optional[HashCache] = None):
+        self.path = zip_path
+        self.hash_cache = hash_cache
+        methods = {policy.compress_type} | ({zipfile.ZIP_STORED} if policy.auto_store else set())
+        date_times = {}  # members share few distinct timestamps; keep one tuple of each
+        self.members = {info.filename: PreviousMember(info.CRC, info.file_size, info.compress_size, info.compress_type,
+                                                      date_times.setdefault(info.date_time, info.date_time),
+                                                      info.header_offset)
+                        for info in iter_central_directory(zip_path)
+                        if not info.is_dir() and not info.flag_bits & 0x01 and info.compress_type in methods}
+        self.reused = 0
+
+    def reuse(self, entry: FileEntry, io_slots: Optional[threading.Semaphore] = None,
+              head: Optional[FileHead] = None) -> Optional[CompressedMember]:
+        """Return the earlier member for [entry] if its content is unchanged, else None."""
+        info = self.members.get(entry.relpath)
+        date_time = zip_date_time(entry.stat)
+        date_time = date_time[:5] + (date_time[5] // 2 * 2,)  # stored with 2-second resolution
+        if info is None or info.file_size != entry.stat.st_size or info.date_time != date_time:
+            return None
+        start = time.perf_counter()
+        cached = self.hash_cache.crc32(entry.stat) if self.hash_cache else None
+        crc = zipfile.crc32(head.data) if head else 0
+        size = len(head.data) if head else 0
+        if cached is not None:
+            crc, size = cached, entry.stat.st_size
+        elif head is None or len(head.data) == CHUNK_SIZE:
+            with open(entry.path, "rb") as src:
+                src.seek(size)
+                for block in iter_blocks(src, io_slots):
+                    crc = zipfile.crc32(block, crc)
+                    size += len(block)
+        if (crc, size) != (info.CRC, info.file_size):
+            return None
+        seconds = time.perf_counter() - start + (head.seconds if head else 0.0)
+        return CompressedMember(None, crc, size, info.compress_size, info.compress_type, seconds, seconds,
+                                reuse=(self.path, info.header_offset))
+
+
+def member_data_offset(fp, header_offset: int) -> int:
+    """Return where the data of the member whose local header is at [header_offset] starts."""
+    fp.seek(header_offset)
+    header = struct.unpack(zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader))
+    if header[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"no local header at offset {header_offset} of {getattr(fp, 'name', fp)}")
+    return (header_offset + zipfile.sizeFileHeader + header[zipfile._FH_FILENAME_LENGTH]
+            + header[zipfile._FH_EXTRA_FIELD_LENGTH])
+
+
+# zipfile has no public API to compress a member without a ZipFile, or to read
+# one from a raw handle. member_compressor and open_member are the only places
+# that reach into its internals (with the record layouts used by
+# iter_central_directory and member_data_offset); tests/test_zipfile_compat.py
+# pins the Python versions they are checked on.
+
+def member_compressor(compress_type: int, level: Optional[int] = None):
+    """
+    Return a compressor for [compress_type] (None for stored), the same one
+    ZipFile.write uses, so member data is byte-for-byte what zipfile writes.
+    """
+    return zipfile._get_compressor(compress_type, level)
+
+
+def open_member(fp, info: zipfile.ZipInfo) -> zipfile.ZipExtFile:
+    """
+    Open member [info] of the archive [fp] is a raw handle on, for reading with
+    CRC check, without a ZipFile: the central directory is parsed once and its
+    ZipInfos shared by every thread's handle (see ArchiveHandles).
+    """
+    fp.seek(member_data_offset(fp, info.header_offset))
+    return zipfile.ZipExtFile(fp, "r", info)
+
+
+class ArchiveHandles:
+    """One raw read handle per thread and archive, for open_member from worker threads."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._handles = []
+
+    def get(self, path: Path):
+        handles = self._local.__dict__.setdefault("handles", {})
+        if path not in handles:
+            handles[path] = open(path, "rb")
+            self._handles.append(handles[path])
+        return handles[path]
+
+    def close(self):
+        for fp in self._handles:
+            fp.close()
+
+
+def iter_central_directory(zip_path: Path) -> Iterator[zipfile.ZipInfo]:
+    """
+    Yield a ZipInfo per central directory record of [zip_path] (filename, date_time,
+    flag_bits, CRC, compress_type, sizes and header_offset set), reading the directory in a
+    stream: unlike zipfile.ZipFile, nothing is kept per member.
+    """
+    with open(zip_path, "rb") as fp:
+        endrec = zipfile._EndRecData(fp)
+        if not endrec:
+            raise zipfile.BadZipFile(f"{zip_path} is not a ZIP file")
+        size_cd, offset_cd = endrec[zipfile._ECD_SIZE], endrec[zipfile._ECD_OFFSET]
+        concat = endrec[zipfile._ECD_LOCATION] - size_cd - offset_cd  # bytes prepended to the archive
+        if endrec[zipfile._ECD_SIGNATURE] == zipfile.stringEndArchive64:
+            concat -= zipfile.sizeEndCentDir64 + zipfile.sizeEndCentDir64Locator
+        fp.seek(offset_cd + concat)
+        remaining = size_cd
+        while remaining >= zipfile.sizeCentralDir:
+            centdir = struct.unpack(zipfile.structCentralDir, fp.read(zipfile.sizeCentralDir))
+            if centdir[zipfile._CD_SIGNATURE] != zipfile.stringCentralDir:
+                raise zipfile.BadZipFile(f"bad central directory record in {zip_path}")
+            name_length, extra_length, comment_length = (centdir[zipfile._CD_FILENAME_LENGTH],
+                                                         centdir[zipfile._CD_EXTRA_FIELD_LENGTH],
+                                                         centdir[zipfile._CD_COMMENT_LENGTH])
+            filename = fp.read(name_length)
+            extra = fp.read(extra_length)
+            fp.read(comment_length)
+            remaining -= zipfile.sizeCentralDir + name_length + extra_length + comment_length
+
+            flags = centdir[zipfile._CD_FLAG_BITS]
+            info = zipfile.ZipInfo(filename.decode("utf-8" if flags & 0x800 else "cp437"))
+            info.flag_bits = flags
+            dosdate, dostime = centdir[zipfile._CD_DATE], centdir[zipfile._CD_TIME]
+            info.date_time = ((dosdate >> 9) + 1980, (dosdate >> 5) & 0xF, dosdate & 0x1F,
+                              dostime >> 11, (dostime >> 5) & 0x3F, (dostime & 0x1F) * 2)
+            info.compress_type = centdir[zipfile._CD_COMPRESS_TYPE]
+            info.CRC = centdir[zipfile._CD_CRC]
+            sizes = [centdir[zipfile._CD_UNCOMPRESSED_SIZE], centdir[zipfile._CD_COMPRESSED_SIZE],
+                     centdir[zipfile._CD_LOCAL_HEADER_OFFSET]]
+            while len(extra) >= 4:  # ZIP64 extra field: the 0xFFFFFFFF values, in this order
+                tag, length = struct.unpack("<HH", extra[:4])
+                if tag == 1:
+                    values = iter(struct.unpack(f"<{length // 8}Q", extra[4:4 + length // 8 * 8]))
+                    sizes = [next(values) if value == 0xFFFFFFFF else value for value in sizes]
+                    break
+                extra = extra[4 + length:]
+            info.file_size, info.compress_size, header_offset = sizes
+            info.header_offset = header_offset + concat
+            yield info
+
+
+def copy_file_data(src, dst, count: int) -> int:
+    """
+    Copy up to [count] bytes from the current position of [src] to [dst] and
+    return how many were copied (fewer only if src ends first).
+
+    Between two regular files the data is moved by the kernel (os.copy_file_range,
+    else os.sendfile) without passing through Python. Otherwise, or where the
+    kernel refuses (different filesystems, Windows), it is copied in CHUNK_SIZE
+    blocks. An in-memory spooled file is read as is, never forced to disk.
+    """
+    copied = 0
+    try:
+        if isinstance(src, tempfile.SpooledTemporaryFile):
+            raise io.UnsupportedOperation("in-memory spool")
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        dst.flush()
+        src_pos, dst_pos = src.tell(), dst.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        src_fd = None
+
+    if src_fd is not None:
+        for kernel_copy in _KERNEL_COPIES:
+            try:
+                while copied < count:
+                    n = kernel_copy(src_fd, dst_fd, src_pos + copied, dst_pos + copied, count - copied)
+                    if not n:
+                        count = copied  # src ended early
+                        break
+                    copied += n
+            except OSError:
+                if copied:
+                    raise
+                continue
+            break
+        src.seek(src_pos + copied)
+        dst.seek(dst_pos + copied)
+
+    while copied < count:
+        block = src.read(min(CHUNK_SIZE, count - copied))
+        if not block:
+            break
+        dst.write(block)
+        copied += len(block)
+    return copied
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, src_pos: int, dst_pos: int, count: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, min(count, 1 << 30), src_pos, dst_pos)
+
+
+def _sendfile(src_fd: int, dst_fd: int, src_pos: int, dst_pos: int, count: int) -> int:
+    os.lseek(dst_fd, dst_pos, os.SEEK_SET)
+    return os.sendfile(dst_fd, src_fd, src_pos, min(count, 1 << 30))
+
+
+_KERNEL_COPIES = tuple(func for func, name in ((_copy_file_range, "copy_file_range"), (_sendfile, "sendfile"))
+                       if hasattr(os, name) and sys.platform.startswith("linux"))
+
+
+class ZipWriter:
+    """
+    Minimal ZIP writer used for every archive zipcli creates.
+
+    Unlike zipfile.ZipFile it keeps no ZipInfo per member: each central directory
+    record is appended to a temporary file as soon as its member is written, so
+    memory use stays flat no matter how many files are archived. It writes to a
+    path or to any binary file object, including unseekable ones (stdout, pipes).
+    The records it writes are the same ones zipfile writes, so the result is a
+    standard ZIP that zipfile, unzip and Explorer read normally.
+
+    With [truncate_at], an existing ZIP is cut back to that offset and appended
+    to; restore_record() then re-adds the central records of the members kept.
+    """
+
+    def __init__(self, target, truncate_at: Optional[int] = None):
+        if truncate_at is not None:
+            self.fp = open(target, "r+b")
+            self.fp.truncate(truncate_at)
+            self.fp.seek(truncate_at)
+            self._owns_fp = True
+        elif isinstance(target, (str, os.PathLike)):
+            self.fp = open(target, "wb")
+            self._owns_fp = True
+        else:
+            self.fp = target
+            self._owns_fp = False
+        try:
+            self.seekable = self.fp.seekable()
+            self.offset = self.fp.tell() if self.seekable else 0
+        except (AttributeError, OSError):
+            self.seekable = False
+            self.offset = 0
+        self.count = 0
+        self.last_record = b""
+        self._central = tempfile.TemporaryFile()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write(self, data: bytes):
+        self.fp.write(data)
+        self.offset += len(data)
+
+    def add_compressed(self, zinfo: zipfile.ZipInfo, member: CompressedMember):
+        """
+        Append an already-compressed member. The CRC and sizes are known up front,
+        so the local header is written once and never revisited.
+        """
+        zinfo.compress_type = member.compress_type
+        zinfo.CRC = member.crc
+        zinfo.file_size = member.file_size
+        zinfo.compress_size = member.compress_size
+        zinfo.flag_bits = 0x02 if zinfo.compress_type == zipfile.ZIP_LZMA else 0x00  # LZMA: EOS marker
+        # Same rule as ZipFile.write (and write_stream), so both paths give the same bytes
+        zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+
+        zinfo.header_offset = self.offset
+        self._write(zinfo.FileHeader(zip64))
+        if member.source:
+            path, size, mtime_ns = member.source
+            with open(path, "rb") as src:
+                copied = copy_file_data(src, self.fp, size)
+                st = os.fstat(src.fileno())
+            self.offset += copied
+            if copied != size or (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                # Changed after its CRC was taken: rewrite the member in a single pass
+                self.fp.seek(zinfo.header_offset)
+                self.fp.truncate()
+                self.offset = zinfo.header_offset
+                zinfo.file_size = st.st_size
+                self.write_stream(zinfo, read_blocks(path))
+                return
+        elif member.reuse:
+            archive, header_offset = member.reuse
+            with open(archive, "rb") as src:
+                src.seek(member_data_offset(src, header_offset))
+                copied = copy_file_data(src, self.fp, member.compress_size)
+            self.offset += copied
+            if copied != member.compress_size:
+                raise zipfile.BadZipFile(f"{archive} ended inside {zinfo.filename}")
+        else:
+            with member.data:
+                self.offset += copy_file_data(member.data, self.fp, member.compress_size)
+        self._add_central_record(zinfo)
+
+    def write_stream(self, zinfo: zipfile.ZipInfo, blocks: Iterable[bytes],
+                     policy: Optional[CompressionPolicy] = None):
+        """
+        Compress blocks straight into the archive without buffering the member.
+        zinfo.file_size must hold the expected size (it decides ZIP64). On an
+        unseekable output the data is followed by a data descriptor; otherwise the
+        local header is patched in place afterwards.
+        """
+        blocks = iter(blocks)
+        first = next(blocks, b"")
+        level = None
+        if policy:
+            zinfo.compress_type, level = policy.choose(zinfo.filename, first)
+        compressor = member_compressor(zinfo.compress_type, level)
+        zinfo.flag_bits = 0x02 if zinfo.compress_type == zipfile.ZIP_LZMA else 0x00
+        if not self.seekable:
+            zinfo.flag_bits |= 0x08  # sizes and CRC follow the data
+        zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+        zinfo.CRC = zinfo.compress_size = 0
+
+        zinfo.header_offset = self.offset
+        self._write(zinfo.FileHeader(zip64))
+        crc = file_size = compress_size = 0
+        for block in itertools.chain([first], blocks):
+            file_size += len(block)
+            crc = zipfile.crc32(block, crc)
+            data = compressor.compress(block) if compressor else block
+            compress_size += len(data)
+            self._write(data)
+        if compressor:
+            data = compressor.flush()
+            compress_size += len(data)
+            self._write(data)
+        zinfo.CRC, zinfo.file_size, zinfo.compress_size = crc, file_size, compress_size
+        if not zip64 and max(file_size, compress_size) > zipfile.ZIP64_LIMIT:
+            raise zipfile.LargeZipFile(f"{zinfo.filename} grew past the ZIP64 limit while being archived")
+
+        if zinfo.flag_bits & 0x08:
+            fmt = "<LLQQ" if zip64 else "<LLLL"
+            self._write(struct.pack(fmt, 0x08074B50, crc, compress_size, file_size))
+        else:
+            self.fp.seek(zinfo.header_offset)
+            self.fp.write(zinfo.FileHeader(zip64))
+            self.fp.seek(self.offset)
+        self._add_central_record(zinfo)
+
+    def _add_central_record(self, zinfo: zipfile.ZipInfo):
+        # Same layout as zipfile.ZipFile._write_end_record
+        dt = zinfo.date_time
+        dosdate = (dt[0] - 1980) << 9 | dt[1] << 5 | dt[2]
+        dostime = dt[3] << 11 | dt[4] << 5 | (dt[5] // 2)
+        extra = []
+        file_size, compress_size, header_offset = zinfo.file_size, zinfo.compress_size, zinfo.header_offset
+        if file_size > zipfile.ZIP64_LIMIT or compress_size > zipfile.ZIP64_LIMIT:
+            extra += [file_size, compress_size]
+            file_size = compress_size = 0xFFFFFFFF
+        if header_offset > zipfile.ZIP64_LIMIT:
+            extra.append(header_offset)
+            header_offset = 0xFFFFFFFF
+        extra_data = zinfo.extra
+        min_version = 0
+        if extra:
+            extra_data = struct.pack("<HH" + "Q" * len(extra), 1, 8 * len(extra), *extra) + extra_data
+            min_version = zipfile.ZIP64_VERSION
+        if zinfo.compress_type == zipfile.ZIP_BZIP2:
+            min_version = max(zipfile.BZIP2_VERSION, min_version)
+        elif zinfo.compress_type == zipfile.ZIP_LZMA:
+            min_version = max(zipfile.LZMA_VERSION, min_version)
+        filename, flag_bits = zinfo._encodeFilenameFlags()
+        record = struct.pack(
+            zipfile.structCentralDir, zipfile.stringCentralDir,
+            max(min_version, zinfo.create_version), zinfo.create_system,
+            max(min_version, zinfo.extract_version), zinfo.reserved, flag_bits,
+            zinfo.compress_type, dostime, dosdate, zinfo.CRC, compress_size, file_size,
+            len(filename), len(extra_data), len(zinfo.comment), 0,
+            zinfo.internal_attr, zinfo.external_attr, header_offset)
+        self.last_record = record + filename + extra_data + zinfo.comment
+        self.restore_record(self.last_record)
+
+    def size_with(self, zinfo: zipfile.ZipInfo, compress_size: int) -> int:
+        """
+        Upper bound on the archive size if a member of [compress_size] bytes were
+        added now and the archive then closed (ZIP64 extras and end records included).
+        """
+        name = len(zinfo.filename.encode("utf-8"))
+        local_header = 30 + name + 20
+        central_record = 46 + name + len(zinfo.extra) + 28
+        end_records = 56 + 20 + 22
+        return self.offset + local_header + compress_size + self._central.tell() + central_record + end_records
+
+    def restore_record(self, record: bytes):
+        """Add the central directory record of a member already in the file (see --resume)."""
+        self._central.write(record)
+        self.count += 1
+
+    def close(self):
+        """Write the central directory and end-of-archive records."""
+        if self._central is None:
+            return
+        central_offset = self.offset
+        self._central.seek(0)
+        for block in iter(lambda: self._central.read(64 * 1024), b""):
+            self._write(block)
+        self._central.close()
+        self._central = None
+        central_size = self.offset - central_offset
+
+        count, size, offset = self.count, central_size, central_offset
+        if count > zipfile.ZIP_FILECOUNT_LIMIT or offset > zipfile.ZIP64_LIMIT or size > zipfile.ZIP64_LIMIT:
+            end64_offset = self.offset
+            self._write(struct.pack(zipfile.structEndArchive64, zipfile.stringEndArchive64,
+                                    44, 45, 45, 0, 0, count, count, size, offset))
+            self._write(struct.pack(zipfile.structEndArchive64Locator, zipfile.stringEndArchive64Locator,
+                                    0, end64_offset, 1))
+            count, size, offset = min(count, 0xFFFF), min(size, 0xFFFFFFFF), min(offset, 0xFFFFFFFF)
+        self._write(struct.pack(zipfile.structEndArchive, zipfile.stringEndArchive,
+                                0, 0, count, count, size, offset, 0))
+        self.fp.flush()
+        if self._owns_fp:
+            self.fp.close()
+
+
+class VolumeWriter:
+    """
+    Write an archive as numbered volumes (<stem>_001.zip, <stem>_002.zip, ...) of
+    at most [max_size] bytes each. Every volume is a complete ZIP of its own, so
+    it can be shipped or checked on its own. A volume is closed, and [on_volume]
+    called with its path, before the next one is started, so finished volumes can
+    be handed off while the rest is written. A member too large for any volume
+    gets one to itself.
+
+    Offers the part of the ZipWriter interface that create_zip_archive uses for
+    members with known sizes (add_compressed).
+    """
+
+    seekable = True
+
+    def __init__(self, zip_path: Path, max_size: int, on_volume: Optional[Callable[[Path], None]] = None):
+        self.zip_path = zip_path
+        self.max_size = max_size
+        self.on_volume = on_volume
+        self.paths: List[Path] = []
+        self.count = 0
+        self._closed_bytes = 0
+        self._writer = None
+        self._next_volume()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def offset(self) -> int:
+        """Bytes written so far, over all volumes."""
+        return self._closed_bytes + (self._writer.offset if self._writer else 0)
+
+    @property
+    def current(self) -> Path:
+        return self.paths[-1]
+
+    def _finish_volume(self):
+        self._writer.close()
+        self._closed_bytes += self._writer.offset
+        self._writer = None
+        print(f"[✓] Volume written: {self.current.name}")
+        if self.on_volume:
+            self.on_volume(self.current)
+
+    def _next_volume(self):
+        if self._writer:
+            self._finish_volume()
+        self.paths.append(volume_path(self.zip_path, len(self.paths) + 1))
+        self._writer = ZipWriter(self.current)
+
+    def add_compressed(self, zinfo: zipfile.ZipInfo, member: CompressedMember):
+        if self._writer.size_with(zinfo, member.compress_size) > self.max_size:
+            if self._writer.count:
+                self._next_volume()
+            if self._writer.size_with(zinfo, member.compress_size) > self.max_size:
+                print(f"[WARN] {zinfo.filename} is larger than the volume size; it gets a volume of its own")
+        self._writer.add_compressed(zinfo, member)
+        self.count += 1
+
+    def close(self):
+        if self._writer:
+            self._finish_volume()
+
+
+def iter_journal(journal_path: Path) -> Iterator[dict]:
+    """Yield the members recorded in a checkpoint journal, stopping at a torn last line."""
+    with open(journal_path, encoding="utf-8") as f:
+        next(f, None)  # header
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+
+def find_checkpoint(source_dir: Path, backup_location: Path) -> Optional[Path]:
+    """Return the journal of the newest interrupted archive of source_dir, or None."""
+    candidates = []
+    for journal_path in backup_location.glob(f"{source_dir.name}_*{JOURNAL_SUFFIX}"):
+        try:
+            with open(journal_path, encoding="utf-8") as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            continue
+        zip_path = journal_path.with_name(journal_path.name[:-len(JOURNAL_SUFFIX)] + ".zip")
+        if header.get("source") == str(source_dir) and zip_path.exists():
+            candidates.append((journal_path.stat().st_mtime, journal_path))
+    return max(candidates)[1] if candidates else None
+
+
+class CheckpointJournal:
+    """
+    Journal of the members already committed to a ZIP that is being written, so
+    an interrupted run can be continued with --resume.
+
+    Each line holds a member's path, the offset where its data ends, its central
+    directory record and its inventory fields. Lines are held back until the ZIP
+    itself has been fsynced (every [interval] seconds or CHECKPOINT_PENDING
+    members), so a journaled member is always fully on disk, even after a power
+    loss. The journal is deleted once the archive is complete.
+    """
+
+    def __init__(self, path: Path, interval: float = CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._pending = []
+        self._last = time.monotonic()
+        self._file = None
+
+    def start(self, header: dict):
+        """Begin a new journal."""
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(json.dumps(header) + "\n")
+        self._sync()
+
+    def resume(self, zip_size: int) -> tuple:
+        """
+        Keep the entries whose member lies entirely within the first [zip_size]
+        bytes of the ZIP and drop the rest, then reopen the journal for appending.
+
+        Returns:
+            tuple: (offset just past the last good member, number of good members).
+        """
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        end = count = 0
+        with open(self.path, encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+            dst.write(src.readline())
+            for entry in iter_journal(self.path):
+                if entry["end"] > zip_size:
+                    break
+                dst.write(json.dumps(entry) + "\n")
+                end, count = entry["end"], count + 1
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return end, count
+
+    def add(self, writer: "ZipWriter", zinfo: zipfile.ZipInfo, mtime: float, seconds: float):
+        """Record the member just written by [writer]; checkpoint when one is due."""
+        self._pending.append(json.dumps({
+            "path": zinfo.filename,
+            "end": writer.offset,
+            "size": zinfo.file_size,
+            "compressed_size": zinfo.compress_size,
+            "crc": zinfo.CRC,
+            "method": METHOD_NAMES[zinfo.compress_type],
+            "mtime": mtime,
+            "seconds": round(seconds, 6),
+            "central": base64.b64encode(writer.last_record).decode("ascii"),
+        }) + "\n")
+        if len(self._pending) >= CHECKPOINT_PENDING or time.monotonic() - self._last >= self.interval:
+            self.checkpoint(writer)
+
+    def checkpoint(self, writer: "ZipWriter"):
+        """fsync the ZIP, then append the pending entries to the journal and fsync it."""
+        if not self._pending:
+            return
+        writer.fp.flush()
+        os.fsync(writer.fp.fileno())
+        self._file.writelines(self._pending)
+        self._pending.clear()
+        self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last = time.monotonic()
+
+    def discard(self):
+        """The archive is complete: remove the journal."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def read_blocks(file_path) -> Iterator[memoryview]:
+    with open(file_path, "rb") as f:
+        yield from iter_blocks(f)
+
+
+def ordered_map(func: Callable, items: Iterable, workers: int = 1,
+                pool: Optional[ThreadPoolExecutor] = None) -> Iterator:
+    """
+    Like map(), but runs func on up to [workers] threads and still yields results
+    in input order. At most 2 * workers results are in flight, which bounds memory.
+    With [pool], tasks run on that shared executor (see run_batch) instead of a
+    new one, and [workers] only sizes the in-flight window.
+    """
+    if workers <= 1 and pool is None:
+        yield from map(func, items)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    with contextlib.nullcontext(pool) if pool else ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class RunStats:
+    """
+    Counters and per-phase timers for one create_zip_archive run (--stats).
+
+    Pass an instance as create_zip_archive(stats=...) to collect them from code.
+    walk, filter, write and retention are wall-clock seconds on the main thread;
+    read and compress are summed over the worker threads, so with --workers > 1
+    they can add up to more than the total. Members streamed inline to an
+    unseekable output are counted under compress, reads included.
+
+    Args:
+        slowest (int): How many of the slowest files to keep.
+    """
+
+    def __init__(self, slowest: int = 10):
+        self.files_scanned = 0
+        self.files_matched = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.total_seconds = 0.0
+        self.skipped = False  # the source was unchanged and no archive was built (--unchanged)
+        self.phases = dict.fromkeys(STATS_PHASES, 0.0)
+        self.slowest_count = slowest
+        self._slowest = []  # min-heap of (seconds, path, size)
+
+    def add_time(self, phase: str, seconds: float):
+        self.phases[phase] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def timed(self, phase: str, items: Iterable) -> Iterator:
+        """Yield from items, adding the time spent producing each one to [phase]."""
+        it = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add_time(phase, time.perf_counter() - start)
+                return
+            self.add_time(phase, time.perf_counter() - start)
+            yield item
+
+    def add_file(self, path: str, size: int, seconds: float):
+        self.bytes_read += size
+        entry = (seconds, path, size)
+        if len(self._slowest) < self.slowest_count:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest(self) -> List[tuple]:
+        """(seconds, path, size) of the slowest files, slowest first."""
+        return sorted(self._slowest, reverse=True)
+
+    @property
+    def throughput(self) -> float:
+        """Bytes read per second of total run time."""
+        return self.bytes_read / self.total_seconds if self.total_seconds else 0.0
+
+    @property
+    def ratio(self) -> float:
+        """Archive size divided by the bytes read (lower is better)."""
+        return self.bytes_written / self.bytes_read if self.bytes_read else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "files_scanned": self.files_scanned,
+            "files_matched": self.files_matched,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "total_seconds": round(self.total_seconds, 6),
+            "mb_per_second": round(self.throughput / 1e6, 3),
+            "compression_ratio": round(self.ratio, 4),
+            "skipped": self.skipped,
+            "phases": {phase: round(seconds, 6) for phase, seconds in self.phases.items()},
+            "slowest": [{"path": path, "size": size, "seconds": round(seconds, 6)}
+                        for seconds, path, size in self.slowest],
+        }
+
+    def report(self) -> List[str]:
+        """Human-readable summary lines, printed at the end of a --stats run."""
+        lines = [
+            f"[INFO] Stats: {self.files_scanned} scanned, {self.files_matched} matched, "
+            f"{self.bytes_read / 1e6:.1f} MB read, {self.bytes_written / 1e6:.1f} MB written "
+            f"(ratio {self.ratio:.2f}) in {self.total_seconds:.2f}s, {self.throughput / 1e6:.1f} MB/s",
+            "[INFO]   " + "  ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases.items()),
+        ]
+        for seconds, path, size in self.slowest:
+            lines.append(f"[INFO]   slow: {path} ({seconds:.3f}s, {size / 1e6:.1f} MB)")
+        return lines
+
+    def to_prometheus(self, source: str) -> str:
+        """Render the run as node exporter textfile collector metrics, labelled with [source]."""
+        label = 'source="{}"'.format(source.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        metrics = [
+            ("files_scanned", "Files seen by the walk.", self.files_scanned),
+            ("files_matched", "Files that passed the filters.", self.files_matched),
+            ("bytes_read", "Bytes read from the source folder.", self.bytes_read),
+            ("bytes_written", "Size of the archive written.", self.bytes_written),
+            ("duration_seconds", "Wall-clock time of the run.", round(self.total_seconds, 6)),
+            ("compression_ratio", "Archive size divided by bytes read.", round(self.ratio, 4)),
+            ("skipped", "1 if the source was unchanged and no archive was built.", int(self.skipped)),
+            ("last_run_timestamp_seconds", "When the run finished.", int(time.time())),
+        ]
+        lines = []
+        for name, help_text, value in metrics:
+            lines += [f"# HELP zipcli_{name} {help_text}", f"# TYPE zipcli_{name} gauge",
+                      f"zipcli_{name}{{{label}}} {value}"]
+        lines += ["# HELP zipcli_phase_seconds Time spent per pipeline phase.",
+                  "# TYPE zipcli_phase_seconds gauge"]
+        lines += [f'zipcli_phase_seconds{{{label},phase="{phase}"}} {round(seconds, 6)}'
+                  for phase, seconds in self.phases.items()]
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: Path, stats_format: str, source: str):
+        """Write the stats as JSON or Prometheus text, atomically so a collector never reads half a file."""
+        text = self.to_prometheus(source) if stats_format == "prom" else json.dumps(self.as_dict(), indent=2)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def plan_incremental(source_dir: Path, files: Iterable[FileEntry], zip_name: str, previous,
+                     content_hash: bool, manifest: ManifestWriter,
+                     hash_cache: Optional[HashCache] = None) -> Iterator[FileEntry]:
+    """
+    Compare the walked files with the previous manifest, streaming.
+
+    Every file is recorded in [manifest]; only new or changed files are yielded.
+    Once the generator is exhausted, manifest.header holds the base archive, the
+    referenced archives and the deleted paths.
+
+    Args:
+        previous: (zip_path, header) from load_previous_manifest, or None.
+        content_hash (bool): Record SHA-256 per file; a file whose size/mtime changed
+            but whose content did not is then not archived again.
+        hash_cache (HashCache): Where digests are looked up before a file is read.
+    """
+    prev_entries = iter_manifest(sidecar_path(previous[0], MANIFEST_SUFFIX)) if previous else ()
+    deleted = []
+    references = {zip_name}
+    manifest.header.update({
+        "format": 1,
+        "source": source_dir.name,
+        "archive": zip_name,
+        "base": previous[0].name if previous else None,
+    })
+    for file_entry, prev in merge_with_previous(files, prev_entries, deleted):
+        st = file_entry.stat
+        entry = {"path": file_entry.relpath, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+            entry["archive"] = prev["archive"]
+            if "sha256" in prev:
+                entry["sha256"] = prev["sha256"]
+                if hash_cache:
+                    hash_cache.put(st, sha256=prev["sha256"])  # so a later rename is not read again
+        elif content_hash:
+            digest = hash_cache.sha256(st) if hash_cache else None
+            if digest is None:
+                digest = file_digest(file_entry.path)
+                if hash_cache:
+                    hash_cache.put(st, sha256=digest)
+            entry["sha256"] = digest
+            if prev and prev.get("sha256") == entry["sha256"]:
+                entry["archive"] = prev["archive"]
+        if "archive" not in entry:
+            entry["archive"] = zip_name
+            yield file_entry
+        references.add(entry["archive"])
+        manifest.add(entry)
 
+    manifest.header["references"] = sorted(references)
+    manifest.header["deleted"] = deleted
 
-def should_include(file_path: Path, includes: List[str], excludes: List[str]) -> bool:
-    name = file_path.name
-    if includes and not any(fnmatch.fnmatch(name, pat) for pat in includes):
-        return False
-    if excludes and any(fnmatch.fnmatch(name, pat) for pat in excludes):
-        return False
-    return True
 
+class ArchiveOptions(NamedTuple):
+    """
+    How create_zip_archive builds, checks and retains an archive. Every field
+    defaults to the CLI default, so callers only name what they change.
 
-def collect_files(base_dir: Path, includes: List[str], excludes: List[str]) -> List[Path]:
-    return [
-        f for f in base_dir.rglob("*")
-        if f.is_file() and should_include(f.relative_to(base_dir), includes, excludes)
-    ]
+    Members are compressed on [workers] threads and written in collection order,
+    so the archive bytes do not depend on the worker count. With [incremental],
+    only files that are new or changed since the previous manifest are archived
+    and a new manifest (<zip stem>_manifest.jsonl) records the full tree state.
 
+    [output] overrides the destination: a file path (which may be a named pipe),
+    "-" for stdout, or a writable binary file object. Unseekable outputs are
+    streamed as the archive is built; members larger than SPOOL_MAX_SIZE are then
+    compressed directly into the stream with data descriptors, so no scratch space
+    is needed. Streamed archives are not subject to retention. With a single
+    worker, large members are compressed straight into seekable outputs too; with
+    more, they are compressed into temp files that are copied into the archive by
+    the kernel. Large stored members of seekable outputs are always copied from
+    the source file itself, by the kernel where it can.
 
-def parse_timestamp_from_name(filename: str, prefix: str, date_format: str) -> Optional[datetime]:
+    [keep_daily]/[keep_weekly]/[keep_monthly] add grandfather-father-son retention
+    on top of [keep] (see enforce_zip_retention).
+
+    [policy] picks the compression method per file (default: deflate, storing
+    already-compressed files); the choice is recorded in the inventory.
+
+    [inventory_format] is txt, csv or jsonl (see InventoryWriter); the inventory
+    is saved as <zip stem>_inventory.<format>.
+
+    [stats] collects per-phase timings and counters (see RunStats). With
+    [stats_format] "json" they are saved as <zip stem>_stats.json; with "prom" as
+    <source>_stats.prom in the node exporter textfile format, replaced on each run
+    so the collector only ever sees the latest values for the source. A run that
+    [unchanged] skips still replaces the prom file, with zipcli_skipped 1; no JSON
+    file is written for it, as there is no new archive to put it next to.
+
+    [walkers] > 1 lists folders on that many threads (see scan_files); the files
+    and their order in the archive do not change.
+
+    [pool] and [io_slots] let several archives share one compression pool and a
+    global limit on concurrent reads (see run_batch).
+
+    Archives written to the backup location keep a checkpoint journal
+    (<zip stem>_journal.jsonl, see CheckpointJournal) until they are complete.
+    With [resume], the newest interrupted archive of source_dir is cut back to its
+    last journaled member and completed instead of starting a new one.
+
+    [prefetch] > 0 opens and reads the first block of that many upcoming files on
+    background threads while earlier ones are compressed (see prefetch_heads),
+    which hides per-file latency on network shares.
+
+    Every archive in the backup location is recorded with a TreeFingerprint of
+    the files it holds. With [unchanged] "skip", "touch" or "link", the tree is
+    walked (without reading any file) before anything is compressed, and if it
+    matches the newest archive no new ZIP is built (see reuse_unchanged_archive).
+
+    [max_volume_size] > 0 splits the archive into self-contained volumes of at most
+    that many bytes (see VolumeWriter), calling [on_volume] with each one as soon
+    as it is complete. The inventory records the volume of every member, and the
+    retention index treats the set as one archive.
+
+    With [verify], the finished archive is read back and checked against its CRCs
+    and inventory (see verify_archive); each volume of a set is checked on a
+    background thread as soon as it is complete, while the next one is written.
+    If any check fails, retention is skipped so no older archive is removed.
+
+    With [update_from], an earlier ZIP, members of unchanged files are copied from
+    it without being decompressed or compressed again (see PreviousArchive); only
+    new and changed files are compressed. The result is still a full archive.
+
+    [hash_cache] > 0 keeps the CRC-32 (and, with [content_hash], SHA-256) of up to
+    that many files in hashes.sqlite under [cache_dir], by default the local
+    per-user cache folder (see HashCache). Every file archived is added to it, and
+    [update_from] and [content_hash] look there before reading a file, so repeat
+    runs over unchanged files only need to stat them.
+
+    With [catalog], the backup location's catalog in [cache_dir] is updated after
+    retention (see Catalog).
     """
-    Attempt to extract a datetime object from the filename using the given prefix and format.
-    Returns None if parsing fails.
+    keep: int = 1
+    workers: int = 1
+    keep_daily: int = 0
+    keep_weekly: int = 0
+    keep_monthly: int = 0
+    incremental: bool = False
+    content_hash: bool = False
+    output: object = None
+    policy: Optional[CompressionPolicy] = None
+    inventory_format: str = "txt"
+    stats: Optional[RunStats] = None
+    stats_format: Optional[str] = None
+    pool: Optional[ThreadPoolExecutor] = None
+    io_slots: Optional[threading.Semaphore] = None
+    resume: bool = False
+    unchanged: str = "archive"
+    prefetch: int = 0
+    max_volume_size: int = 0
+    on_volume: Optional[Callable[[Path], None]] = None
+    verify: bool = False
+    update_from: Optional[Path] = None
+    hash_cache: int = 0
+    walkers: int = 1
+    cache_dir: Optional[Path] = None
+    catalog: bool = False
+
+    def check(self):
+        """Raise ValueError for options that cannot be combined."""
+        if self.resume and (self.output is not None or self.incremental):
+            raise ValueError("--resume cannot be combined with --output or --incremental")
+        if self.incremental and self.output is not None:
+            raise ValueError("--incremental needs the archive to be written to the backup location")
+        if self.unchanged != "archive" and (self.output is not None or self.incremental):
+            raise ValueError("--unchanged needs a full archive written to the backup location")
+        if self.max_volume_size and (self.output is not None or self.incremental or self.resume):
+            raise ValueError("--max-volume-size cannot be combined with --output, --incremental or --resume")
+        if self.update_from and self.incremental:
+            raise ValueError("--update-from cannot be combined with --incremental")
+
+
+def create_zip_archive(
+    source_dir: Path,
+    includes: List[str],
+    excludes: List[str],
+    date_format: str,
+    inventory: bool,
+    backup_location: Path,
+    options: Optional[ArchiveOptions] = None,
+    **overrides
+) -> Optional[Path]:
+    """
+    Create a dated ZIP of source_dir in backup_location and apply --keep retention.
+
+    [options] (see ArchiveOptions) sets how the archive is built, checked and
+    retained; keyword arguments override single fields of it, so
+    create_zip_archive(..., keep=3, workers=4) works without building one.
+
+    Returns the ZIP path (the first volume of a volume set), or None when the
+    archive was streamed to a file object.
+
+    Raises:
+        ValueError: for options that cannot be combined (see ArchiveOptions.check).
     """
+    unknown = set(overrides) - set(ArchiveOptions._fields)
+    if unknown:
+        raise TypeError(f"create_zip_archive() got unexpected keyword arguments: {', '.join(sorted(unknown))}")
+    options = (options or ArchiveOptions())._replace(**overrides)
+    policy = options.policy or DEFAULT_POLICY
+    stats = options.stats
+    if options.stats_format and stats is None:
+        stats = RunStats()
+    update_from = options.update_from
+    run_start = time.perf_counter()
+    timestamp = datetime.now().strftime(date_format)
+    zip_name = f"{source_dir.name}_{timestamp}.zip"
+    options.check()
+
+    resume_from = None
+    if options.resume:
+        resume_from = find_checkpoint(source_dir, backup_location or Path.cwd())
+        if resume_from:
+            zip_name = resume_from.name[:-len(JOURNAL_SUFFIX)] + ".zip"
+        else:
+            print("[INFO] No interrupted archive to resume; starting a new one")
+    if options.output is None:
+        output_path = (backup_location or Path.cwd()) / zip_name
+        target = output_path
+    elif options.output == "-" or hasattr(options.output, "write"):
+        output_path = None
+        target = sys.stdout.buffer if options.output == "-" else options.output
+    else:
+        output_path = Path(options.output)
+        target = output_path  # opened by ZipWriter, after the walk and setup have succeeded
+    local_path = output_path or (backup_location or Path.cwd()) / zip_name
+
+    def walk():
+        files = scan_files(source_dir, includes, excludes, stats, options.walkers)
+        fingerprint = None
+        if options.output is None and not options.incremental:
+            fingerprint = TreeFingerprint(policy)
+            files = fingerprint.track(files)
+        return stats.timed("walk", files) if stats else files, fingerprint
+
+    files_to_zip, fingerprint = walk()
+    if options.unchanged != "archive" and not resume_from:
+        # One walk: the files are compared with the newest archive as they are listed,
+        # and when they differ, archiving carries on from the same walk.
+        previous = next(iter(load_archive_index(source_dir, output_path.parent, date_format)), None)
+        previous_files = [output_path.parent / name for name in archive_files(previous)] if previous else []
+        if previous and previous.get("fingerprint") and all(path.exists() for path in previous_files):
+            files_to_zip, same = match_archive_walk(files_to_zip, previous_files, UNCHANGED_BUFFER)
+            if same and previous["fingerprint"] == fingerprint.hexdigest():
+                print(f"[INFO] {source_dir.name} is unchanged since {previous['name']} ({options.unchanged})")
+                zip_path = reuse_unchanged_archive(source_dir, output_path.parent, date_format, previous,
+                                                   output_path, options.unchanged)
+                if options.unchanged == "link":
+                    enforce_zip_retention(source_dir, output_path.parent, date_format, options.keep,
+                                          options.keep_daily, options.keep_weekly, options.keep_monthly)
+                    if options.catalog:
+                        update_catalog(source_dir, output_path.parent, options.cache_dir)
+                if stats:
+                    stats.skipped = True
+                    stats.total_seconds = time.perf_counter() - run_start
+                if options.stats_format == "prom":
+                    stats_path = output_path.parent / f"{source_dir.name}_stats.prom"
+                    stats.save(stats_path, "prom", source_dir.name)
+                    print(f"[✓] Stats saved to: {stats_path}")
+                return zip_path
+            if files_to_zip is None:  # a long matching prefix was not kept in memory
+                if stats:
+                    stats.files_scanned = stats.files_matched = 0
+                files_to_zip, fingerprint = walk()
+
+    hashes = HashCache(hash_cache_path(options.cache_dir), options.hash_cache) if options.hash_cache else None
+
+    previous_archive = None
+    if update_from:
+        update_from = Path(update_from).resolve()
+        if output_path is not None and update_from.parent == output_path.resolve().parent and output_path.stem in (
+                update_from.stem, update_from.stem.rpartition("_")[0]):
+            print(f"[WARN] {output_path.name} would overwrite {update_from.name}; compressing every file")
+        else:
+            try:
+                previous_archive = PreviousArchive(update_from, policy, hashes)
+            except BaseException:
+                if hashes:
+                    hashes.close()
+                raise
+
+    if options.incremental:
+        previous = load_previous_manifest(source_dir, output_path.parent, date_format)
+        if previous and previous[0].name == zip_name:
+            print(f"[WARN] {zip_name} would overwrite its own base archive; writing a full archive")
+            previous = None
+        manifest = ManifestWriter(sidecar_path(output_path, MANIFEST_SUFFIX), {})
+        files_to_zip = plan_incremental(source_dir, files_to_zip, zip_name, previous, options.content_hash,
+                                        manifest, hashes)
+
+    journal = None
+    truncate_at = None
+    if options.output is None and not options.incremental and not options.max_volume_size:
+        journal = CheckpointJournal(sidecar_path(output_path, JOURNAL_SUFFIX))
+        if resume_from:
+            truncate_at, committed = journal.resume(output_path.stat().st_size)
+            print(f"[INFO] Resuming {zip_name}: {committed} members already archived")
+            done = itertools.islice(iter_journal(journal.path), committed)
+            files_to_zip = (f for f, prev in merge_with_previous(files_to_zip, done, []) if prev is None)
+        else:
+            journal.start({"format": 1, "source": str(source_dir), "archive": zip_name})
+
+    # Everything below streams: files are walked, compressed, written and listed
+    # in the inventory one at a time, so memory does not grow with the file count.
+    inventory_path = sidecar_path(local_path, inventory_suffix(options.inventory_format))
+    inventory_file = None
+    if inventory:
+        inventory_file = InventoryWriter(inventory_path, options.inventory_format, bool(options.max_volume_size))
+    verifier = None
+    verifications = []
+    if options.verify and output_path is not None:
+        from concurrent.futures import ThreadPoolExecutor
+        verifier = ThreadPoolExecutor(max_workers=1)
+
+    def volume_done(path: Path):
+        if verifier:
+            if inventory_file:
+                inventory_file.flush()
+            verifications.append(verifier.submit(verify_archive, path, options.workers, options.pool))
+        if options.on_volume:
+            options.on_volume(path)
+
     try:
-        stem = Path(filename).stem
-        if not stem.startswith(prefix + "_"):
-            return None
-        date_part = stem[len(prefix) + 1:]
-        return datetime.strptime(date_part, date_format)
-    except Exception:
-        return None
+        if options.max_volume_size:
+            writer = VolumeWriter(output_path, options.max_volume_size, volume_done)
+        else:
+            writer = ZipWriter(target, truncate_at)
+        with writer:
+            if truncate_at is not None:
+                for entry in itertools.islice(iter_journal(journal.path), committed):
+                    writer.restore_record(base64.b64decode(entry["central"]))
+                    if inventory:
+                        inventory_file.add(entry["path"], entry["size"], entry["compressed_size"], entry["crc"],
+                                           entry["mtime"], entry["method"], entry["seconds"])
+
+            sequential = options.workers <= 1 and options.pool is None and not options.max_volume_size
+
+            def streamed_inline(entry: FileEntry) -> bool:
+                # Large members go straight into the archive, without a temp file, when
+                # nothing is compressed in parallel, and always on unseekable outputs.
+                # Volumes need each compressed size up front to pick the volume.
+                return entry.stat.st_size > SPOOL_MAX_SIZE and (sequential or not writer.seekable)
+
+            def compress(item):
+                entry, head = item
+                if previous_archive:
+                    member = previous_archive.reuse(entry, options.io_slots, head)
+                    if member:
+                        return entry, member
+                if streamed_inline(entry):
+                    if writer.seekable:
+                        # A member that ends up stored is copied from the source file by the kernel instead
+                        head = head or read_head(entry.path, options.io_slots)
+                        if policy.choose(os.path.basename(entry.path), head.data)[0] == zipfile.ZIP_STORED:
+                            return entry, compress_member(entry.path, policy=policy, io_slots=options.io_slots,
+                                                          head=head, copy_stored=True)
+                    return entry, None  # compressed inline by ZipWriter.write_stream
+                return entry, compress_member(entry.path, policy=policy, io_slots=options.io_slots, head=head,
+                                              copy_stored=writer.seekable)
+
+            if options.prefetch:
+                items = prefetch_heads(files_to_zip, options.prefetch, options.io_slots, skip=streamed_inline)
+            else:
+                items = ((entry, None) for entry in files_to_zip)
+
+            try:
+                for file_entry, member in ordered_map(compress, items, options.workers, options.pool):
+                    arcname = file_entry.relpath
+                    zinfo = build_zipinfo(arcname, file_entry.stat, zipfile.ZIP_DEFLATED)
+                    if member is None:
+                        start = time.perf_counter()
+                        writer.write_stream(zinfo, read_blocks(file_entry.path), policy)
+                        seconds = time.perf_counter() - start
+                        if stats:
+                            stats.add_time("compress", seconds)
+                    else:
+                        start = time.perf_counter()
+                        writer.add_compressed(zinfo, member)
+                        seconds = member.seconds
+                        if member.reuse:
+                            previous_archive.reused += 1
+                        if stats:
+                            stats.add_time("write", time.perf_counter() - start)
+                            stats.add_time("read", member.read_seconds)
+                            stats.add_time("compress", member.seconds - member.read_seconds)
+                    if journal:
+                        journal.add(writer, zinfo, file_entry.stat.st_mtime, seconds)
+                    if hashes and zinfo.file_size == file_entry.stat.st_size:
+                        hashes.put(file_entry.stat, crc32=zinfo.CRC)
+                    if stats:
+                        stats.add_file(arcname, zinfo.file_size, seconds)
+                    if inventory:
+                        inventory_file.add_member(zinfo, file_entry.stat.st_mtime, seconds,
+                                                  writer.current.name if options.max_volume_size else None)
+                        print(f"  [✓] {arcname} ({METHOD_NAMES[zinfo.compress_type]})")
+            except BaseException:
+                if journal:
+                    with contextlib.suppress(OSError):
+                        journal.checkpoint(writer)  # keep everything written so far for --resume
+                raise
+            member_count = writer.count
+        if journal:
+            journal.discard()
+        if stats:
+            stats.bytes_written = writer.offset
+            # The walk timer also ran while filtering (which, with walkers, is summed over threads)
+            stats.phases["walk"] = max(0.0, stats.phases["walk"] - stats.phases["filter"])
+    except BaseException:
+        if verifier:
+            verifier.shutdown(wait=False)
+        raise
+    finally:
+        if hashes:
+            hashes.close()
+        if journal:
+            journal.close()
+        if inventory_file:
+            inventory_file.close()
+
+    if previous_archive:
+        print(f"[INFO] Copied {previous_archive.reused} of {member_count} members from {previous_archive.path.name}")
+
+    sidecars = []
+    if inventory:
+        sidecars.append(inventory_path)
+        print(f"[✓] Inventory report saved to: {inventory_path}")
+
+    if options.incremental:
+        manifest.close()
+        sidecars.append(manifest.path)
+        print(f"[INFO] Incremental: {member_count} new/changed, {len(manifest.header['deleted'])} deleted "
+              f"since {manifest.header['base'] or 'nothing (full archive)'}")
+
+    if options.stats_format == "json":
+        stats_path = sidecar_path(local_path, "_stats.json")
+        sidecars.append(stats_path)
+    elif options.stats_format == "prom":
+        stats_path = local_path.parent / f"{source_dir.name}_stats.prom"
 
+    verified = True
+    if verifier:
+        if output_path.is_file() and not options.max_volume_size:
+            verifications.append(verifier.submit(verify_archive, output_path, options.workers, options.pool))
+        elif not options.max_volume_size:
+            print(f"[WARN] {output_path} is not a regular file; skipping --verify")
+        verified = all([report_verification(future.result()) for future in verifications])
+        verifier.shutdown()
+    elif options.verify:
+        print("[WARN] A streamed archive cannot be read back; skipping --verify")
 
-def enforce_zip_retention(source_dir: Path, backup_location: Path, date_format: str, keep: int):
+    if options.output is None:
+        references = manifest.header["references"] if options.incremental else ()
+        with stats.timer("retention") if stats else contextlib.nullcontext():
+            record_archive(source_dir, output_path.parent, date_format, output_path, sidecars, references,
+                           fingerprint.hexdigest() if fingerprint else None,
+                           writer.paths if options.max_volume_size else ())
+            if verified:
+                enforce_zip_retention(source_dir, output_path.parent, date_format, options.keep,
+                                      options.keep_daily, options.keep_weekly, options.keep_monthly)
+            else:
+                print("[FAIL] Verification failed; older archives are kept")
+        if options.catalog:
+            update_catalog(source_dir, output_path.parent, options.cache_dir)
+
+    if stats:
+        stats.total_seconds = time.perf_counter() - run_start
+    if options.stats_format:
+        stats.save(stats_path, options.stats_format, source_dir.name)
+        print(f"[✓] Stats saved to: {stats_path}")
+    return writer.paths[0] if options.max_volume_size else output_path
+
+
+def volume_set(zip_path: Path) -> List[Path]:
+    """
+    Return the files of an archive: all volumes of a volume set when zip_path is
+    the set's name (<stem>.zip) or one of its volumes, else [zip_path].
     """
-    Retain only the most recent [keep] ZIP files and their inventories in backup_location.
+    stem, _, number = zip_path.stem.rpartition("_")
+    names = [] if zip_path.exists() else [zip_path]
+    if len(number) == VOLUME_DIGITS and number.isdigit():
+        names.append(zip_path.with_name(stem + zip_path.suffix))
+    for name in names:
+        volumes = list(itertools.takewhile(Path.exists, (volume_path(name, n) for n in itertools.count(1))))
+        if volumes:
+            return volumes
+    return [zip_path]
 
-    Args:
-        source_dir (Path): The folder being zipped (used to match filename prefix).
-        backup_location (Path): Where to search for old ZIPs.
-        date_format (str): Format of the timestamp in the ZIP filename.
-        keep (int): Number of ZIPs to retain.
+
+def member_filter(includes: List[str], excludes: List[str]) -> Callable[[str], bool]:
     """
-    zip_prefix = source_dir.name
-    all_zips = list(backup_location.glob(f"{zip_prefix}_*.zip"))
+    Return a predicate on member paths that selects what a walk with the same
+    --filter/--exclude patterns would archive (see scan_files): the file passes the
+    filter and none of the folders above it is pruned by an exclude pattern.
+    """
+    file_filter = compile_filter(tuple(includes), tuple(excludes))
 
-    def zip_sort_key(p: Path):
-        ts = parse_timestamp_from_name(p.name, zip_prefix, date_format)
-        return ts if ts else datetime.fromtimestamp(p.stat().st_ctime)
+    @functools.lru_cache(maxsize=4096)
+    def pruned(folder: str) -> bool:
+        parent, _, name = folder.rpartition("/")
+        return bool(parent) and pruned(parent) or file_filter.prune_dir(name, folder)
+
+    def selected(path: str) -> bool:
+        folder, _, name = path.rpartition("/")
+        return not (folder and pruned(folder)) and file_filter.included(name, path)
+
+    return selected
+
+
+def member_target(target_dir: Path, name: str) -> Optional[Path]:
+    """Where member [name] is restored under target_dir, or None for absolute or '..' paths."""
+    parts = name.replace("\\", "/").split("/")
+    if name.startswith("/") or ".." in parts or ":" in parts[0]:
+        return None
+    return target_dir.joinpath(*[part for part in parts if part not in ("", ".")])
+
+
+def preallocate(f, size: int):
+    """Reserve [size] bytes for a file about to be written, where the OS supports it."""
+    if size > 0 and hasattr(os, "posix_fallocate"):
+        with contextlib.suppress(OSError):
+            os.posix_fallocate(f.fileno(), 0, size)
 
-    sorted_zips = sorted(all_zips, key=zip_sort_key, reverse=True)
-    to_delete = sorted_zips[keep:]
 
-    for zip_path in to_delete:
+def restore_archive(zip_path: Path, target_dir: Path, includes: List[str] = (), excludes: List[str] = (),
+                    workers: int = 1) -> Optional[int]:
+    """
+    Restore the tree captured by zip_path into target_dir.
+
+    If the ZIP has a manifest (--incremental), every file listed in it is read from
+    the archive in the chain that holds its latest content, so deleted files are not
+    restored. Otherwise the ZIP (or every volume of a volume set) is extracted as is.
+
+    Only members that [includes]/[excludes] select are restored, with the same
+    matching as when archiving (see member_filter). Only the central directories
+    and the selected members are read, each central directory once. Members are
+    decompressed on [workers] threads, each with its own handle on every archive
+    (see open_member), in archive order; output files are preallocated, and
+    modification times are restored once all files are written. A member that is
+    missing or cannot be read (e.g. a CRC error) is reported and skipped. Returns
+    the number of files restored, or None (after reporting it) when an archive of
+    the chain is missing, in which case nothing is restored.
+    """
+    target_dir.mkdir(parents=True, exist_ok=True)
+    selected = member_filter(list(includes), list(excludes))
+    tasks = []  # (archive, ZipInfo, mtime_ns or None)
+    manifest_path = sidecar_path(zip_path, MANIFEST_SUFFIX)
+    if manifest_path.exists():
+        _, entries = read_manifest(manifest_path)
+        chain = sorted({entry["archive"] for entry in entries.values()})
+        missing = [name for name in chain if not zip_path.with_name(name).is_file()]
+        if missing:
+            print(f"[FAIL] Missing base archive: {', '.join(missing)}")
+            return None
+        by_archive = {}
+        for entry in entries.values():
+            if selected(entry["path"]):
+                by_archive.setdefault(entry["archive"], []).append(entry)
+        for archive_name, archive_entries in sorted(by_archive.items()):
+            archive = zip_path.with_name(archive_name)
+            with zipfile.ZipFile(archive) as zf:
+                for entry in archive_entries:
+                    try:
+                        tasks.append((archive, zf.getinfo(entry["path"]), entry["mtime_ns"]))
+                    except KeyError:
+                        print(f"[FAIL] Could not restore {entry['path']}: not in {archive_name}")
+    else:
+        for archive in volume_set(zip_path):
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        folder = member_target(target_dir, info.filename)
+                        if folder and not (includes or excludes):
+                            folder.mkdir(parents=True, exist_ok=True)
+                    elif selected(info.filename):
+                        tasks.append((archive, info, None))
+    tasks.sort(key=lambda task: (str(task[0]), task[1].header_offset))
+
+    handles = ArchiveHandles()
+
+    def extract(task) -> Optional[tuple]:
+        archive, info, mtime_ns = task
+        out_path = member_target(target_dir, info.filename)
+        if out_path is None:
+            print(f"[WARN] Skipping unsafe member path: {info.filename}")
+            return None
         try:
-            zip_path.unlink()
-            print(f"[INFO] Removed old ZIP: {zip_path.name}")
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            with open_member(handles.get(archive), info) as src, open(out_path, "wb") as dst:
+                preallocate(dst, info.file_size)
+                for block in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    dst.write(block)
+        except Exception as e:
+            print(f"[FAIL] Could not restore {info.filename}: {e}")
+            with contextlib.suppress(OSError):
+                out_path.unlink()
+            return None
+        if mtime_ns is None:
+            mtime_ns = int(time.mktime(info.date_time + (0, 0, -1))) * 1_000_000_000
+        return out_path, mtime_ns
+
+    try:
+        restored = [result for result in ordered_map(extract, tasks, workers) if result]
+    finally:
+        handles.close()
+    for out_path, mtime_ns in restored:
+        os.utime(out_path, ns=(mtime_ns, mtime_ns))
+    return len(restored)
+
+
+def restore_main(argv: List[str]):
+    import argparse
+    parser = argparse.ArgumentParser(prog="zipcli restore",
+                                     description="Restore a folder from a ZIP (or a chain of incremental ZIPs)")
+    parser.add_argument("archive", type=Path,
+                        help="ZIP to restore (the newest archive of an incremental chain, or any volume of a set)")
+    parser.add_argument("--target", type=Path, default=Path.cwd(), help="Folder to restore into (default: current directory)")
+    parser.add_argument("--filter", nargs="*", default=[], help="Glob patterns of files to restore (e.g. *.txt *.csv)")
+    parser.add_argument("--exclude", nargs="*", default=[], help="Glob patterns of files not to restore")
+    parser.add_argument("--include", nargs="*", default=[], help="Same as --filter (overrides if used together)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Threads decompressing files (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        print(f"[FAIL] --workers must be at least 1 (got {args.workers})")
+        return
+
+    if not volume_set(args.archive)[0].is_file():
+        print(f"[FAIL] Archive not found: {args.archive}")
+        return
+
+    start = time.perf_counter()
+    count = restore_archive(args.archive.resolve(), args.target, args.include or args.filter, args.exclude,
+                            args.workers)
+    if count is None:
+        return
+    print(f"[✓] Restored {count} files to: {args.target} in {time.perf_counter() - start:.2f}s")
+
+
+class VerifyResult(NamedTuple):
+    archive: Path
+    members: int
+    bytes_read: int     # compressed bytes read from the archive
+    bytes_checked: int  # uncompressed bytes checked against their CRC
+    seconds: float
+    errors: List[str]
+
+    @property
+    def throughput(self) -> float:
+        """Compressed bytes read per second."""
+        return self.bytes_read / self.seconds if self.seconds else 0.0
+
+
+def expected_members(zip_path: Path) -> Optional[dict]:
+    """
+    Return path -> record for the members an archive should hold, from its inventory
+    (any format) and, for an incremental archive, the manifest entries it holds.
+    Records carry "size" and "crc32" where those were recorded. For a volume
+    (<stem>_001.zip, ...) only the inventory rows of that volume are returned.
+    Returns None when the archive has neither sidecar.
+    """
+    inventories = [(zip_path, None)]
+    stem, _, number = zip_path.stem.rpartition("_")
+    if len(number) == VOLUME_DIGITS and number.isdigit():
+        inventories.append((zip_path.with_name(stem + zip_path.suffix), zip_path.name))
+    expected = None
+    for path, volume in inventories:
+        for fmt in INVENTORY_FORMATS:
+            inventory_path = sidecar_path(path, inventory_suffix(fmt))
+            if not inventory_path.exists():
+                continue
+            expected = {} if expected is None else expected
+            for record in read_inventory(inventory_path):
+                if volume is None or record.get("volume") == volume:
+                    expected[record["path"]] = record
+    manifest_path = sidecar_path(zip_path, MANIFEST_SUFFIX)
+    if manifest_path.exists():
+        expected = {} if expected is None else expected
+        for entry in iter_manifest(manifest_path):
+            if entry["archive"] == zip_path.name:
+                expected.setdefault(entry["path"], {"path": entry["path"], "size": entry["size"]})
+    return expected
+
+
+def verify_archive(zip_path: Path, workers: int = 1, pool: Optional[ThreadPoolExecutor] = None) -> VerifyResult:
+    """
+    Read every member of zip_path and check it against its CRC-32, on [workers]
+    threads (or the shared [pool]), each with its own handle on the file; the
+    central directory is read once (see open_member). Members
+    are then compared with the archive's inventory or manifest (see expected_members):
+    a missing, unexpected or differently sized member, or a CRC that is not the
+    one recorded, is reported as an error.
+    """
+    start = time.perf_counter()
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            infos = [info for info in zf.infolist() if not info.is_dir()]
+    except (OSError, zipfile.BadZipFile) as e:
+        return VerifyResult(zip_path, 0, 0, 0, time.perf_counter() - start, [f"cannot read the archive: {e}"])
 
-            # Also remove the matching inventory file
-            inventory_path = zip_path.with_name(zip_path.stem + "_inventory.txt")
-            if inventory_path.exists():
-                inventory_path.unlink()
-                print(f"[INFO] Removed inventory: {inventory_path.name}")
+    handles = ArchiveHandles()
 
+    def check(info: zipfile.ZipInfo) -> Optional[str]:
+        try:
+            with open_member(handles.get(zip_path), info) as member:  # BadZipFile on a CRC mismatch at the end
+                while member.read(CHUNK_SIZE):
+                    pass
         except Exception as e:
-            print(f"[WARN] Could not delete {zip_path.name}: {e}")
+            return f"{info.filename}: {e}"
+        return None
+
+    try:
+        errors = [error for error in ordered_map(check, infos, workers, pool) if error]
+    finally:
+        handles.close()
 
+    expected = expected_members(zip_path)
+    if expected is not None:
+        members = {info.filename: info for info in infos}
+        for path, record in expected.items():
+            info = members.get(path)
+            if info is None:
+                errors.append(f"{path}: listed in the inventory but not in the archive")
+            elif record.get("size") is not None and record["size"] != info.file_size:
+                errors.append(f"{path}: {info.file_size} bytes, the inventory says {record['size']}")
+            elif record.get("crc32") and int(record["crc32"], 16) != info.CRC:
+                errors.append(f"{path}: CRC {info.CRC:08x}, the inventory says {record['crc32']}")
+        errors += [f"{path}: not listed in the inventory" for path in members if path not in expected]
 
+    return VerifyResult(zip_path, len(infos), sum(i.compress_size for i in infos),
+                        sum(i.file_size for i in infos), time.perf_counter() - start, errors)
 
-def create_zip_archive(
+
+def report_verification(result: VerifyResult, max_errors: int = 20) -> bool:
+    """Print the outcome of verify_archive; returns True if the archive is sound."""
+    for error in result.errors[:max_errors]:
+        print(f"[FAIL] {result.archive.name}: {error}")
+    if len(result.errors) > max_errors:
+        print(f"[FAIL] {result.archive.name}: ... and {len(result.errors) - max_errors} more")
+    if result.errors:
+        return False
+    print(f"[✓] Verified {result.archive.name}: {result.members} members, {result.bytes_checked / 1e6:.1f} MB "
+          f"({result.bytes_read / 1e6:.1f} MB compressed) in {result.seconds:.2f}s "
+          f"({result.throughput / 1e6:.1f} MB/s read)")
+    return True
+
+
+def verify_main(argv: List[str]):
+    import argparse
+    parser = argparse.ArgumentParser(prog="zipcli verify",
+                                     description="Check every member of ZIPs against its CRC and the inventory")
+    parser.add_argument("archives", nargs="*", type=Path, help="ZIPs (or volumes) to verify")
+    parser.add_argument("--source", type=Path,
+                        help="Verify every archive of this folder kept in --backup-location (see --keep)")
+    parser.add_argument("--backup-location", type=Path, default=Path.cwd(),
+                        help="Where the archives of --source are (default: current directory)")
+    parser.add_argument("--date-format", default="%Y%m%dT%H%M", help="Timestamp format (default: %%Y%%m%%dT%%H%%M)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Threads reading members (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        print(f"[FAIL] --workers must be at least 1 (got {args.workers})")
+        return
+
+    archives = list(args.archives)
+    if args.source:
+        for entry in load_archive_index(Path(args.source).resolve(), args.backup_location, args.date_format):
+            if entry["name"].endswith(SNAPSHOT_SUFFIX):
+                print(f"[INFO] Skipping snapshot {entry['name']}")
+                continue
+            archives += [args.backup_location / name for name in archive_files(entry)]
+    if not archives:
+        print("[FAIL] Nothing to verify: name archives or use --source")
+        return
+
+    failed = sum(not report_verification(verify_archive(path, args.workers)) for path in archives)
+    if failed:
+        print(f"[FAIL] {failed} of {len(archives)} archives failed verification")
+        sys.exit(1)
+    if len(archives) > 1:
+        print(f"[✓] All {len(archives)} archives verified")
+
+
+def find_main(argv: List[str]):
+    import argparse
+    parser = argparse.ArgumentParser(prog="zipcli find",
+                                     description="Find files in every archive of a backup location (from its catalog)")
+    parser.add_argument("pattern", help="Glob pattern: a file name (e.g. *.csv) or a path (e.g. docs/**/report*.pdf)")
+    parser.add_argument("--backup-location", type=Path, default=Path.cwd(),
+                        help="Where the archives are (default: current directory)")
+    parser.add_argument("--source", help="Only search the archives of this source folder name")
+    parser.add_argument("--limit", type=int, help="Stop after this many matches")
+    parser.add_argument("--cache-dir", type=Path,
+                        help="Local folder holding the catalog (default: %%LOCALAPPDATA%%\\zipcli or ~/.cache/zipcli)")
+    args = parser.parse_args(argv)
+
+    if not (args.backup_location / STATE_DIR).is_dir():
+        print(f"[FAIL] No archives indexed in: {args.backup_location}")
+        return
+
+    start = time.perf_counter()
+    with Catalog(args.backup_location, args.cache_dir) as catalog:
+        catalog.sync_all()  # only archives missing from the catalog (or all, the first time) are read
+        hits = catalog.find(args.pattern, args.source, args.limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for hit in hits:
+        crc = "" if hit["crc32"] is None else f"  crc32={hit['crc32']:08x}"
+        print(f"{hit['created']}  {hit['volume'] or hit['archive']}  {hit['path']}  {hit['size']} bytes{crc}")
+    print(f"[INFO] {len(hits)} matches in {elapsed_ms:.1f} ms")
+
+
+# ==============================
+# Deduplicating chunk store (--dedup)
+# ==============================
+# Files are split into content-defined chunks (FastCDC-style gear hash). Each unique
+# chunk is stored once under <backup>/.zipcli/chunks/, and each run writes a small
+# snapshot (<folder>_<timestamp>.zsnap) listing the chunks of every file.
+
+CDC_MIN_SIZE = 16 * 1024
+CDC_AVG_SIZE = 64 * 1024
+CDC_MAX_SIZE = 256 * 1024
+_CDC_MASK_HARD = (1 << 18) - 1   # more bits than avg: cuts are rare before CDC_AVG_SIZE
+_CDC_MASK_EASY = (1 << 14) - 1   # fewer bits than avg: cuts are likely after it
+_MASK64 = (1 << 64) - 1
+
+
+@functools.lru_cache(maxsize=None)
+def gear_table() -> tuple:
+    """Random 64-bit value per byte for the gear hash, derived from SHA-256 so it never changes."""
+    import hashlib
+    return tuple(int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "little") for i in range(256))
+
+
+def cdc_cut(data, start: int, end: int) -> int:
+    """Return the length of the next content-defined chunk in data[start:end]."""
+    n = end - start
+    if n <= CDC_MIN_SIZE:
+        return n
+    normal = min(n, CDC_AVG_SIZE)
+    limit = min(n, CDC_MAX_SIZE)
+    gear = gear_table()
+    h = 0
+    i = CDC_MIN_SIZE
+    # Bytes before CDC_MIN_SIZE are never a cut point, so they are not hashed at all
+    for b in data[start + CDC_MIN_SIZE:start + normal]:
+        h = ((h << 1) + gear[b]) & _MASK64
+        i += 1
+        if not h & _CDC_MASK_HARD:
+            return i
+    for b in data[start + normal:start + limit]:
+        h = ((h << 1) + gear[b]) & _MASK64
+        i += 1
+        if not h & _CDC_MASK_EASY:
+            return i
+    return limit
+
+
+def iter_chunks(file_path) -> Iterator[bytes]:
+    """Yield the content-defined chunks of a file, reading it in CHUNK_SIZE blocks."""
+    buf = bytearray()
+    with open(file_path, "rb") as f:
+        eof = False
+        while True:
+            while not eof and len(buf) < CDC_MAX_SIZE:
+                block = f.read(CHUNK_SIZE)
+                eof = not block
+                buf += block
+            if not buf:
+                return
+            cut = cdc_cut(buf, 0, len(buf))
+            yield bytes(buf[:cut])
+            del buf[:cut]
+
+
+def store_file_chunks(store: Path, file_path) -> List[str]:
+    """Chunk a file into the store and return its chunk digests (run in a worker process by create_snapshot)."""
+    return [store_chunk(store, chunk) for chunk in iter_chunks(file_path)]
+
+
+def chunk_store(backup_location: Path) -> Path:
+    return backup_location / STATE_DIR / "chunks"
+
+
+def store_chunk(store: Path, data: bytes) -> str:
+    """Store a chunk (zlib-compressed if that helps) under its SHA-256 and return the digest."""
+    import hashlib
+    digest = hashlib.sha256(data).hexdigest()
+    path = store / digest[:2] / digest
+    if path.exists():
+        # Refresh mtime so a concurrent gc_chunks grace period covers it
+        os.utime(path)
+        return digest
+    path.parent.mkdir(parents=True, exist_ok=True)
+    packed = zlib.compress(data, 6)
+    payload = b"z" + packed if len(packed) < len(data) else b"r" + data
+    tmp_path = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+    return digest
+
+
+def load_chunk(store: Path, digest: str) -> bytes:
+    payload = (store / digest[:2] / digest).read_bytes()
+    return zlib.decompress(payload[1:]) if payload[:1] == b"z" else payload[1:]
+
+
+def gc_chunks(backup_location: Path, grace_seconds: int = 3600) -> int:
+    """
+    Delete chunks that no snapshot in backup_location references. Chunks written or
+    reused within the last [grace_seconds] are kept, so a snapshot that is still
+    being written by a concurrent run never loses its chunks. Returns the count removed.
+    """
+    store = chunk_store(backup_location)
+    if not store.exists():
+        return 0
+    referenced = set()
+    for snapshot_path in backup_location.glob(f"*{SNAPSHOT_SUFFIX}"):
+        for entry in iter_manifest(snapshot_path):
+            referenced.update(entry["chunks"])
+
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    for bucket in os.scandir(store):
+        if not bucket.is_dir():
+            continue
+        for chunk in os.scandir(bucket.path):
+            if chunk.name not in referenced and chunk.stat().st_mtime < cutoff:
+                os.unlink(chunk.path)
+                removed += 1
+    if removed:
+        print(f"[INFO] Removed {removed} unreferenced chunks")
+    return removed
+
+
+def create_snapshot(
     source_dir: Path,
     includes: List[str],
     excludes: List[str],
     date_format: str,
     inventory: bool,
     backup_location: Path,
-    keep: int = 1  # ← default value here
-):
+    keep: int = 1,
+    workers: int = 1,
+    keep_daily: int = 0,
+    keep_weekly: int = 0,
+    keep_monthly: int = 0,
+    inventory_format: str = "txt",
+    walkers: int = 1,
+    cache_dir: Optional[Path] = None,
+    catalog: bool = False
+) -> Path:
+    """
+    Write a deduplicated snapshot of source_dir into the chunk store of backup_location.
+
+    Files whose size and mtime match the previous snapshot reuse its chunk list
+    without being read; other files are chunked in [workers] processes. The gear
+    hash is a pure-Python loop (about 6 MB/s per process) that holds the GIL, so
+    threads would not run it in parallel. Folders are listed on [walkers] threads
+    (see scan_files). Snapshots
+    share the retention index and --keep policies with ZIP archives, and chunks no
+    longer referenced by any snapshot are garbage-collected after pruning.
+    Use export_snapshot (zipcli export) to turn a snapshot into a standard ZIP.
+    With [catalog], the snapshot's files are added to the backup location's
+    catalog under [cache_dir] (see Catalog). Returns the snapshot path.
+    """
+    backup_location = backup_location or Path.cwd()
     timestamp = datetime.now().strftime(date_format)
-    zip_name = f"{source_dir.name}_{timestamp}.zip"
-    output_path = (backup_location or Path.cwd()) / zip_name
+    snapshot_path = backup_location / f"{source_dir.name}_{timestamp}{SNAPSHOT_SUFFIX}"
+    store = chunk_store(backup_location)
 
-    files_to_zip = collect_files(source_dir, includes, excludes)
+    previous = ()
+    for path in sorted_zips(source_dir, backup_location, date_format):
+        if path.name.endswith(SNAPSHOT_SUFFIX) and path.exists():
+            previous = iter_manifest(path)
+            break
 
-    with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        inventory_lines = []
-        for file_path in files_to_zip:
-            arcname = file_path.relative_to(source_dir)
-            zf.write(file_path, arcname)
-            inventory_lines.append(f"{arcname}")
+    def snapshot_entry(pair) -> dict:
+        file_entry, prev = pair
+        st = file_entry.stat
+        entry = {"path": file_entry.relpath, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "mode": st.st_mode}
+        if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+            entry["chunks"] = prev["chunks"]
+        elif chunker and st.st_size > CDC_MIN_SIZE:  # smaller files are one chunk; no hashing to offload
+            entry["chunks"] = chunker.submit(store_file_chunks, store, file_entry.path).result()
+        else:
+            entry["chunks"] = store_file_chunks(store, file_entry.path)
+        return entry
+
+    header = {"format": 1, "type": "snapshot", "source": source_dir.name, "archive": snapshot_path.name}
+    manifest = ManifestWriter(snapshot_path, header)
+    pairs = merge_with_previous(scan_files(source_dir, includes, excludes, walkers=walkers), previous, [])
+    inventory_path = sidecar_path(snapshot_path, inventory_suffix(inventory_format))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        chunker = ProcessPoolExecutor(max_workers=workers)
+    else:
+        chunker = None
+    # ordered_map's threads only wait on the chunker processes
+    with InventoryWriter(inventory_path, inventory_format) if inventory else contextlib.nullcontext() as inventory_file, \
+            chunker or contextlib.nullcontext():
+        for entry in ordered_map(snapshot_entry, pairs, workers):
+            manifest.add(entry)
             if inventory:
-                print(f"  [✓] {arcname}")
+                inventory_file.add(entry["path"], entry["size"], None, None, entry["mtime_ns"] / 1e9, "dedup", 0.0)
+                print(f"  [✓] {entry['path']} ({len(entry['chunks'])} chunks)")
+    manifest.close()
 
+    sidecars = []
     if inventory:
-        inventory_path = output_path.with_name(output_path.stem + "_inventory.txt")
-        inventory_path.write_text("\n".join(inventory_lines), encoding="utf-8")
+        sidecars.append(inventory_path)
         print(f"[✓] Inventory report saved to: {inventory_path}")
 
-    enforce_zip_retention(source_dir, output_path.parent, date_format, keep)
+    record_archive(source_dir, backup_location, date_format, snapshot_path, sidecars)
+    enforce_zip_retention(source_dir, backup_location, date_format, keep, keep_daily, keep_weekly, keep_monthly)
+    if catalog:
+        update_catalog(source_dir, backup_location, cache_dir)
+    return snapshot_path
+
+
+def export_snapshot(snapshot_path: Path, output_path: Path, policy: Optional[CompressionPolicy] = None) -> Path:
+    """Rebuild a standard ZIP from a snapshot and its chunk store."""
+    policy = policy or DEFAULT_POLICY
+    store = chunk_store(snapshot_path.parent)
+    with ZipWriter(output_path) as writer:
+        for entry in iter_manifest(snapshot_path):
+            st = os.stat_result((entry["mode"], 0, 0, 0, 0, 0, entry["size"], 0, entry["mtime_ns"] / 1e9, 0))
+            zinfo = build_zipinfo(entry["path"], st, zipfile.ZIP_DEFLATED)
+            writer.write_stream(zinfo, (load_chunk(store, digest) for digest in entry["chunks"]), policy)
+    return output_path
+
+
+def export_main(argv: List[str]):
+    import argparse
+    parser = argparse.ArgumentParser(prog="zipcli export", description="Export a --dedup snapshot as a standard ZIP")
+    parser.add_argument("snapshot", type=Path, help=f"Snapshot file (<folder>_<timestamp>{SNAPSHOT_SUFFIX})")
+    parser.add_argument("--output", type=Path, help="ZIP to write (default: <snapshot name>.zip in the current directory)")
+    args = parser.parse_args(argv)
+
+    if not args.snapshot.is_file():
+        print(f"[FAIL] Snapshot not found: {args.snapshot}")
+        return
+
+    output_path = args.output or Path.cwd() / (args.snapshot.stem + ".zip")
+    export_snapshot(args.snapshot.resolve(), output_path)
+    print(f"[✓] Exported snapshot to: {output_path}")
+
+
+# ==============================
+# Batch mode (batch <config>)
+# ==============================
+# One process archives many source folders. Each [section] of the config file is
+# a source with its own filters, retention and backup location; all of them share
+# one compression pool and one limit on concurrent file reads.
+
+BATCH_KEYS = {
+    "folder", "filter", "include", "exclude", "backup_location", "date_format",
+    "keep", "keep_daily", "keep_weekly", "keep_monthly", "inventory", "inventory_format",
+    "compression", "level", "auto_store", "incremental", "hash", "prefetch", "max_volume_size",
+    "verify", "hash_cache", "walkers", "unchanged", "cache_dir", "catalog",
+}
+
+
+def read_batch_config(config_path: Path) -> List[tuple]:
+    """
+    Read a batch config file (INI format, see config/default.config).
+
+    Each section is one source; its keys mirror the CLI options (keep_daily for
+    --keep-daily, ...), and keys under [DEFAULT] apply to every section. Patterns
+    are space-separated, quoted if they contain spaces. Relative paths are taken
+    from the config file's folder.
+
+    Returns:
+        list: (section name, create_zip_archive keyword arguments), in file order.
+
+    Raises:
+        ValueError: for unknown keys, a missing folder, a bad value (including a
+            level out of range for the compression), or two sources that would
+            write the same archive names.
+    """
+    import configparser
+    import shlex
+    config = configparser.ConfigParser(interpolation=None)
+    with open(config_path, encoding="utf-8") as f:
+        config.read_file(f)
+    base = config_path.resolve().parent
+
+    jobs = []
+    targets = {}
+    for name in config.sections():
+        section = config[name]
+        unknown = set(section) - BATCH_KEYS
+        if unknown:
+            raise ValueError(f"[{name}] unknown keys: {', '.join(sorted(unknown))}")
+        if not section.get("folder"):
+            raise ValueError(f"[{name}] needs a folder")
+        compression = section.get("compression", "deflate")
+        if compression not in COMPRESSION_METHODS:
+            raise ValueError(f"[{name}] unknown compression: {compression}")
+        inventory_format = section.get("inventory_format")
+        if inventory_format is not None and inventory_format not in INVENTORY_FORMATS:
+            raise ValueError(f"[{name}] unknown inventory_format: {inventory_format}")
+        unchanged = section.get("unchanged", "archive")
+        if unchanged not in UNCHANGED_ACTIONS:
+            raise ValueError(f"[{name}] unknown unchanged action: {unchanged}")
+
+        source_dir = (base / Path(section["folder"]).expanduser()).resolve()
+        backup_location = (base / Path(section.get("backup_location", ".")).expanduser()).resolve()
+        target = (backup_location, source_dir.name)
+        if target in targets:
+            raise ValueError(f"[{name}] and [{targets[target]}] both write {source_dir.name}_*.zip to {backup_location}")
+        targets[target] = name
+        cache_dir = section.get("cache_dir")
+        cache_dir = (base / Path(cache_dir).expanduser()).resolve() if cache_dir else None
+
+        try:
+            level = section.getint("level", fallback=None)
+            min_level = 1 if compression == "bzip2" else 0
+            if level is not None and not min_level <= level <= 9:
+                raise ValueError(f"level must be between {min_level} and 9 for {compression} (got {level})")
+            jobs.append((name, {
+                "source_dir": source_dir,
+                "includes": shlex.split(section.get("include") or section.get("filter", "")),
+                "excludes": shlex.split(section.get("exclude", "")),
+                "date_format": section.get("date_format", "%Y%m%dT%H%M"),
+                "inventory": section.getboolean("inventory", fallback=False) or inventory_format is not None,
+                "inventory_format": inventory_format or "txt",
+                "backup_location": backup_location,
+                "keep": section.getint("keep", fallback=1),
+                "keep_daily": section.getint("keep_daily", fallback=0),
+                "keep_weekly": section.getint("keep_weekly", fallback=0),
+                "keep_monthly": section.getint("keep_monthly", fallback=0),
+                "incremental": section.getboolean("incremental", fallback=False),
+                "content_hash": section.getboolean("hash", fallback=False),
+                "prefetch": max(0, section.getint("prefetch", fallback=0)),
+                "max_volume_size": parse_size(section.get("max_volume_size", "0")),
+                "verify": section.getboolean("verify", fallback=False),
+                "hash_cache": max(0, section.getint("hash_cache", fallback=0)),
+                "walkers": max(1, section.getint("walkers", fallback=1)),
+                "unchanged": unchanged,
+                "cache_dir": cache_dir,
+                "catalog": section.getboolean("catalog", fallback=False),
+                "policy": CompressionPolicy(compression, level,
+                                            auto_store=section.getboolean("auto_store", fallback=True)),
+            }))
+        except ValueError as e:
+            raise ValueError(f"[{name}] {e}") from None
+    return jobs
+
+
+def run_batch(jobs: List[tuple], workers: int = 1, io_limit: int = 0, parallel: int = 2,
+              stats: bool = False) -> int:
+    """
+    Archive every (name, kwargs) job from read_batch_config into its own ZIP and
+    apply its own retention.
+
+    Up to [parallel] sources are walked and written at once; their files are all
+    compressed on one shared pool of [workers] threads, and at most [io_limit]
+    file reads run at the same time across all sources (0 = no limit). A source
+    that fails is reported and does not stop the others.
+
+    Returns:
+        int: Number of sources that failed.
+    """
+    io_slots = threading.BoundedSemaphore(io_limit) if io_limit > 0 else None
+
+    def run(job) -> bool:
+        name, kwargs = job
+        if not kwargs["source_dir"].is_dir():
+            print(f"[FAIL] {name}: invalid folder: {kwargs['source_dir']}")
+            return False
+        run_stats = RunStats() if stats else None
+        try:
+            kwargs["backup_location"].mkdir(parents=True, exist_ok=True)
+            zip_path = create_zip_archive(**kwargs, workers=workers, pool=pool, io_slots=io_slots,
+                                          stats=run_stats)
+        except (OSError, ValueError, zipfile.LargeZipFile) as e:
+            print(f"[FAIL] {name}: {e}")
+            return False
+        except Exception as e:  # a bug in one source must not take the other sources down with it
+            print(f"[FAIL] {name}: {type(e).__name__}: {e}")
+            return False
+        print(f"[✓] {name}: {zip_path}")
+        if run_stats:
+            for line in run_stats.report():
+                print(line.replace("[INFO]", f"[INFO] {name}:", 1))
+        return True
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as runner:
+            results = list(runner.map(run, jobs))
+    return results.count(False)
+
+
+def batch_main(argv: List[str]):
+    import argparse
+    parser = argparse.ArgumentParser(prog="zipcli batch",
+                                     description="Archive every source folder listed in a config file")
+    parser.add_argument("config", nargs="?", type=Path, default=Path("config/default.config"),
+                        help="Config file (default: config/default.config)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Compression threads shared by all sources (default: CPU count)")
+    parser.add_argument("--parallel", type=int, default=2, help="Sources archived at the same time (default: 2)")
+    parser.add_argument("--io-limit", type=int, default=0,
+                        help="Most file reads in flight across all sources (default: no limit)")
+    parser.add_argument("--stats", action="store_true", help="Print per-phase timings for each source")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1 or args.parallel < 1 or args.io_limit < 0:
+        print("[FAIL] --workers and --parallel must be at least 1, --io-limit at least 0")
+        return
+
+    if not args.config.is_file():
+        print(f"[FAIL] Config file not found: {args.config}")
+        return
+    import configparser
+    try:
+        jobs = read_batch_config(args.config)
+    except (ValueError, configparser.Error) as e:
+        print(f"[FAIL] {args.config}: {e}")
+        return
+    if not jobs:
+        print(f"[WARN] No sources in {args.config}")
+        return
+
+    failed = run_batch(jobs, args.workers, args.io_limit, args.parallel, args.stats)
+    if failed:
+        print(f"[FAIL] {failed} of {len(jobs)} sources failed")
+    else:
+        print(f"[✓] Archived {len(jobs)} sources")
+
 
+SUBCOMMANDS = {
+    "restore": restore_main,
+    "export": export_main,
+    "batch": batch_main,
+    "verify": verify_main,
+    "find": find_main,
+}
 
-def main():
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
+    import argparse
     parser = argparse.ArgumentParser(description="Zip CLI Utility")
     parser.add_argument("folder", nargs="?", default=".", help="Folder to zip (default: current directory)")
     parser.add_argument("--filter", nargs="*", default=[], help="Glob patterns to include (e.g. *.txt *.csv)")
@@ -140,10 +3360,53 @@ def main():
     parser.add_argument("--include", nargs="*", default=[], help="Same as --filter (overrides if used together)")
     parser.add_argument("--date-format", default="%Y%m%dT%H%M", help="Timestamp format (default: %%Y%%m%%dT%%H%%M)")
     parser.add_argument("--inventory", action="store_true", help="List included files")
+    parser.add_argument("--inventory-format", choices=INVENTORY_FORMATS,
+                        help="Inventory file format (default: txt); csv/jsonl add sizes, CRC, mtime and timing. Implies --inventory")
     parser.add_argument("--backup-location", type=Path, help="Folder to save the .zip file")
     parser.add_argument("--keep", type=int, default=1, help="Number of recent ZIPs to keep (default: 1)")
+    parser.add_argument("--keep-daily", type=int, default=0, help="Also keep the newest ZIP of each of the last N days")
+    parser.add_argument("--keep-weekly", type=int, default=0, help="Also keep the newest ZIP of each of the last N weeks")
+    parser.add_argument("--keep-monthly", type=int, default=0, help="Also keep the newest ZIP of each of the last N months")
+    parser.add_argument("--workers", type=int, default=1, help="Threads used to compress files (default: 1)")
+    parser.add_argument("--walkers", type=int, default=1,
+                        help="Threads listing folders, for deep or wide trees on network mounts (default: 1)")
+    parser.add_argument("--prefetch", type=int, default=0,
+                        help="Open and read up to N upcoming files ahead on background threads (for SMB/NFS; default: 0)")
+    parser.add_argument("--incremental", action="store_true", help="Archive only files changed since the previous manifest")
+    parser.add_argument("--hash", action="store_true", help="With --incremental, also record SHA-256 per file")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Write a deduplicated snapshot to the chunk store instead of a ZIP (see 'export')")
+    parser.add_argument("--compression", choices=sorted(COMPRESSION_METHODS), default="deflate",
+                        help="Compression method (default: deflate)")
+    parser.add_argument("--level", type=int, help="Compression level (deflate 0-9, bzip2 1-9; ignored for lzma)")
+    parser.add_argument("--no-auto-store", action="store_true",
+                        help="Compress every file, even JPEGs, videos, ZIPs and other incompressible data")
+    parser.add_argument("--max-volume-size", type=parse_size, default=0, metavar="SIZE",
+                        help="Split the archive into self-contained volumes of at most SIZE (e.g. 650M, 4G) "
+                             "named <name>_001.zip, <name>_002.zip, ...")
+    parser.add_argument("--output", help="Write the ZIP here instead of the backup location ('-' streams to stdout, named pipes work too)")
+    parser.add_argument("--unchanged", choices=UNCHANGED_ACTIONS, default="archive",
+                        help="When nothing changed since the newest ZIP: archive anyway (default), skip, "
+                             "touch the newest ZIP, or link it under today's name")
+    parser.add_argument("--resume", action="store_true",
+                        help="Finish the newest interrupted archive of this folder instead of starting over")
+    parser.add_argument("--update-from", type=Path, metavar="ZIP",
+                        help="Copy unchanged files' compressed data from this earlier ZIP instead of compressing them again")
+    parser.add_argument("--hash-cache", type=int, nargs="?", const=HASH_CACHE_ENTRIES, default=0, metavar="N",
+                        help="Remember file hashes by inode, size and mtime in the local cache so unchanged "
+                             f"files are not read again for --update-from and --hash (up to N files, default {HASH_CACHE_ENTRIES})")
+    parser.add_argument("--catalog", action="store_true",
+                        help="Add the new archive to the backup location's catalog in the local cache, for `find`")
+    parser.add_argument("--cache-dir", type=Path,
+                        help="Local folder for --hash-cache and --catalog (default: %%LOCALAPPDATA%%\\zipcli or ~/.cache/zipcli)")
+    parser.add_argument("--verify", action="store_true",
+                        help="Read the new ZIP back and check every member's CRC against the inventory")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print per-phase timings, throughput and the slowest files at the end")
+    parser.add_argument("--stats-format", choices=STATS_FORMATS,
+                        help="Also save the stats next to the ZIP as JSON or a Prometheus textfile. Implies --stats")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     include_patterns = args.include if args.include else args.filter
     exclude_patterns = args.exclude
@@ -153,19 +3416,145 @@ def main():
         print(f"[FAIL] Invalid folder: {source_dir}")
         return
 
+    if args.workers < 1:
+        print(f"[FAIL] --workers must be at least 1 (got {args.workers})")
+        return
+
+    if args.walkers < 1:
+        print(f"[FAIL] --walkers must be at least 1 (got {args.walkers})")
+        return
+
+    if args.prefetch < 0:
+        print(f"[FAIL] --prefetch cannot be negative (got {args.prefetch})")
+        return
+
+    min_level = 1 if args.compression == "bzip2" else 0
+    if args.level is not None and not min_level <= args.level <= 9:
+        print(f"[FAIL] --level must be between {min_level} and 9 for {args.compression} (got {args.level})")
+        return
+
+    if args.incremental and args.output:
+        print("[FAIL] --incremental cannot be combined with --output")
+        return
+
+    if args.hash and not args.incremental:
+        print("[FAIL] --hash needs --incremental")
+        return
+
+    if args.dedup and (args.incremental or args.output):
+        print("[FAIL] --dedup cannot be combined with --incremental or --output")
+        return
+
+    if args.dedup and (args.hash_cache or args.compression != "deflate" or args.level is not None
+                       or args.no_auto_store):
+        # Chunks are always zlib-compressed when that helps, and never looked up in the hash cache
+        print("[FAIL] --dedup cannot be combined with --hash-cache, --compression, --level or --no-auto-store")
+        return
+
+    if args.resume and (args.incremental or args.output or args.dedup):
+        print("[FAIL] --resume cannot be combined with --incremental, --output or --dedup")
+        return
+
+    if args.unchanged != "archive" and (args.incremental or args.output or args.dedup):
+        print("[FAIL] --unchanged cannot be combined with --incremental, --output or --dedup")
+        return
+
+    if args.hash_cache < 0:
+        print(f"[FAIL] --hash-cache cannot be negative (got {args.hash_cache})")
+        return
+
+    if args.update_from and (args.incremental or args.dedup):
+        print("[FAIL] --update-from cannot be combined with --incremental or --dedup")
+        return
+
+    if args.update_from and not zipfile.is_zipfile(args.update_from):
+        print(f"[FAIL] --update-from is not a readable ZIP: {args.update_from}")
+        return
+
+    if args.max_volume_size and args.max_volume_size < MIN_VOLUME_SIZE:
+        print(f"[FAIL] --max-volume-size must be at least {MIN_VOLUME_SIZE // 1024}K (got {args.max_volume_size} bytes)")
+        return
+
+    if args.max_volume_size and (args.incremental or args.output or args.dedup or args.resume):
+        print("[FAIL] --max-volume-size cannot be combined with --incremental, --output, --dedup or --resume")
+        return
+
     if args.backup_location:
         args.backup_location.mkdir(parents=True, exist_ok=True)
 
-    create_zip_archive(
-        source_dir=source_dir,
-        includes=include_patterns,
-        excludes=exclude_patterns,
-        date_format=args.date_format,
-        inventory=args.inventory,
-        backup_location=args.backup_location or Path.cwd(),
-        keep=args.keep
-    )
+    stats = RunStats() if args.stats or args.stats_format else None
+
+    if args.dedup:
+        if stats:
+            print("[WARN] --stats is not supported with --dedup; ignoring it")
+        if args.verify:
+            print("[WARN] --verify is not supported with --dedup; ignoring it")
+        create_snapshot(
+            source_dir=source_dir,
+            includes=include_patterns,
+            excludes=exclude_patterns,
+            date_format=args.date_format,
+            inventory=args.inventory or args.inventory_format is not None,
+            inventory_format=args.inventory_format or "txt",
+            backup_location=args.backup_location or Path.cwd(),
+            keep=args.keep,
+            workers=args.workers,
+            keep_daily=args.keep_daily,
+            keep_weekly=args.keep_weekly,
+            keep_monthly=args.keep_monthly,
+            walkers=args.walkers,
+            cache_dir=args.cache_dir,
+            catalog=args.catalog
+        )
+        return
+
+    # When the ZIP goes to stdout, all messages go to stderr instead
+    output = args.output
+    messages = contextlib.nullcontext()
+    if output == "-":
+        output = sys.stdout.buffer
+        messages = contextlib.redirect_stdout(sys.stderr)
+    with messages:
+        options = ArchiveOptions(
+            keep=args.keep,
+            workers=args.workers,
+            keep_daily=args.keep_daily,
+            keep_weekly=args.keep_weekly,
+            keep_monthly=args.keep_monthly,
+            incremental=args.incremental,
+            content_hash=args.hash,
+            output=output,
+            policy=CompressionPolicy(args.compression, args.level, auto_store=not args.no_auto_store),
+            inventory_format=args.inventory_format or "txt",
+            stats=stats,
+            stats_format=args.stats_format,
+            resume=args.resume,
+            unchanged=args.unchanged,
+            prefetch=args.prefetch,
+            max_volume_size=args.max_volume_size,
+            verify=args.verify,
+            update_from=args.update_from,
+            hash_cache=args.hash_cache,
+            walkers=args.walkers,
+            cache_dir=args.cache_dir,
+            catalog=args.catalog
+        )
+        create_zip_archive(
+            source_dir=source_dir,
+            includes=include_patterns,
+            excludes=exclude_patterns,
+            date_format=args.date_format,
+            inventory=args.inventory or args.inventory_format is not None,
+            backup_location=args.backup_location or Path.cwd(),
+            options=options
+        )
+        if stats:
+            for line in stats.report():
+                print(line)
 
 
 if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()  # --dedup worker processes of the PyInstaller build
     main()